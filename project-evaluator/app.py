@@ -1,7 +1,19 @@
 from flask import Flask, render_template
 from config import Config
-from models import db, Project, Evaluation, AIProviderConfig
-from routes import main_bp, api_bp
+from models import db, Project, Evaluation, AIProviderConfig, upgrade_schema
+from routes import main_bp, api_bp, admin_bp
+from services.query_monitor import query_monitor
+from services.tracing import tracer
+from services.metrics import metrics
+from services.profiling import request_profiler
+from services.runtime_settings import runtime_settings
+from services.routing_policy import routing_policy
+from services.portfolio_index import portfolio_index
+from services import leaderboard, changes, http_cache, json_provider, sqlite_profile
+from services.search import install_search
+from services.events import event_broker
+from services.evaluation_queue import evaluation_queue
+from services.response_cache import response_cache
 import logging
 import os
 
@@ -17,11 +29,28 @@ def create_app(config_class=Config):
     )
     
     # Initialize extensions
+    json_provider.init_app(app)
+    sqlite_profile.configure(app)
     db.init_app(app)
+    sqlite_profile.init_app(app, db)
+    query_monitor.init_app(app, db)
+    tracer.init_app(app)
+    metrics.init_app(app)
+    runtime_settings.init_app(app)
+    request_profiler.init_app(app)
+    routing_policy.init_app(app)
+    portfolio_index.init_app(app, db)
+    leaderboard.init_app(app)
+    changes.init_app(app)
+    http_cache.init_app(app)
+    response_cache.init_app(app)
+    event_broker.init_app(app)
+    evaluation_queue.init_app(app)
     
     # Register blueprints
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp)
+    app.register_blueprint(admin_bp)
     
     # Error handlers
     @app.errorhandler(404)
@@ -85,6 +114,10 @@ def create_app(config_class=Config):
     # Create database tables
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+        http_cache.ensure_portfolio_version()
+        leaderboard.ensure_leaderboard()
+        app.extensions['search_backend'] = install_search(db)
         
         # Add sample data if database is empty
         if Project.query.count() == 0:
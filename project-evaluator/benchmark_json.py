@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization of the project listing
+Compares Flask's default provider (json module) with OrjsonProvider on the
+full /api/projects representation, and repeated suggestion parsing with and
+without the per-instance cache. Uses an in-memory database.
+
+Usage: python benchmark_json.py [--projects 1000] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from config import Config
+from models import db, Project, Evaluation
+from services.json_provider import OrjsonProvider, orjson
+from services.project_queries import project_listing_query, serialize_projects
+
+class BenchmarkConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQL_MONITOR_ENABLED = False
+    TRACING_ENABLED = False
+    PROFILING_ENABLED = False
+    RESPONSE_CACHE_BACKEND = 'none'
+
+def populate(count):
+    """Add evaluated projects with realistic text lengths"""
+    for i in range(count):
+        project = Project(
+            titre=f'Projet de référence {i}',
+            pvp='Opérations',
+            contexte='Contexte détaillé du projet. ' * 40,
+            objectifs='Objectifs mesurables et échéancier. ' * 30,
+            fonctionnalites='Fonctionnalité attendue, intégration. ' * 30,
+            defis_techniques='Intégration ERP\nMigration des données\nSécurité',
+            duree_estimee=120
+        )
+        db.session.add(project)
+        db.session.flush()
+        evaluation = Evaluation(project_id=project.id, score_final=6.5, model='gpt-4.1-2025-04-14', prompt_version='1.0',
+                                valeur_business=7, faisabilite_technique=6, effort_requis=5,
+                                niveau_risque=6, urgence=7, alignement_strategique=8)
+        evaluation.set_suggestions({criterion: 'Préciser les hypothèses et les indicateurs de succès. ' * 4
+                                    for criterion in ('valeur_business', 'effort_requis', 'niveau_risque')})
+        db.session.add(evaluation)
+    db.session.commit()
+
+def timed(function, repeat):
+    """Best wall time of several runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--projects', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    if orjson is None:
+        print("❌ orjson is not installed (pip install orjson)")
+        return False
+    
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        print(f"🔄 Creating {args.projects} evaluated projects...")
+        populate(args.projects)
+        
+        fieldset = {'fields': None, 'include': []}
+        projects = project_listing_query({}, fieldset).all()
+        payload = {'success': True, 'total': len(projects), 'offset': 0,
+                   'projects': serialize_projects(projects, fieldset)}
+        
+        default = DefaultJSONProvider(app)
+        fast = OrjsonProvider(app)
+        default_ms = timed(lambda: default.response(payload), args.repeat)
+        fast_ms = timed(lambda: fast.response(payload), args.repeat)
+        size = len(fast.response(payload).get_data())
+        
+        print(f"\n📦 Listing payload: {args.projects} projects, {size / 1024:.0f} KB")
+        print(f"   json module : {default_ms:8.2f} ms")
+        print(f"   orjson      : {fast_ms:8.2f} ms  ({default_ms / fast_ms:.1f}x)")
+        
+        evaluations = [project.latest_evaluation for project in projects if project.latest_evaluation]
+        for evaluation in evaluations:
+            evaluation.__dict__.pop('_json_cache', None)
+        first_ms = timed(lambda: [e.get_suggestions() for e in evaluations], 1)
+        cached_ms = timed(lambda: [e.get_suggestions() for e in evaluations], args.repeat)
+        
+        print(f"\n💬 Suggestions of {len(evaluations)} evaluations")
+        print(f"   first parse : {first_ms:8.2f} ms")
+        print(f"   cached      : {cached_ms:8.2f} ms")
+        return True
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
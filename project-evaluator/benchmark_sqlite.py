@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent reads and writes on a file SQLite database
+Runs the same mixed workload twice in a temporary directory: with SQLite's
+stock settings (rollback journal, synchronous=FULL, default pool) and with the
+production profile of services/sqlite_profile.py (WAL, synchronous=NORMAL,
+busy timeout, mmap, page cache, sized pool). Readers load a listing page,
+writers record an evaluation and commit.
+
+Usage: python benchmark_sqlite.py [--projects 1000] [--readers 8] [--writers 2] [--duration 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy.exc import OperationalError
+from app import create_app
+from config import Config
+from models import db, Project, Evaluation
+from services.project_queries import project_listing_query, serialize_projects
+
+def make_config(path, tuned):
+    """Configuration class for one run"""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        SQLITE_PROFILE_ENABLED = tuned
+        SQL_MONITOR_ENABLED = False
+        TRACING_ENABLED = False
+        PROFILING_ENABLED = False
+        METRICS_ENABLED = False
+        RESPONSE_CACHE_BACKEND = 'none'
+        EVALUATION_QUEUE_WORKERS = 0
+    return BenchmarkConfig
+
+def populate(count):
+    """Add evaluated projects with realistic text lengths"""
+    for i in range(count):
+        project = Project(
+            titre=f'Projet de référence {i}',
+            pvp='Opérations',
+            contexte='Contexte détaillé du projet. ' * 40,
+            objectifs='Objectifs mesurables et échéancier. ' * 30,
+            fonctionnalites='Fonctionnalité attendue, intégration. ' * 30
+        )
+        db.session.add(project)
+        db.session.flush()
+        db.session.add(new_evaluation(project.id))
+    db.session.commit()
+
+def new_evaluation(project_id):
+    """Evaluation with random criterion scores"""
+    scores = {criterion: round(random.uniform(1, 10), 1) for criterion in (
+        'valeur_business', 'faisabilite_technique', 'effort_requis',
+        'niveau_risque', 'urgence', 'alignement_strategique')}
+    return Evaluation(project_id=project_id, score_final=round(sum(scores.values()) / 6, 2), **scores)
+
+def run(app, readers, writers, duration, project_ids):
+    """Run the workload; returns (reads, writes, lock errors)"""
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    fieldset = {'fields': None, 'include': []}
+
+    def reader():
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                try:
+                    serialize_projects(project_listing_query({}, fieldset).limit(50).all(), fieldset)
+                    key = 'reads'
+                except OperationalError:
+                    key = 'errors'
+                db.session.rollback()
+                with lock:
+                    counts[key] += 1
+
+    def writer():
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                try:
+                    db.session.add(new_evaluation(random.choice(project_ids)))
+                    db.session.commit()
+                    key = 'writes'
+                except OperationalError:
+                    db.session.rollback()
+                    key = 'errors'
+                with lock:
+                    counts[key] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts['reads'], counts['writes'], counts['errors']
+
+def benchmark(tuned, args):
+    """Create a fresh database and run the workload on it"""
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(make_config(os.path.join(directory, 'benchmark.db'), tuned))
+        with app.app_context():
+            populate(args.projects)
+            project_ids = [id for (id,) in db.session.query(Project.id)]
+            journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+            db.session.remove()
+        reads, writes, errors = run(app, args.readers, args.writers, args.duration, project_ids)
+        with app.app_context():
+            db.engine.dispose()
+
+    label = 'tuned profile ' if tuned else 'stock settings'
+    print(f"   {label} ({journal_mode:>6}): {reads / args.duration:8.1f} reads/s  "
+          f"{writes / args.duration:7.1f} writes/s  {errors} lock errors")
+    return reads, writes
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--projects', type=int, default=1000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"🔄 {args.projects} projects, {args.readers} readers, {args.writers} writers, {args.duration:.0f} s per run\n")
+    stock_reads, stock_writes = benchmark(False, args)
+    tuned_reads, tuned_writes = benchmark(True, args)
+
+    print(f"\n📈 Reads {tuned_reads / max(stock_reads, 1):.1f}x, writes {tuned_writes / max(stock_writes, 1):.1f}x")
+    return True
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
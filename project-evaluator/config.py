@@ -10,6 +10,77 @@ class Config:
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
     APP_NAME = os.environ.get('APP_NAME') or 'Évaluateur de Projets d\'Investissement'
     
+    # Administrative endpoints (/admin/*) require this token in X-Admin-Token
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    
+    # Request tracing
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'true').lower() == 'true'
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.05))
+    TRACE_EXPORTER = os.environ.get('TRACE_EXPORTER', 'memory')  # 'memory' or 'jsonl'
+    TRACE_FILE = os.environ.get('TRACE_FILE')
+    TRACE_BUFFER_SIZE = int(os.environ.get('TRACE_BUFFER_SIZE', 200))
+    
+    # On-demand request profiling (X-Profile: 1 header or /admin/profiling)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'true').lower() == 'true'
+    PROFILE_OUTPUT_DIR = os.environ.get('PROFILE_OUTPUT_DIR')
+    PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.005))
+    
+    # Settings changed at runtime through /admin/* (profiling rates, routing constraints)
+    RUNTIME_SETTINGS_FILE = os.environ.get('RUNTIME_SETTINGS_FILE')
+    
+    # Provider routing: 'adaptive' orders providers by observed latency and
+    # success rate, 'static' keeps the configured fallback order
+    ROUTING_POLICY = os.environ.get('ROUTING_POLICY', 'adaptive')
+    ROUTING_EWMA_ALPHA = float(os.environ.get('ROUTING_EWMA_ALPHA', 0.2))
+    ROUTING_PRIOR_LATENCY = float(os.environ.get('ROUTING_PRIOR_LATENCY', 10.0))
+    # Seconds charged per failed attempt on top of its latency (defaults to ROUTING_PRIOR_LATENCY)
+    ROUTING_FAILURE_PENALTY = float(os.environ.get('ROUTING_FAILURE_PENALTY', 0)) or None
+    
+    # Model cascade: evaluate with a cheap model first and escalate to the default
+    # model when the result is invalid, near a priority threshold, or not confident
+    EVALUATION_CASCADE_ENABLED = os.environ.get('EVALUATION_CASCADE_ENABLED', 'false').lower() == 'true'
+    CASCADE_MODELS = {
+        'openai': 'gpt-4.1-mini-2025-04-14',
+        'anthropic': 'claude-3-5-haiku',
+        'google': 'gemini-2.5-flash'
+    }
+    CASCADE_THRESHOLD_MARGIN = float(os.environ.get('CASCADE_THRESHOLD_MARGIN', 0.5))
+    CASCADE_MIN_CONFIDENCE = float(os.environ.get('CASCADE_MIN_CONFIDENCE', 0.7))
+    
+    # Prometheus-style metrics exposed at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Shared directory for per-worker snapshots (required with several gunicorn workers)
+    METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+    # Seconds between snapshot writes of a worker (snapshots are also written on each scrape)
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5.0))
+    
+    # Model list prices in USD per million tokens, used for cost metrics
+    MODEL_PRICING = {
+        'gpt-4o': {'input': 2.50, 'output': 10.00},
+        'gpt-4.1-2025-04-14': {'input': 2.00, 'output': 8.00},
+        'gpt-4.1-mini-2025-04-14': {'input': 0.40, 'output': 1.60},
+        'o3-2025-04-16': {'input': 2.00, 'output': 8.00},
+        'o4-mini-2025-04-16': {'input': 1.10, 'output': 4.40},
+        'claude-3-5-haiku': {'input': 0.80, 'output': 4.00},
+        'claude-3-5-sonnet': {'input': 3.00, 'output': 15.00},
+        'claude-4-sonnet': {'input': 3.00, 'output': 15.00},
+        'claude-4-opus': {'input': 15.00, 'output': 75.00},
+        'gemini-2.0-flash-exp': {'input': 0.10, 'output': 0.40},
+        'gemini-2.5-flash': {'input': 0.30, 'output': 2.50},
+        'gemini-2.5-pro': {'input': 1.25, 'output': 10.00}
+    }
+    
+    # SQL query monitoring (per-request budget and N+1 detection)
+    SQL_MONITOR_ENABLED = os.environ.get('SQL_MONITOR_ENABLED', 'true').lower() == 'true'
+    SQL_QUERY_BUDGET = int(os.environ.get('SQL_QUERY_BUDGET', 30))
+    SQL_REPEAT_THRESHOLD = int(os.environ.get('SQL_REPEAT_THRESHOLD', 5))
+    SQL_QUERY_BUDGET_STRICT = os.environ.get('SQL_QUERY_BUDGET_STRICT', 'false').lower() == 'true'
+    SQL_QUERY_BUDGETS = {
+        'main.index': 5,
+        'main.project_detail': 3,
+        'api.get_projects': 4
+    }
+    
     # Evaluation criteria weights
     EVALUATION_WEIGHTS = {
         'valeur_business': 0.25,
@@ -20,12 +91,73 @@ class Config:
         'alignement_strategique': 0.10
     }
     
+    # Criteria re-evaluated when a project field is edited; an edit touching
+    # every criterion triggers a full evaluation
+    EVALUATION_FIELD_CRITERIA = {
+        'titre': ['valeur_business', 'alignement_strategique'],
+        'pvp': ['urgence', 'alignement_strategique'],
+        'contexte': ['valeur_business', 'urgence', 'alignement_strategique'],
+        'objectifs': ['valeur_business', 'alignement_strategique', 'effort_requis'],
+        'fonctionnalites': ['faisabilite_technique', 'effort_requis', 'niveau_risque']
+    }
+    
     # Priority thresholds
     PRIORITY_THRESHOLDS = {
         'high': 7.0,
         'medium': 4.0
     }
     
+    # In-memory score index for what-if simulations, reloaded after this many
+    # seconds to pick up writes from other workers
+    PORTFOLIO_INDEX_TTL = float(os.environ.get('PORTFOLIO_INDEX_TTL', 60.0))
+    
+    # Delta sync (/api/changes): the returned cursor lags by this many seconds so
+    # in-flight transactions are not skipped; deletions are kept this many days
+    CHANGES_CURSOR_LAG = float(os.environ.get('CHANGES_CURSOR_LAG', 5))
+    CHANGES_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('CHANGES_TOMBSTONE_RETENTION_DAYS', 90))
+    
+    # Live dashboard updates (/api/events): keep-alive comment interval in seconds,
+    # open streams per worker (each holds a thread), seconds before a stream is
+    # closed for the browser to reconnect, and events per commit or poll beyond
+    # which clients get a single 'refresh'
+    SSE_HEARTBEAT_INTERVAL = float(os.environ.get('SSE_HEARTBEAT_INTERVAL', 15))
+    SSE_MAX_SUBSCRIBERS = int(os.environ.get('SSE_MAX_SUBSCRIBERS', 50))
+    SSE_STREAM_MAX_AGE = float(os.environ.get('SSE_STREAM_MAX_AGE', 300))
+    SSE_BULK_THRESHOLD = int(os.environ.get('SSE_BULK_THRESHOLD', 20))
+    # Event source: 'changes' polls the change feed every EVENTS_POLL_INTERVAL
+    # seconds (shared by all workers), 'local' only sees this process's commits
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'changes')
+    EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 2))
+    
+    # Background evaluation of bulk-imported projects (0 = no worker thread)
+    EVALUATION_QUEUE_WORKERS = int(os.environ.get('EVALUATION_QUEUE_WORKERS', 2))
+    
+    # HTTP caching of project pages and the project API: 0 makes clients and
+    # proxies revalidate every time (ETag/304), N lets them reuse a response N seconds
+    HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 0))
+    
+    # JSON serialization of responses: 'orjson' (when installed) or 'default' (json module)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+    
+    # Server-side cache of listing fragments and API pages, keyed by the portfolio
+    # or project version: 'lru' (per worker), 'redis' (RESPONSE_CACHE_URL, shared) or 'none'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'lru')
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+    RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL')
+    
+    # SQLite production profile (file databases only): WAL journaling, synchronous=NORMAL,
+    # lock wait, memory-mapped reads, page cache and connection pool sizes
+    SQLITE_PROFILE_ENABLED = os.environ.get('SQLITE_PROFILE_ENABLED', 'true').lower() == 'true'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE_MB = int(os.environ.get('SQLITE_MMAP_SIZE_MB', 256))
+    SQLITE_CACHE_SIZE_MB = int(os.environ.get('SQLITE_CACHE_SIZE_MB', 64))
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 10))
+    SQLITE_POOL_MAX_OVERFLOW = int(os.environ.get('SQLITE_POOL_MAX_OVERFLOW', 10))
+    
+    # Projects rendered with the home page; more are loaded through /api/projects
+    INDEX_PAGE_SIZE = int(os.environ.get('INDEX_PAGE_SIZE', 50))
+    
     # PVP departments
     PVP_DEPARTMENTS = [
         'Direction Générale',
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Bulk import projects from a CSV (with a header row) or NDJSON file
+Projects are inserted in batches without calling the model; pass --evaluate
+to evaluate them before exiting, otherwise the running application evaluates
+them once queued through POST /admin/evaluations/queue
+"""
+
+import argparse
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from services.bulk_import import BATCH_SIZE, IMPORT_FORMATS, import_projects, read_rows
+from services.evaluation_queue import evaluation_queue
+
+def main():
+    """Import projects from a file"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help='CSV or NDJSON file')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help='File format (default: from the extension)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Projects inserted per transaction')
+    parser.add_argument('--evaluate', action='store_true', help='Evaluate the imported projects before exiting')
+    args = parser.parse_args()
+    
+    import_format = args.format or args.path.rsplit('.', 1)[-1].lower()
+    if import_format not in IMPORT_FORMATS:
+        print(f"❌ Unknown format, use --format {'|'.join(IMPORT_FORMATS)}")
+        return False
+    
+    app = create_app()
+    
+    with app.app_context():
+        print(f"📥 Importing {args.path}...")
+        
+        try:
+            # The queue is drained here rather than by background workers
+            evaluation_queue.workers = 0
+            with open(args.path, 'rb') as stream:
+                result = import_projects(read_rows(stream, import_format), args.batch_size, evaluate=args.evaluate)
+            print(f"✅ {result['imported']} projects imported in {result['duration_ms']} ms")
+            if result['rejected']:
+                print(f"⚠️  {result['rejected']} rows rejected:")
+                for error in result['errors']:
+                    print(f"   line {error['line']}: {error['error']}")
+            
+            if args.evaluate:
+                print(f"🤖 Evaluating {result['queued']} projects...")
+                evaluated = evaluation_queue.drain()
+                print(f"✅ {evaluated} projects evaluated")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Import failed: {e}")
+            return False
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
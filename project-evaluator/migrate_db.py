@@ -12,7 +12,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app
-from models import db, AIProviderConfig
+from models import db, AIProviderConfig, upgrade_schema
 
 def migrate_database():
     """Migrate database to add AIProviderConfig table"""
@@ -24,6 +24,7 @@ def migrate_database():
         try:
             # Create the new table
             db.create_all()
+            upgrade_schema()
             print("✅ Database tables created successfully")
             
             # Check if we need to add default provider configurations
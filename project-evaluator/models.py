@@ -1,22 +1,55 @@
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import deferred
 from datetime import datetime
 import json
+from services.json_provider import JSONDecodeError, loads as json_loads
+from services.scoring import (EVALUABLE_FIELDS, CRITERIA, PRIORITY_TEXTS, PRIORITY_ACTIONS, PRIORITY_BADGES,
+                             content_hash, priority_for_score)
 
 db = SQLAlchemy()
 
+
+def _parse_json_column(instance, column):
+    """
+    Parse a JSON text column, reusing the result while the column keeps the same value
+
+    Invalid or empty JSON parses as an empty dictionary.
+    """
+    raw = getattr(instance, column)
+    if not raw:
+        return {}
+    cache = instance.__dict__.get('_json_cache')
+    if cache is None:
+        cache = instance._json_cache = {}
+    cached = cache.get(column)
+    if cached is not None and cached[0] is raw:
+        return cached[1]
+    try:
+        parsed = json_loads(raw)
+    except JSONDecodeError:
+        parsed = {}
+    cache[column] = (raw, parsed)
+    return parsed
+
+
 class Project(db.Model):
     __tablename__ = 'projects'
     
     id = db.Column(db.Integer, primary_key=True)
     titre = db.Column(db.String(200), nullable=False)
-    pvp = db.Column(db.String(100), nullable=False)
-    contexte = db.Column(db.Text, nullable=False)
-    objectifs = db.Column(db.Text, nullable=False)
-    fonctionnalites = db.Column(db.Text, nullable=False)
-    defis_techniques = db.Column(db.Text)  # AI-generated
+    pvp = db.Column(db.String(100), nullable=False, index=True)
+    # Long texts are loaded together on first access (undefer_group('texts') to load them upfront)
+    contexte = deferred(db.Column(db.Text, nullable=False), group='texts')
+    objectifs = deferred(db.Column(db.Text, nullable=False), group='texts')
+    fonctionnalites = deferred(db.Column(db.Text, nullable=False), group='texts')
+    defis_techniques = deferred(db.Column(db.Text), group='texts')  # AI-generated
     duree_estimee = db.Column(db.Integer)  # AI-generated, in days
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Hash of the evaluable fields as they were last evaluated
+    content_hash = db.Column(db.String(64))
     
     # Relationship with evaluations
     evaluations = db.relationship('Evaluation', backref='project', lazy=True, cascade='all, delete-orphan')
@@ -24,7 +57,19 @@ class Project(db.Model):
     @property
     def latest_evaluation(self):
         """Get the most recent evaluation for this project"""
-        return Evaluation.query.filter_by(project_id=self.id).order_by(Evaluation.created_at.desc()).first()
+        # Use the loaded relationship so listings can eager-load it in one query
+        if not self.evaluations:
+            return None
+        return max(self.evaluations, key=lambda e: (e.created_at or datetime.min, e.id or 0))
+    
+    @property
+    def evaluable_data(self):
+        """Get the fields sent to the evaluation prompt"""
+        return {field: getattr(self, field) for field in EVALUABLE_FIELDS}
+    
+    def compute_content_hash(self):
+        """Hash the current evaluable fields"""
+        return content_hash(self.evaluable_data)
     
     @property
     def priority_level(self):
@@ -33,51 +78,23 @@ class Project(db.Model):
         if not eval:
             return 'non-évalué'
         
-        if eval.score_final >= 7.0:
-            return 'élevée'
-        elif eval.score_final >= 4.0:
-            return 'moyenne'
-        else:
-            return 'faible'
+        thresholds = current_app.config.get('PRIORITY_THRESHOLDS') if has_app_context() else None
+        return priority_for_score(eval.score_final, thresholds)
     
     @property
     def priority_badge_class(self):
         """Get CSS class for priority badge"""
-        priority = self.priority_level
-        if priority == 'élevée':
-            return 'badge bg-danger'
-        elif priority == 'moyenne':
-            return 'badge bg-warning'
-        elif priority == 'faible':
-            return 'badge bg-success'
-        else:
-            return 'badge bg-secondary'
+        return PRIORITY_BADGES[self.priority_level]
     
     @property
     def priority_text(self):
         """Get display text for priority"""
-        priority = self.priority_level
-        if priority == 'élevée':
-            return 'Priorité Élevée'
-        elif priority == 'moyenne':
-            return 'Priorité Moyenne'
-        elif priority == 'faible':
-            return 'Priorité Faible'
-        else:
-            return 'Non Évalué'
+        return PRIORITY_TEXTS[self.priority_level]
     
     @property
     def action_text(self):
         """Get action text based on priority"""
-        priority = self.priority_level
-        if priority == 'élevée':
-            return 'Lancement immédiat'
-        elif priority == 'moyenne':
-            return 'Planification court terme'
-        elif priority == 'faible':
-            return 'Évaluation future'
-        else:
-            return 'Évaluation requise'
+        return PRIORITY_ACTIONS[self.priority_level]
     
     def to_dict(self):
         """Convert project to dictionary"""
@@ -113,17 +130,22 @@ class Evaluation(db.Model):
     alignement_strategique = db.Column(db.Float, nullable=False)
     
     score_final = db.Column(db.Float, nullable=False)
-    ai_suggestions = db.Column(db.Text)  # JSON string
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    ai_suggestions = deferred(db.Column(db.Text))  # JSON string, loaded on first access
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    # Inputs that produced this evaluation
+    model = db.Column(db.String(100))
+    prompt_version = db.Column(db.String(20))
+    weights_fingerprint = db.Column(db.String(64))
+    
+    @property
+    def scores(self):
+        """Get criterion scores as a dictionary"""
+        return {criterion: getattr(self, criterion) for criterion in CRITERIA}
     
     def get_suggestions(self):
-        """Parse AI suggestions from JSON"""
-        if self.ai_suggestions:
-            try:
-                return json.loads(self.ai_suggestions)
-            except json.JSONDecodeError:
-                return {}
-        return {}
+        """Parse AI suggestions from JSON (parsed once per stored value; do not mutate)"""
+        return _parse_json_column(self, 'ai_suggestions')
     
     def set_suggestions(self, suggestions_dict):
         """Store AI suggestions as JSON"""
@@ -142,6 +164,9 @@ class Evaluation(db.Model):
             'alignement_strategique': self.alignement_strategique,
             'score_final': self.score_final,
             'suggestions': self.get_suggestions(),
+            'model': self.model,
+            'prompt_version': self.prompt_version,
+            'weights_fingerprint': self.weights_fingerprint,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
     
@@ -170,6 +195,81 @@ class Evaluation(db.Model):
         ]
 
 
+class WeightSet(db.Model):
+    """Versioned set of evaluation weights; evaluations reference it by fingerprint"""
+    __tablename__ = 'weight_sets'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Version number
+    fingerprint = db.Column(db.String(64), unique=True, nullable=False)
+    weights = db.Column(db.Text, nullable=False)  # JSON string
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def get_weights(self):
+        """Parse weights from JSON (parsed once per stored value; do not mutate)"""
+        return _parse_json_column(self, 'weights')
+    
+    def to_dict(self):
+        """Convert weight set to dictionary"""
+        return {
+            'version': self.id,
+            'fingerprint': self.fingerprint,
+            'weights': self.get_weights(),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class ProjectTombstone(db.Model):
+    """Deleted project, kept so that delta synchronization can report the deletion"""
+    __tablename__ = 'project_tombstones'
+    
+    project_id = db.Column(db.Integer, primary_key=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class LeaderboardEntry(db.Model):
+    """Materialized ranking of projects by the score_final of their latest evaluation"""
+    __tablename__ = 'leaderboard'
+    __table_args__ = (
+        db.Index('ix_leaderboard_pvp_rank', 'pvp', 'pvp_rank'),
+        db.Index('ix_leaderboard_score', 'score_final', 'project_id'),
+    )
+    
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), primary_key=True)
+    evaluation_id = db.Column(db.Integer, nullable=False)
+    pvp = db.Column(db.String(100), nullable=False)
+    score_final = db.Column(db.Float, nullable=False)
+    rank = db.Column(db.Integer, nullable=False, index=True)
+    pvp_rank = db.Column(db.Integer, nullable=False)
+    priority = db.Column(db.String(20), nullable=False)
+    
+    def to_dict(self, total):
+        """
+        Convert leaderboard entry to dictionary
+        
+        Args:
+            total: Number of ranked projects, for the percentile
+        """
+        return {
+            'project_id': self.project_id,
+            'evaluation_id': self.evaluation_id,
+            'pvp': self.pvp,
+            'score_final': self.score_final,
+            'rank': self.rank,
+            'pvp_rank': self.pvp_rank,
+            'percentile': round((total - self.rank + 1) * 100.0 / total, 1),
+            'priority': self.priority
+        }
+
+
+class PortfolioVersion(db.Model):
+    """Single-row counter bumped by every write to projects or evaluations (HTTP validators)"""
+    __tablename__ = 'portfolio_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
 class AIProviderConfig(db.Model):
     """Configuration for AI providers at runtime"""
     __tablename__ = 'ai_provider_configs'
@@ -186,13 +286,8 @@ class AIProviderConfig(db.Model):
     config_data = db.Column(db.Text)  # JSON string for provider-specific config
     
     def get_config_data(self):
-        """Parse config data from JSON"""
-        if self.config_data:
-            try:
-                return json.loads(self.config_data)
-            except json.JSONDecodeError:
-                return {}
-        return {}
+        """Parse config data from JSON (parsed once per stored value; do not mutate)"""
+        return _parse_json_column(self, 'config_data')
     
     def set_config_data(self, config_dict):
         """Store config data as JSON"""
@@ -220,3 +315,29 @@ class AIProviderConfig(db.Model):
     def get_primary_provider(cls):
         """Get the primary (highest priority) active provider"""
         return cls.query.filter_by(is_active=True).order_by(cls.priority.asc()).first()
+
+
+def upgrade_schema():
+    """
+    Add columns and indexes introduced after a database file was created
+    
+    db.create_all() only creates missing tables, so existing databases
+    (e.g. instance/projects.db) are brought up to date here
+    """
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(db.session.connection())
+    
+    db.session.commit()
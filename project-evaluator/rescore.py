@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Re-score every stored evaluation with the current EVALUATION_WEIGHTS
+Run this script after changing the weights in config.py; no AI provider is called
+"""
+
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from services.rescoring import rescore_evaluations
+
+def main():
+    """Re-score evaluations with the configured weights"""
+    app = create_app()
+    
+    with app.app_context():
+        print("🔄 Re-scoring evaluations...")
+        
+        try:
+            result = rescore_evaluations(app.config['EVALUATION_WEIGHTS'])
+            weight_set = result['weight_set']
+            print(f"✅ {result['updated']} evaluations re-scored in {result['duration_ms']} ms")
+            print(f"ℹ️  Weight set v{weight_set['version']} ({weight_set['fingerprint']}): {weight_set['weights']}")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Re-scoring failed: {e}")
+            return False
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
@@ -1,5 +1,6 @@
 # Routes module
 from .main import main_bp
 from .api import api_bp
+from .admin import admin_bp
 
-__all__ = ['main_bp', 'api_bp']
+__all__ = ['main_bp', 'api_bp', 'admin_bp']
@@ -0,0 +1,177 @@
+from flask import Blueprint, request, jsonify, send_file, abort, current_app
+from services.admin_auth import admin_required
+from services.tracing import tracer
+from services.profiling import request_profiler
+from services.routing_policy import routing_policy
+from services.ai_service import AIService
+from services.rescoring import rescore_evaluations
+from services.leaderboard import check_leaderboard, rebuild_leaderboard
+from services.evaluation_queue import evaluation_queue
+from services.scoring import weights_fingerprint
+from models import db, Evaluation, WeightSet
+import logging
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
+logger = logging.getLogger(__name__)
+
+@admin_bp.route('/traces', methods=['GET'])
+@admin_required
+def get_traces():
+    """Recent sampled request traces (newest first)"""
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({
+        'success': True,
+        'sample_rate': tracer.sample_rate,
+        'traces': tracer.exporter.get_traces(limit)
+    })
+
+@admin_bp.route('/profiling', methods=['GET'])
+@admin_required
+def get_profiling():
+    """Profiling sample rates and recently stored profiles"""
+    endpoint = request.args.get('endpoint')
+    return jsonify({
+        'success': True,
+        'sample_rates': request_profiler.get_sample_rates(),
+        'profiles': request_profiler.list_profiles(endpoint, request.args.get('limit', 50, type=int))
+    })
+
+@admin_bp.route('/profiling', methods=['PUT'])
+@admin_required
+def set_profiling():
+    """Set the profiling sample rate of an endpoint ('*' for all, 0 to disable)"""
+    data = request.get_json() or {}
+    endpoint = data.get('endpoint')
+    
+    try:
+        rate = float(data.get('rate', 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'rate doit être un nombre entre 0 et 1'}), 400
+    
+    if not endpoint:
+        return jsonify({'error': 'endpoint est requis'}), 400
+    
+    request_profiler.set_sample_rate(endpoint, rate)
+    logger.info(f"Profiling sample rate for {endpoint} set to {rate}")
+    return jsonify({
+        'success': True,
+        'sample_rates': request_profiler.get_sample_rates()
+    })
+
+@admin_bp.route('/profiling/<endpoint>/<filename>', methods=['GET'])
+@admin_required
+def download_profile(endpoint, filename):
+    """Download a profile in folded stack format (flamegraph.pl, speedscope)"""
+    path = request_profiler.profile_path(endpoint, filename)
+    if path is None:
+        abort(404)
+    return send_file(path, mimetype='text/plain', as_attachment=True, download_name=filename)
+
+@admin_bp.route('/routing', methods=['GET'])
+@admin_required
+def get_routing():
+    """Routing constraints, per-route statistics and recent routing decisions"""
+    return jsonify({
+        'success': True,
+        'policy': 'adaptive' if routing_policy.enabled else 'static',
+        'constraints': routing_policy.get_constraints(),
+        'routes': routing_policy.get_stats(),
+        'decisions': routing_policy.get_decisions(request.args.get('limit', 20, type=int))
+    })
+
+@admin_bp.route('/routing', methods=['PUT'])
+@admin_required
+def set_routing():
+    """Set the routing constraints (pinned_primary, max_cost_per_call, excluded)"""
+    data = request.get_json() or {}
+    
+    max_cost = data.get('max_cost_per_call')
+    if max_cost is not None:
+        try:
+            max_cost = float(max_cost)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'max_cost_per_call doit être un nombre'}), 400
+    
+    excluded = data.get('excluded', [])
+    if not isinstance(excluded, list):
+        return jsonify({'error': 'excluded doit être une liste de fournisseurs'}), 400
+    
+    constraints = {
+        'pinned_primary': data.get('pinned_primary') or None,
+        'max_cost_per_call': max_cost,
+        'excluded': [str(name) for name in excluded]
+    }
+    routing_policy.set_constraints(constraints)
+    logger.info(f"Routing constraints set to {constraints}")
+    return jsonify({
+        'success': True,
+        'constraints': routing_policy.get_constraints()
+    })
+
+@admin_bp.route('/cascade', methods=['GET'])
+@admin_required
+def get_cascade():
+    """Cascade escalation rate, escalation reasons and latency savings"""
+    return jsonify({
+        'success': True,
+        'enabled': current_app.config.get('EVALUATION_CASCADE_ENABLED', False),
+        'models': current_app.config.get('CASCADE_MODELS', {}),
+        'stats': AIService.get_cascade_stats()
+    })
+
+@admin_bp.route('/weights', methods=['GET'])
+@admin_required
+def get_weight_sets():
+    """Weight set versions and the number of evaluations scored with each"""
+    current = weights_fingerprint(current_app.config['EVALUATION_WEIGHTS'])
+    counts = dict(
+        db.session.query(Evaluation.weights_fingerprint, db.func.count(Evaluation.id))
+        .group_by(Evaluation.weights_fingerprint).all()
+    )
+    return jsonify({
+        'success': True,
+        'current_fingerprint': current,
+        'stale_evaluations': sum(count for fingerprint, count in counts.items() if fingerprint != current),
+        'weight_sets': [
+            dict(weight_set.to_dict(), evaluations=counts.get(weight_set.fingerprint, 0))
+            for weight_set in WeightSet.query.order_by(WeightSet.id.desc()).all()
+        ]
+    })
+
+@admin_bp.route('/rescore', methods=['POST'])
+@admin_required
+def rescore():
+    """Recompute score_final of every evaluation with the configured weights (no AI call)"""
+    try:
+        result = rescore_evaluations(current_app.config['EVALUATION_WEIGHTS'])
+        return jsonify(dict(result, success=True))
+    except Exception as e:
+        logger.error(f"Error re-scoring evaluations: {e}")
+        db.session.rollback()
+        return jsonify({'error': 'Erreur lors du recalcul des scores'}), 500
+
+@admin_bp.route('/leaderboard/check', methods=['GET'])
+@admin_required
+def check_leaderboard_consistency():
+    """Compare the materialized leaderboard with a from-scratch ranking"""
+    return jsonify(dict(check_leaderboard(), success=True))
+
+@admin_bp.route('/leaderboard/rebuild', methods=['POST'])
+@admin_required
+def rebuild_leaderboard_table():
+    """Rebuild the materialized leaderboard from the latest evaluations"""
+    try:
+        ranked = rebuild_leaderboard()
+        db.session.commit()
+        return jsonify({'success': True, 'ranked_projects': ranked})
+    except Exception as e:
+        logger.error(f"Error rebuilding leaderboard: {e}")
+        db.session.rollback()
+        return jsonify({'error': 'Erreur lors de la reconstruction du classement'}), 500
+
+@admin_bp.route('/evaluations/queue', methods=['POST'])
+@admin_required
+def queue_unevaluated():
+    """Queue every project without an evaluation for background evaluation"""
+    queued = evaluation_queue.enqueue_unevaluated()
+    return jsonify({'success': True, 'queued': queued, 'queue_depth': evaluation_queue.depth})
@@ -1,11 +1,29 @@
-from flask import Blueprint, request, jsonify, current_app
-from models import db, Project, Evaluation
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from models import db, Project, Evaluation, LeaderboardEntry
 from services import AIService
+from services.evaluations import record_evaluation, reevaluate_project, update_project
+from services.portfolio_index import portfolio_index
+from services.portfolio_selection import select_portfolio
+from services.search import search_projects
+from services.project_queries import (parse_project_filters, parse_fieldset, project_listing_query,
+                                      serialize_projects, paginate)
+from services.changes import CursorExpired, get_changes, parse_cursor, purge_tombstones
+from services.events import event_broker
+from services.export import FORMATS, export_portfolio
+from services.http_cache import conditional, portfolio_version, project_validators
+from services.response_cache import response_cache
+from services.bulk_import import IMPORT_FORMATS, import_projects, read_rows, validate_project_data
+from services.scoring import CRITERIA
+from sqlalchemy.orm import undefer_group
+import time
 import logging
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 logger = logging.getLogger(__name__)
 
+# Free-text project fields the batch improvement accepts
+IMPROVABLE_FIELDS = ('contexte', 'objectifs', 'fonctionnalites')
+
 @api_bp.route('/projects', methods=['POST'])
 def create_project():
     """API endpoint to create and evaluate a project"""
@@ -15,19 +33,9 @@ def create_project():
         if not data:
             return jsonify({'error': 'Données JSON requises'}), 400
         
-        # Validate required fields
-        required_fields = ['titre', 'pvp', 'contexte', 'objectifs', 'fonctionnalites']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'Le champ {field} est requis'}), 400
-        
-        # Validate field lengths
-        if len(data['titre']) > 200:
-            return jsonify({'error': 'Le titre ne peut pas dépasser 200 caractères'}), 400
-        
-        for field in ['contexte', 'objectifs', 'fonctionnalites']:
-            if len(data[field]) < 100:
-                return jsonify({'error': f'Le champ {field} doit contenir au moins 100 caractères'}), 400
+        error = validate_project_data(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Create project
         project = Project(
@@ -43,27 +51,10 @@ def create_project():
           # Evaluate project
         try:
             ai_service = AIService()
-            evaluation_result = ai_service.evaluate_project(data)
+            evaluation_result = ai_service.evaluate_project(project.evaluable_data)
             
-            # Update project with AI-generated fields
-            project.defis_techniques = '\n'.join(evaluation_result.get('defis_techniques', []))
-            project.duree_estimee = evaluation_result.get('duree_estimee', 90)
-            
-            # Create evaluation
-            evaluation = Evaluation(
-                project_id=project.id,
-                valeur_business=evaluation_result['scores']['valeur_business'],
-                faisabilite_technique=evaluation_result['scores']['faisabilite_technique'],
-                effort_requis=evaluation_result['scores']['effort_requis'],
-                niveau_risque=evaluation_result['scores']['niveau_risque'],
-                urgence=evaluation_result['scores']['urgence'],
-                alignement_strategique=evaluation_result['scores']['alignement_strategique'],
-                score_final=evaluation_result['score_final']
-            )
-            
-            evaluation.set_suggestions(evaluation_result.get('suggestions', {}))
-            
-            db.session.add(evaluation)
+            # Store evaluation and AI-generated project fields
+            record_evaluation(project, evaluation_result)
             db.session.commit()
             
             return jsonify({
@@ -87,6 +78,30 @@ def create_project():
         db.session.rollback()
         return jsonify({'error': 'Erreur lors de la création du projet'}), 500
 
+@api_bp.route('/projects/import', methods=['POST'])
+def import_projects_api():
+    """API endpoint for bulk import (CSV or NDJSON file); projects are evaluated in the background"""
+    upload = request.files.get('file')
+    import_format = request.args.get('format')
+    if not import_format and upload and upload.filename:
+        import_format = upload.filename.rsplit('.', 1)[-1].lower()
+    if not import_format:
+        import_format = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson'}.get(request.mimetype)
+    if import_format not in IMPORT_FORMATS:
+        return jsonify({'error': f'Le paramètre format doit être parmi {", ".join(IMPORT_FORMATS)}'}), 400
+    
+    try:
+        stream = upload.stream if upload else request.stream
+        result = import_projects(read_rows(stream, import_format))
+        return jsonify(dict(result, success=True)), 202
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'Le fichier doit être encodé en UTF-8'}), 400
+    except Exception as e:
+        logger.error(f"Error importing projects: {e}")
+        db.session.rollback()
+        return jsonify({'error': 'Erreur lors de l\'import des projets'}), 500
+
 @api_bp.route('/improve-field', methods=['POST'])
 def improve_field():
     """API endpoint to get field improvement suggestions"""
@@ -120,86 +135,367 @@ def improve_field():
             'original_content': data.get('field_content', '') if data else ''
         }), 500
 
-@api_bp.route('/projects/<int:project_id>/reevaluate', methods=['GET'])
-def reevaluate_project_api(project_id):
-    """API endpoint to reevaluate a project"""
+@api_bp.route('/improve-fields', methods=['POST'])
+def improve_fields():
+    """API endpoint to improve several fields of the same project in one call"""
     try:
-        project = Project.query.get_or_404(project_id)
-          # Evaluate project
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'Données JSON requises'}), 400
+        
+        fields = data.get('fields')
+        project_context = data.get('project_context', '')
+        
+        if not isinstance(fields, dict) or not fields:
+            return jsonify({'error': 'fields doit être un objet {nom_du_champ: contenu} non vide'}), 400
+        unknown = [name for name in fields if name not in IMPROVABLE_FIELDS]
+        if unknown:
+            return jsonify({'error': f'Champs inconnus: {", ".join(unknown)} '
+                                     f'(disponibles: {", ".join(IMPROVABLE_FIELDS)})'}), 400
+        if not all(isinstance(content, str) and content.strip() for content in fields.values()):
+            return jsonify({'error': 'Chaque champ doit avoir un contenu'}), 400
+        
+        # Get improvement suggestions for every field at once
         ai_service = AIService()
-        evaluation_result = ai_service.evaluate_project({
-            'titre': project.titre,
-            'pvp': project.pvp,
-            'contexte': project.contexte,
-            'objectifs': project.objectifs,
-            'fonctionnalites': project.fonctionnalites
-        })
+        improved_fields = ai_service.improve_fields(fields, project_context)
         
-        # Update project with new AI-generated fields
-        project.defis_techniques = '\n'.join(evaluation_result.get('defis_techniques', []))
-        project.duree_estimee = evaluation_result.get('duree_estimee', 90)
-        
-        # Create new evaluation
-        evaluation = Evaluation(
-            project_id=project.id,
-            valeur_business=evaluation_result['scores']['valeur_business'],
-            faisabilite_technique=evaluation_result['scores']['faisabilite_technique'],
-            effort_requis=evaluation_result['scores']['effort_requis'],
-            niveau_risque=evaluation_result['scores']['niveau_risque'],
-            urgence=evaluation_result['scores']['urgence'],
-            alignement_strategique=evaluation_result['scores']['alignement_strategique'],
-            score_final=evaluation_result['score_final']
-        )
+        return jsonify({
+            'success': True,
+            'fields': {
+                name: {
+                    'original_content': content,
+                    'improved_content': improved_fields.get(name, content),
+                    'improved': improved_fields.get(name, content) != content
+                }
+                for name, content in fields.items()
+            }
+        })
         
-        evaluation.set_suggestions(evaluation_result.get('suggestions', {}))
+    except Exception as e:
+        logger.error(f"Error improving fields: {e}")
+        return jsonify({'error': 'Erreur lors de l\'amélioration des champs'}), 500
+
+@api_bp.route('/projects/<int:project_id>/reevaluate', methods=['GET'])
+def reevaluate_project_api(project_id):
+    """API endpoint to reevaluate a project (?force=true to always call the model)"""
+    try:
+        project = Project.query.get_or_404(project_id)
+        force = request.args.get('force', 'false').lower() in ('1', 'true')
         
-        db.session.add(evaluation)
+        # Reevaluate only if the fields, model, prompt or weights changed
+        evaluation, status = reevaluate_project(project, force=force)
         db.session.commit()
         
+        messages = {
+            'unchanged': 'Projet inchangé depuis la dernière évaluation',
+            'rescored': 'Score final recalculé avec les pondérations actuelles',
+            'evaluated': 'Projet réévalué avec succès'
+        }
         return jsonify({
             'success': True,
+            'status': status,
             'project': project.to_dict(),
-            'message': 'Projet réévalué avec succès'
+            'message': messages[status]
         })
         
     except Exception as e:
         logger.error(f"Error reevaluating project via API: {e}")
         return jsonify({'error': 'Erreur lors de la réévaluation'}), 500
 
+@api_bp.route('/projects/search', methods=['GET'])
+def search_projects_api():
+    """API endpoint for full-text search over projects (?q=...&limit=20)"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Le paramètre q est requis'}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    
+    try:
+        return jsonify(dict(search_projects(db, query, limit), success=True))
+    except Exception as e:
+        logger.error(f"Error searching projects: {e}")
+        return jsonify({'error': 'Erreur lors de la recherche'}), 500
+
 @api_bp.route('/projects/<int:project_id>', methods=['GET'])
 def get_project(project_id):
-    """API endpoint to get project details"""
+    """API endpoint to get project details (?fields= and ?include= as in the listing)"""
     try:
-        project = Project.query.get_or_404(project_id)
-        return jsonify({
+        fieldset = parse_fieldset(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def serialize():
+        rows = project_listing_query({'ids': [project_id]}, fieldset).all()
+        return current_app.json.dumps({
             'success': True,
-            'project': project.to_dict()
+            'project': serialize_projects(rows, fieldset)[0]
         })
+    
+    def build():
+        return current_app.response_class(response_cache.get_or_set(key, serialize), mimetype='application/json')
+    
+    try:
+        validators = project_validators(project_id)
+        if validators is None:
+            return jsonify({'error': 'Projet non trouvé'}), 404
+        parts, modified = validators
+        # Ranks move whenever another project is scored
+        version = portfolio_version()[0] if 'rank' in (fieldset['fields'] or ()) else None
+        key = ('api.get_project',) + parts + (fieldset['fields'], fieldset['include'], version)
+        return conditional(key, modified, build)
     except Exception as e:
         logger.error(f"Error getting project via API: {e}")
         return jsonify({'error': 'Projet non trouvé'}), 404
 
-@api_bp.route('/projects', methods=['GET'])
-def get_projects():
-    """API endpoint to get all projects"""
+@api_bp.route('/projects/<int:project_id>', methods=['PUT'])
+def update_project_api(project_id):
+    """API endpoint to edit a project, re-evaluating only the affected criteria"""
+    project = Project.query.options(undefer_group('texts')).get_or_404(project_id)
     try:
-        projects = Project.query.all()
+        data = request.get_json()
         
-        # Sort by score (descending)
-        def sort_key(project):
-            eval = project.latest_evaluation
-            if eval:
-                return -eval.score_final
-            else:
-                return float('-inf')
+        if not data:
+            return jsonify({'error': 'Données JSON requises'}), 400
         
-        projects.sort(key=sort_key)
+        editable_fields = ['titre', 'pvp', 'contexte', 'objectifs', 'fonctionnalites']
+        changes = {field: str(data[field]).strip() for field in editable_fields if field in data}
+        if not changes:
+            return jsonify({'error': f'Au moins un champ parmi {", ".join(editable_fields)} est requis'}), 400
+        
+        # Validate provided fields
+        for field, value in changes.items():
+            if not value:
+                return jsonify({'error': f'Le champ {field} est requis'}), 400
+        
+        if len(changes.get('titre', '')) > 200:
+            return jsonify({'error': 'Le titre ne peut pas dépasser 200 caractères'}), 400
+        
+        for field in ['contexte', 'objectifs', 'fonctionnalites']:
+            if field in changes and len(changes[field]) < 100:
+                return jsonify({'error': f'Le champ {field} doit contenir au moins 100 caractères'}), 400
+        
+        evaluation, status, criteria = update_project(project, changes)
+        db.session.commit()
         
         return jsonify({
             'success': True,
-            'projects': [project.to_dict() for project in projects]
+            'status': status,
+            're_evaluated_criteria': criteria,
+            'project': project.to_dict()
         })
         
+    except Exception as e:
+        logger.error(f"Error updating project {project_id} via API: {e}")
+        db.session.rollback()
+        return jsonify({'error': 'Erreur lors de la modification du projet'}), 500
+
+@api_bp.route('/projects/<int:project_id>', methods=['DELETE'])
+def delete_project(project_id):
+    """API endpoint to delete a project and its evaluations"""
+    project = Project.query.get_or_404(project_id)
+    try:
+        db.session.delete(project)
+        purge_tombstones()
+        db.session.commit()
+        return jsonify({'success': True, 'message': 'Projet supprimé'})
+        
+    except Exception as e:
+        logger.error(f"Error deleting project {project_id} via API: {e}")
+        db.session.rollback()
+        return jsonify({'error': 'Erreur lors de la suppression du projet'}), 500
+
+@api_bp.route('/projects/<int:project_id>/rank', methods=['GET'])
+def get_project_rank(project_id):
+    """API endpoint to get the leaderboard position of a project"""
+    entry = db.session.get(LeaderboardEntry, project_id)
+    if entry is None:
+        return jsonify({'error': 'Projet non trouvé ou non évalué'}), 404
+    total = db.session.query(db.func.count(LeaderboardEntry.project_id)).scalar()
+    return jsonify({'success': True, 'total_projects': total, **entry.to_dict(total)})
+
+@api_bp.route('/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """API endpoint to get the top of the leaderboard (?limit=50&offset=0&pvp=...)"""
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    pvp = request.args.get('pvp')
+    
+    query = db.session.query(LeaderboardEntry, Project.titre).join(Project, Project.id == LeaderboardEntry.project_id)
+    if pvp:
+        query = query.filter(LeaderboardEntry.pvp == pvp).order_by(LeaderboardEntry.pvp_rank)
+    else:
+        query = query.order_by(LeaderboardEntry.rank)
+    
+    # The percentile is global, even within a department
+    total = db.session.query(db.func.count(LeaderboardEntry.project_id)).scalar()
+    return jsonify({
+        'success': True,
+        'pvp': pvp,
+        'entries': [dict(entry.to_dict(total), titre=titre) for entry, titre in query.offset(offset).limit(limit)]
+    })
+
+@api_bp.route('/projects', methods=['GET'])
+def get_projects():
+    """API endpoint to list projects (filters: ids, pvp, priority, min_score, max_score,
+    created_after, created_before; sort; limit and offset; fields and include)"""
+    try:
+        filters = parse_project_filters(request.args)
+        fieldset = parse_fieldset(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def serialize():
+        rows, total = paginate(project_listing_query(filters, fieldset), filters)
+        projects = serialize_projects(rows, fieldset)
+        
+        response = {
+            'success': True,
+            'total': total,
+            'offset': filters.get('offset', 0),
+            'projects': projects
+        }
+        if 'ids' in filters:
+            found = {row.id if fieldset['fields'] is None else row[0].id for row in rows}
+            response['missing'] = [project_id for project_id in filters['ids'] if project_id not in found]
+        return current_app.json.dumps(response)
+    
+    def build():
+        return current_app.response_class(response_cache.get_or_set(key, serialize), mimetype='application/json')
+    
+    try:
+        version, modified = portfolio_version()
+        key = ('api.get_projects', version, sorted(request.args.items(multi=True)))
+        return conditional(key, modified, build)
+        
     except Exception as e:
         logger.error(f"Error getting projects via API: {e}")
         return jsonify({'error': 'Erreur lors du chargement des projets'}), 500
+
+@api_bp.route('/rankings/simulate', methods=['POST'])
+def simulate_rankings():
+    """API endpoint to re-rank the portfolio under alternative weights and thresholds"""
+    data = request.get_json(silent=True) or {}
+    base_weights = current_app.config['EVALUATION_WEIGHTS']
+    base_thresholds = current_app.config['PRIORITY_THRESHOLDS']
+    
+    weights = dict(base_weights)
+    thresholds = dict(base_thresholds)
+    try:
+        for criterion, value in (data.get('weights') or {}).items():
+            if criterion not in CRITERIA:
+                return jsonify({'error': f'Critère inconnu: {criterion}'}), 400
+            weights[criterion] = float(value)
+        for level, value in (data.get('thresholds') or {}).items():
+            if level not in base_thresholds:
+                return jsonify({'error': f'Seuil inconnu: {level}'}), 400
+            thresholds[level] = float(value)
+        limit = data.get('limit')
+        limit = int(limit) if limit is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'Pondérations, seuils et limite doivent être numériques'}), 400
+    
+    if any(value < 0 for value in weights.values()):
+        return jsonify({'error': 'Les pondérations doivent être positives'}), 400
+    if thresholds['medium'] > thresholds['high']:
+        return jsonify({'error': 'Le seuil medium doit être inférieur au seuil high'}), 400
+    
+    try:
+        start = time.perf_counter()
+        result = portfolio_index.simulate(weights, thresholds, base_weights, base_thresholds, limit)
+        
+        return jsonify({
+            'success': True,
+            'weights': weights,
+            'weights_total': round(sum(weights.values()), 4),
+            'thresholds': thresholds,
+            **result,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error simulating rankings: {e}")
+        return jsonify({'error': 'Erreur lors de la simulation du classement'}), 500
+
+@api_bp.route('/portfolio/optimize', methods=['POST'])
+def optimize_portfolio():
+    """API endpoint to choose the projects to fund under per-department capacities (person-days)"""
+    data = request.get_json(silent=True) or {}
+    weights = dict(current_app.config['EVALUATION_WEIGHTS'])
+    try:
+        capacities = {pvp: int(days) for pvp, days in (data.get('capacities') or {}).items()}
+        default_capacity = data.get('default_capacity')
+        default_capacity = int(default_capacity) if default_capacity is not None else None
+        for criterion, value in (data.get('weights') or {}).items():
+            if criterion not in CRITERIA:
+                return jsonify({'error': f'Critère inconnu: {criterion}'}), 400
+            weights[criterion] = float(value)
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'Capacités et pondérations doivent être numériques'}), 400
+    
+    if not capacities and default_capacity is None:
+        return jsonify({'error': 'Le champ capacities ou default_capacity est requis'}), 400
+    if any(days < 0 for days in capacities.values()) or (default_capacity or 0) < 0:
+        return jsonify({'error': 'Les capacités doivent être positives'}), 400
+    
+    try:
+        rows = portfolio_index.snapshot(weights)
+        result = select_portfolio(rows, capacities, default_capacity)
+        return jsonify({'success': True, 'weights': weights, **result})
+        
+    except Exception as e:
+        logger.error(f"Error optimizing portfolio: {e}")
+        return jsonify({'error': 'Erreur lors de l\'optimisation du portefeuille'}), 500
+
+@api_bp.route('/changes', methods=['GET'])
+def get_changes_api():
+    """API endpoint for delta sync: changes since a cursor (?since=<cursor>, fields and include)"""
+    try:
+        since = parse_cursor(request.args.get('since'))
+        fieldset = parse_fieldset(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        return jsonify(dict(get_changes(since, fieldset), success=True))
+    except CursorExpired:
+        return jsonify({'error': 'Curseur expiré, une synchronisation complète (sans since) est requise'}), 410
+    except Exception as e:
+        logger.error(f"Error getting changes: {e}")
+        return jsonify({'error': 'Erreur lors du chargement des modifications'}), 500
+
+@api_bp.route('/events', methods=['GET'])
+def stream_events():
+    """Server-sent events: project_created, project_deleted, evaluation (new score) and refresh as they are committed"""
+    if event_broker.subscriber_count >= current_app.config['SSE_MAX_SUBSCRIBERS']:
+        # Every stream holds a worker thread; the dashboard still works without live updates
+        return jsonify({'error': "Trop de flux d'événements ouverts, réessayez plus tard"}), 503, {'Retry-After': '60'}
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscriber = event_broker.subscribe(last_event_id)
+    return Response(
+        event_broker.stream(subscriber, current_app.config['SSE_HEARTBEAT_INTERVAL'],
+                            current_app.config['SSE_STREAM_MAX_AGE']),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@api_bp.route('/export', methods=['GET'])
+def export_projects():
+    """Streaming export of the portfolio (?format=ndjson|csv|parquet|arrow, ?history=true for every evaluation)"""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in FORMATS:
+        return jsonify({'error': f'Le paramètre format doit être parmi {", ".join(FORMATS)}'}), 400
+    history = request.args.get('history', 'false').lower() == 'true'
+    
+    try:
+        chunks = export_portfolio(export_format, history)
+    except RuntimeError:
+        return jsonify({'error': 'Les exports Parquet et Arrow nécessitent le paquet pyarrow'}), 501
+    
+    extension = 'arrows' if export_format == 'arrow' else export_format
+    filename = f"projets{'-historique' if history else ''}.{extension}"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"', 'X-Accel-Buffering': 'no'}
+    )
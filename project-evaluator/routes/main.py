@@ -1,6 +1,15 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from markupsafe import Markup
+from sqlalchemy.orm import selectinload, undefer_group
 from models import db, Project, Evaluation
 from services import AIService
+from services.evaluations import record_evaluation, update_project, reevaluate_project as reevaluate_project_if_needed
+from services.project_queries import (LISTING_FIELDS, parse_project_filters, filter_projects, paginate,
+                                      priority_counts, serialize_projects, sparse_query)
+from services.scoring import PRIORITY_BADGES
+from services.http_cache import conditional, portfolio_version, project_validators
+from services.response_cache import response_cache
+import json
 import logging
 
 main_bp = Blueprint('main', __name__)
@@ -8,26 +17,43 @@ logger = logging.getLogger(__name__)
 
 @main_bp.route('/')
 def index():
-    """Home page with list of all projects sorted by score"""
+    """Home page with the first page of projects; filters reload the list through /api/projects"""
     try:
-        # Get all projects with their latest evaluations
-        projects = db.session.query(Project).all()
-        
-        # Sort by score (descending), with unevaluated projects at the end
-        def sort_key(project):
-            eval = project.latest_evaluation
-            if eval:
-                return (-eval.score_final, project.created_at)
-            else:
-                return (float('-inf'), project.created_at)
-        
-        projects.sort(key=sort_key)
-        
-        return render_template('index.html', projects=projects)
+        filters = parse_project_filters(request.args)
+    except ValueError as e:
+        flash(str(e), 'error')
+        filters = parse_project_filters({})
+    
+    def build_listing():
+        # Only the columns the rows show: no long texts, no evaluations
+        fieldset = {'fields': list(LISTING_FIELDS), 'include': []}
+        rows, total = paginate(sparse_query(filter_projects(filters), fieldset), filters,
+                               default_limit=current_app.config['INDEX_PAGE_SIZE'])
+        projects = serialize_projects(rows, fieldset)
+        return json.dumps({
+            'rows': render_template('partials/project_rows.html', projects=projects, badges=PRIORITY_BADGES),
+            'shown': len(projects),
+            'total': total,
+            'counts': priority_counts()
+        })
+    
+    def render():
+        # The project rows and counts are shared by every visitor; the page around them is not
+        listing = json.loads(response_cache.get_or_set(
+            ('main.index', version, sorted(request.args.items(multi=True))), build_listing
+        ))
+        return render_template('index.html', rows=Markup(listing['rows']), shown=listing['shown'],
+                               total=listing['total'], counts=listing['counts'], filters=filters,
+                               departments=current_app.config['PVP_DEPARTMENTS'])
+    
+    try:
+        version, modified = portfolio_version()
+        return conditional(('main.index', version, request.query_string.decode('utf-8')), modified, render)
     except Exception as e:
         logger.error(f"Error in index route: {e}")
         flash('Erreur lors du chargement des projets.', 'error')
-        return render_template('index.html', projects=[])
+        return render_template('index.html', rows='', shown=0, total=0, filters={}, counts={},
+                               departments=current_app.config['PVP_DEPARTMENTS'])
 
 @main_bp.route('/projects/new', methods=['GET', 'POST'])
 def new_project():
@@ -73,33 +99,10 @@ def new_project():
               # Evaluate the project using AI service
             try:
                 ai_service = AIService()
-                evaluation_result = ai_service.evaluate_project({
-                    'titre': titre,
-                    'pvp': pvp,
-                    'contexte': contexte,
-                    'objectifs': objectifs,
-                    'fonctionnalites': fonctionnalites
-                })
-                
-                # Update project with AI-generated fields
-                project.defis_techniques = '\n'.join(evaluation_result.get('defis_techniques', []))
-                project.duree_estimee = evaluation_result.get('duree_estimee', 90)
+                evaluation_result = ai_service.evaluate_project(project.evaluable_data)
                 
-                # Create evaluation record
-                evaluation = Evaluation(
-                    project_id=project.id,
-                    valeur_business=evaluation_result['scores']['valeur_business'],
-                    faisabilite_technique=evaluation_result['scores']['faisabilite_technique'],
-                    effort_requis=evaluation_result['scores']['effort_requis'],
-                    niveau_risque=evaluation_result['scores']['niveau_risque'],
-                    urgence=evaluation_result['scores']['urgence'],
-                    alignement_strategique=evaluation_result['scores']['alignement_strategique'],
-                    score_final=evaluation_result['score_final']
-                )
-                
-                evaluation.set_suggestions(evaluation_result.get('suggestions', {}))
-                
-                db.session.add(evaluation)
+                # Store evaluation and AI-generated project fields
+                record_evaluation(project, evaluation_result)
                 db.session.commit()
                 
                 flash('Projet créé et évalué avec succès !', 'success')
@@ -120,53 +123,88 @@ def new_project():
 @main_bp.route('/projects/<int:id>')
 def project_detail(id):
     """Project detail page"""
-    try:
-        project = Project.query.get_or_404(id)
+    def render():
+        project = Project.query.options(
+            undefer_group('texts'), selectinload(Project.evaluations).undefer(Evaluation.ai_suggestions)
+        ).get_or_404(id)
         evaluation = project.latest_evaluation
-        
         return render_template('project_detail.html', project=project, evaluation=evaluation)
+    
+    try:
+        validators = project_validators(id)
+        if validators is None:
+            return render()
+        parts, modified = validators
+        return conditional(('main.project_detail',) + parts, modified, render)
     except Exception as e:
         logger.error(f"Error in project detail route: {e}")
         flash('Erreur lors du chargement du projet.', 'error')
         return redirect(url_for('main.index'))
 
-@main_bp.route('/projects/<int:id>/reevaluate')
-def reevaluate_project(id):
-    """Reevaluate an existing project"""
+@main_bp.route('/projects/<int:id>/edit', methods=['GET', 'POST'])
+def edit_project(id):
+    """Edit project form"""
+    project = Project.query.options(undefer_group('texts')).get_or_404(id)
+    
+    if request.method == 'GET':
+        departments = current_app.config['PVP_DEPARTMENTS']
+        return render_template('edit_project.html', project=project, departments=departments)
+    
     try:
-        project = Project.query.get_or_404(id)
-          # Evaluate the project using AI service
-        ai_service = AIService()
-        evaluation_result = ai_service.evaluate_project({
-            'titre': project.titre,
-            'pvp': project.pvp,
-            'contexte': project.contexte,
-            'objectifs': project.objectifs,
-            'fonctionnalites': project.fonctionnalites
-        })
+        changes = {
+            field: request.form.get(field, '').strip()
+            for field in ['titre', 'pvp', 'contexte', 'objectifs', 'fonctionnalites']
+        }
+        
+        # Validate required fields
+        if not all(changes.values()):
+            flash('Tous les champs sont requis.', 'error')
+            return redirect(url_for('main.edit_project', id=id))
         
-        # Update project with new AI-generated fields
-        project.defis_techniques = '\n'.join(evaluation_result.get('defis_techniques', []))
-        project.duree_estimee = evaluation_result.get('duree_estimee', 90)
+        # Validate field lengths
+        if any(len(changes[field]) < 100 for field in ['contexte', 'objectifs', 'fonctionnalites']):
+            flash('Les champs évaluables doivent contenir au moins 100 caractères.', 'error')
+            return redirect(url_for('main.edit_project', id=id))
         
-        # Create new evaluation record
-        evaluation = Evaluation(
-            project_id=project.id,
-            valeur_business=evaluation_result['scores']['valeur_business'],
-            faisabilite_technique=evaluation_result['scores']['faisabilite_technique'],
-            effort_requis=evaluation_result['scores']['effort_requis'],
-            niveau_risque=evaluation_result['scores']['niveau_risque'],
-            urgence=evaluation_result['scores']['urgence'],
-            alignement_strategique=evaluation_result['scores']['alignement_strategique'],
-            score_final=evaluation_result['score_final']
-        )
+        if len(changes['titre']) > 200:
+            flash('Le titre ne peut pas dépasser 200 caractères.', 'error')
+            return redirect(url_for('main.edit_project', id=id))
+        
+        # Re-evaluate only the criteria affected by the changed fields
+        evaluation, status, criteria = update_project(project, changes)
+        db.session.commit()
         
-        evaluation.set_suggestions(evaluation_result.get('suggestions', {}))
+        if status == 'unchanged':
+            flash('Aucune modification détectée.', 'info')
+        elif status == 'partial':
+            flash(f'Projet modifié : {len(criteria)} critère(s) réévalué(s).', 'success')
+        else:
+            flash('Projet modifié et réévalué avec succès !', 'success')
+        return redirect(url_for('main.project_detail', id=project.id))
+        
+    except Exception as e:
+        logger.error(f"Error editing project: {e}")
+        db.session.rollback()
+        flash('Erreur lors de la modification du projet.', 'error')
+        return redirect(url_for('main.edit_project', id=id))
+
+@main_bp.route('/projects/<int:id>/reevaluate')
+def reevaluate_project(id):
+    """Reevaluate an existing project (?force=1 to always call the model)"""
+    try:
+        project = Project.query.get_or_404(id)
+        force = request.args.get('force', '0').lower() in ('1', 'true')
         
-        db.session.add(evaluation)
+        # Reevaluate only if the fields, model, prompt or weights changed
+        evaluation, status = reevaluate_project_if_needed(project, force=force)
         db.session.commit()
         
-        flash('Projet réévalué avec succès !', 'success')
+        if status == 'unchanged':
+            flash('Projet inchangé depuis la dernière évaluation : évaluation conservée.', 'info')
+        elif status == 'rescored':
+            flash('Score final recalculé avec les pondérations actuelles.', 'success')
+        else:
+            flash('Projet réévalué avec succès !', 'success')
         return redirect(url_for('main.project_detail', id=project.id))
         
     except Exception as e:
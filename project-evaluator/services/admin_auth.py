@@ -0,0 +1,28 @@
+"""
+Token-based access control for administrative endpoints
+"""
+import hmac
+from functools import wraps
+from flask import current_app, request, jsonify
+
+
+def is_admin_request() -> bool:
+    """
+    Check whether the current request carries the configured admin token
+    
+    Returns:
+        True if ADMIN_TOKEN is configured and matches the X-Admin-Token header
+    """
+    token = current_app.config.get('ADMIN_TOKEN')
+    provided = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(provided, token)
+
+
+def admin_required(view):
+    """Decorator rejecting requests without a valid admin token"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({'error': 'Accès administrateur requis'}), 403
+        return view(*args, **kwargs)
+    return wrapped
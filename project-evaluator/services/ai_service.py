@@ -3,10 +3,15 @@ Main AI service that replaces the original OpenAIService
 This service manages multiple AI providers and external YAML prompts
 """
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Set, Tuple
 from flask import current_app
 from .provider_manager import ProviderManager
 from .prompt_manager import PromptManager
+from .tracing import tracer
+from .metrics import metrics
+from .routing_policy import routing_policy
+from .scoring import CRITERIA_DESCRIPTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -46,35 +51,77 @@ class AIService:
         Returns:
             Dictionary with evaluation results including scores, suggestions, etc.
         """
-        try:
-            # Get the appropriate prompt template
-            provider_name = self.config.get('default_provider', 'openai')
-            model_name = self.config.get('default_model', 'gpt-4o')
-            
-            prompt_template = self.prompt_manager.get_prompt_template(
-                provider_name, model_name, 'evaluation'
-            )
-            
-            # Use fallback template if none found
-            if prompt_template is None:
-                logger.warning(f"No prompt template found for {provider_name}/{model_name}/evaluation, using fallback")
-                prompt_template = self.prompt_manager.get_fallback_template('evaluation')
-            
-            # Inject evaluation weights into provider config
-            for provider_config in self.config.values():
-                if isinstance(provider_config, dict):
-                    provider_config['weights'] = current_app.config['EVALUATION_WEIGHTS']
-            
-            # Evaluate using provider manager with fallback
-            result = self.provider_manager.evaluate_with_fallback(
-                project_data, prompt_template
-            )
-            
-            return result
+        provider_name = self.config.get('default_provider', 'openai')
+        model_name = self.config.get('default_model', 'gpt-4o')
+        
+        with tracer.span('ai.evaluate_project', provider=provider_name, model=model_name) as span:
+            try:
+                # Get the appropriate prompt template
+                prompt_template = self._get_prompt_template(provider_name, model_name, 'evaluation')
+                
+                # Inject evaluation weights into provider config
+                for provider_config in self.config.values():
+                    if isinstance(provider_config, dict):
+                        provider_config['weights'] = current_app.config['EVALUATION_WEIGHTS']
+                
+                if current_app.config.get('EVALUATION_CASCADE_ENABLED', False):
+                    result = self._evaluate_with_cascade(project_data, prompt_template, span)
+                else:
+                    # Evaluate using provider manager with fallback
+                    result = self.provider_manager.evaluate_with_fallback(
+                        project_data, prompt_template
+                    )
+                span.set_attribute('score_final', result.get('score_final'))
+                
+                return result
+                
+            except Exception as e:
+                span.record_error(e)
+                logger.error(f"Error in evaluate_project: {e}")
+                return self._get_fallback_evaluation()
+    
+    def evaluate_criteria(self, project_data: Dict[str, Any], changed_fields: list,
+                          criteria: list, previous_scores: Dict[str, float]) -> Optional[Dict[str, Any]]:
+        """
+        Re-evaluate only the criteria affected by an edit, sending only the changed fields
+        
+        Args:
+            project_data: Dictionary containing the edited project information
+            changed_fields: Names of the fields that changed
+            criteria: Criteria to re-evaluate
+            previous_scores: Criterion scores of the latest evaluation
             
-        except Exception as e:
-            logger.error(f"Error in evaluate_project: {e}")
-            return self._get_fallback_evaluation()
+        Returns:
+            Dictionary with 'scores' and 'suggestions' for the criteria (and
+            'defis_techniques'/'duree_estimee' if returned), or None on failure
+        """
+        provider_name = self.config.get('default_provider', 'openai')
+        model_name = self.config.get('default_model', 'gpt-4o')
+        
+        with tracer.span('ai.evaluate_criteria', provider=provider_name, model=model_name,
+                         fields=','.join(changed_fields), criteria=','.join(criteria)) as span:
+            try:
+                prompt_template = self._get_prompt_template(provider_name, model_name, 'partial_evaluation')
+                variables = {
+                    'titre': project_data['titre'],
+                    'pvp': project_data['pvp'],
+                    'changed_fields': '\n\n'.join(f"### {field}\n{project_data[field]}"
+                                                  for field in changed_fields),
+                    'criteria': '\n'.join(f"- {criterion} : {CRITERIA_DESCRIPTIONS[criterion]}"
+                                          for criterion in criteria),
+                    'criteria_keys': ', '.join(criteria),
+                    'previous_scores': ', '.join(f"{criterion}={previous_scores[criterion]}"
+                                                 for criterion in criteria)
+                }
+                
+                return self.provider_manager.evaluate_criteria_with_fallback(
+                    variables, criteria, prompt_template
+                )
+                
+            except Exception as e:
+                span.record_error(e)
+                logger.error(f"Error in evaluate_criteria: {e}")
+                return None
     
     def improve_field(self, field_name: str, field_content: str, project_context: str = "") -> str:
         """
@@ -88,30 +135,233 @@ class AIService:
         Returns:
             Improved field content as string
         """
+        provider_name = self.config.get('default_provider', 'openai')
+        model_name = self.config.get('default_model', 'gpt-4o')
+        
+        with tracer.span('ai.improve_field', provider=provider_name, model=model_name,
+                         field=field_name) as span:
+            try:
+                # Get the appropriate prompt template
+                prompt_template = self._get_prompt_template(provider_name, model_name, 'improvement')
+                
+                # Improve field using provider manager with fallback
+                result = self.provider_manager.improve_field_with_fallback(
+                    field_name, field_content, project_context, prompt_template
+                )
+                
+                return result
+                
+            except Exception as e:
+                span.record_error(e)
+                logger.error(f"Error improving field {field_name}: {e}")
+                return field_content  # Return original content on error
+    
+    def improve_fields(self, fields: Dict[str, str], project_context: str = "") -> Dict[str, str]:
+        """
+        Suggest improvements for several fields of the same project in one model call
+        
+        Args:
+            fields: Mapping of field name to current content
+            project_context: Additional context about the project
+            
+        Returns:
+            Mapping of field name to improved content (original content if not improved)
+        """
+        provider_name = self.config.get('default_provider', 'openai')
+        model_name = self.config.get('default_model', 'gpt-4o')
+        
+        with tracer.span('ai.improve_fields', provider=provider_name, model=model_name,
+                         fields=','.join(fields)) as span:
+            try:
+                prompt_template = self._get_prompt_template(provider_name, model_name, 'batch_improvement')
+                
+                return self.provider_manager.improve_fields_with_fallback(
+                    fields, project_context, prompt_template
+                )
+                
+            except Exception as e:
+                span.record_error(e)
+                logger.error(f"Error improving fields {list(fields)}: {e}")
+                return dict(fields)  # Return original content on error
+    
+    def get_evaluation_signatures(self) -> Set[Tuple[str, str]]:
+        """
+        Get the (model, prompt version) pairs an evaluation would currently use
+        
+        Returns:
+            Set of (model, prompt_version) pairs, including the cheap cascade
+            model when the cascade is enabled
+        """
+        provider_name = self.config.get('default_provider', 'openai')
+        model_name = self.config.get('default_model', 'gpt-4o')
+        candidates = [(provider_name, model_name)]
+        
+        if current_app.config.get('EVALUATION_CASCADE_ENABLED', False):
+            cascade_models = current_app.config.get('CASCADE_MODELS', {})
+            cascade_provider = self._get_cascade_provider(cascade_models)
+            if cascade_provider:
+                candidates.append((cascade_provider, cascade_models[cascade_provider]))
+        
+        signatures = set()
+        for provider, model in candidates:
+            metadata = self._get_prompt_template(provider, model, 'evaluation').get('metadata', {})
+            signatures.add((metadata.get('model'), metadata.get('version')))
+        return signatures
+    
+    def _evaluate_with_cascade(self, project_data: Dict[str, Any], prompt_template: Dict[str, Any],
+                               span) -> Dict[str, Any]:
+        """
+        Evaluate with a cheap model first and escalate to the default model only
+        when the cheap result is invalid, close to a priority threshold, or not confident
+        
+        Args:
+            project_data: Dictionary containing project information
+            prompt_template: Prompt template of the default model
+            span: Span of the enclosing evaluation
+            
+        Returns:
+            Evaluation result
+        """
+        cascade_models = current_app.config.get('CASCADE_MODELS', {})
+        provider_name = self._get_cascade_provider(cascade_models)
+        if provider_name is None:
+            return self.provider_manager.evaluate_with_fallback(project_data, prompt_template)
+        
+        cheap_model = cascade_models[provider_name]
+        cheap_template = self._get_prompt_template(provider_name, cheap_model, 'evaluation')
+        
+        start = time.perf_counter()
+        result = self.provider_manager.evaluate_with_provider(provider_name, project_data, cheap_template)
+        cheap_latency = time.perf_counter() - start
+        metrics.inc('ai_cascade_latency_seconds_total', cheap_latency, stage='cheap')
+        
+        provider = self.provider_manager.get_provider(provider_name)
+        reason = self._get_escalation_reason(result, provider.last_call.get('missing_scores'))
+        span.set_attributes(cascade_model=cheap_model, escalated=reason is not None)
+        
+        if reason is None:
+            # Latency saved is estimated from the default model's observed latency
+            full_model = prompt_template.get('metadata', {}).get('model')
+            expected = routing_policy.estimate(self.config.get('default_provider', 'openai'),
+                                               full_model)['latency_ewma']
+            metrics.inc('ai_cascade_evaluations_total', outcome='accepted', reason='none')
+            metrics.inc('ai_cascade_latency_saved_seconds_total', max(expected - cheap_latency, 0.0))
+            logger.info(f"Cascade accepted {cheap_model} evaluation in {cheap_latency:.2f}s")
+            return result
+        
+        span.set_attribute('escalation_reason', reason)
+        metrics.inc('ai_cascade_evaluations_total', outcome='escalated', reason=reason)
+        metrics.inc('ai_cascade_latency_added_seconds_total', cheap_latency)
+        logger.info(f"Cascade escalating from {cheap_model}: {reason}")
+        
+        start = time.perf_counter()
+        result = self.provider_manager.evaluate_with_fallback(project_data, prompt_template)
+        metrics.inc('ai_cascade_latency_seconds_total', time.perf_counter() - start, stage='full')
+        return result
+    
+    def _get_cascade_provider(self, cascade_models: Dict[str, str]) -> Optional[str]:
+        """Pick the provider for the cheap stage, preferring the default provider"""
+        available = self.provider_manager.get_available_providers()
+        default_provider = self.config.get('default_provider', 'openai')
+        if default_provider in cascade_models and default_provider in available:
+            return default_provider
+        for provider_name in cascade_models:
+            if provider_name in available:
+                return provider_name
+        return None
+    
+    def _get_escalation_reason(self, result: Optional[Dict[str, Any]],
+                               missing_scores: Optional[list] = None) -> Optional[str]:
+        """
+        Decide whether a cheap-model evaluation must be redone by the default model
+        
+        Args:
+            result: Cheap-model evaluation, None if it failed
+            missing_scores: Criteria the model did not score
+            
+        Returns:
+            Escalation reason ('invalid', 'near_threshold', 'low_confidence') or None
+        """
+        if result is None or missing_scores:
+            return 'invalid'
+        
+        margin = current_app.config.get('CASCADE_THRESHOLD_MARGIN', 0.5)
+        for threshold in current_app.config['PRIORITY_THRESHOLDS'].values():
+            if abs(result['score_final'] - threshold) <= margin:
+                return 'near_threshold'
+        
         try:
-            # Get the appropriate prompt template
-            provider_name = self.config.get('default_provider', 'openai')
-            model_name = self.config.get('default_model', 'gpt-4o')
+            confidence = float(result.get('confiance'))
+        except (TypeError, ValueError):
+            return 'low_confidence'
+        if confidence < current_app.config.get('CASCADE_MIN_CONFIDENCE', 0.7):
+            return 'low_confidence'
+        
+        return None
+    
+    @staticmethod
+    def get_cascade_stats() -> Dict[str, Any]:
+        """
+        Summarize cascade escalations and latency savings across worker processes
+        
+        Returns:
+            Dictionary with evaluation counts, escalation rate and latency totals
+        """
+        collected = metrics.collect()
+        accepted = escalated = 0.0
+        reasons = {}
+        for key, value in collected['ai_cascade_evaluations_total'].items():
+            labels = dict(key)
+            if labels.get('outcome') == 'accepted':
+                accepted += value
+            else:
+                escalated += value
+                reasons[labels.get('reason')] = reasons.get(labels.get('reason'), 0) + int(value)
+        
+        total = accepted + escalated
+        stage_latency = {dict(key).get('stage'): value
+                         for key, value in collected['ai_cascade_latency_seconds_total'].items()}
+        saved = sum(collected['ai_cascade_latency_saved_seconds_total'].values())
+        added = sum(collected['ai_cascade_latency_added_seconds_total'].values())
+        return {
+            'evaluations': int(total),
+            'escalations': int(escalated),
+            'escalation_rate': round(escalated / total, 3) if total else 0.0,
+            'escalation_reasons': reasons,
+            'latency_seconds': {stage: round(value, 3) for stage, value in stage_latency.items()},
+            'estimated_latency_saved_seconds': round(saved, 3),
+            'latency_added_by_escalations_seconds': round(added, 3),
+            'estimated_net_savings_seconds': round(saved - added, 3)
+        }
+    
+    def _get_prompt_template(self, provider_name: str, model_name: str, prompt_type: str) -> Dict[str, Any]:
+        """
+        Load the prompt template for a provider/model, using the fallback template if none is found
+        
+        Args:
+            provider_name: Provider name
+            model_name: Model name
+            prompt_type: Type of prompt ('evaluation', 'partial_evaluation', 'improvement' or 'batch_improvement')
             
+        Returns:
+            Prompt template dictionary
+        """
+        with tracer.span('prompt.lookup', provider=provider_name, model=model_name,
+                         prompt_type=prompt_type) as span:
             prompt_template = self.prompt_manager.get_prompt_template(
-                provider_name, model_name, 'improvement'
+                provider_name, model_name, prompt_type
             )
             
             # Use fallback template if none found
             if prompt_template is None:
-                logger.warning(f"No prompt template found for {provider_name}/{model_name}/improvement, using fallback")
-                prompt_template = self.prompt_manager.get_fallback_template('improvement')
-            
-            # Improve field using provider manager with fallback
-            result = self.provider_manager.improve_field_with_fallback(
-                field_name, field_content, project_context, prompt_template
-            )
-            
-            return result
+                logger.warning(f"No prompt template found for {provider_name}/{model_name}/{prompt_type}, using fallback")
+                prompt_template = self.prompt_manager.get_fallback_template(prompt_type)
+                # Run the generic template on the requested model
+                prompt_template['metadata']['model'] = model_name
+                span.set_attribute('fallback', True)
             
-        except Exception as e:
-            logger.error(f"Error improving field {field_name}: {e}")
-            return field_content  # Return original content on error
+            span.set_attribute('version', prompt_template.get('metadata', {}).get('version'))
+            return prompt_template
     
     def _build_config_from_flask(self) -> Dict[str, Any]:
         """
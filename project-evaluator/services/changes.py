@@ -0,0 +1,125 @@
+"""
+Delta synchronization of projects and evaluations
+Clients keep the cursor returned by GET /api/changes and send it back as
+?since= to receive only what changed in between: projects whose created_at or
+updated_at moved, evaluations created, and deletions recorded in the
+project_tombstones table. Reads use the timestamp indexes, so a sync costs
+in proportion to the change volume rather than the portfolio size.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from flask import current_app
+from sqlalchemy import delete, event, insert
+from sqlalchemy.orm import Session, undefer
+from models import db, Project, Evaluation, ProjectTombstone
+from .project_queries import project_listing_query, serialize_projects
+
+logger = logging.getLogger(__name__)
+
+
+class CursorExpired(Exception):
+    """Raised when a cursor is older than the tombstone retention period"""
+
+
+def parse_cursor(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a ?since= cursor
+
+    Args:
+        value: Cursor returned by a previous call (None for a full sync)
+
+    Returns:
+        Cursor timestamp (UTC), or None
+
+    Raises:
+        ValueError: When the cursor is malformed
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError('Le paramètre since doit être un curseur renvoyé par /api/changes')
+
+
+def get_changes(since: Optional[datetime], fieldset: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Collect the changes made after a cursor
+
+    The next cursor lags the current time by CHANGES_CURSOR_LAG seconds so
+    that transactions still in flight are not skipped. Changes near the
+    cursor may therefore be returned twice; clients apply them by ID.
+
+    Args:
+        since: Cursor timestamp (None for everything)
+        fieldset: Fieldset returned by parse_fieldset for the project representation
+
+    Returns:
+        Dictionary with the changed projects, new evaluations, deleted project IDs and the next cursor
+
+    Raises:
+        CursorExpired: When deletions older than the retention period may have been purged
+    """
+    now = datetime.utcnow()
+    retention = timedelta(days=current_app.config['CHANGES_TOMBSTONE_RETENTION_DAYS'])
+    if since is not None and since < now - retention:
+        raise CursorExpired()
+
+    filters = {'sort': 'updated_at'}
+    if since is not None:
+        filters['changed_since'] = since
+    projects = serialize_projects(project_listing_query(filters, fieldset).all(), fieldset)
+
+    evaluations = Evaluation.query.options(undefer(Evaluation.ai_suggestions))
+    deleted = db.session.query(ProjectTombstone.project_id)
+    if since is not None:
+        evaluations = evaluations.filter(Evaluation.created_at >= since)
+        deleted = deleted.filter(ProjectTombstone.deleted_at >= since)
+
+    return {
+        'since': since.isoformat() if since else None,
+        'cursor': (now - timedelta(seconds=current_app.config['CHANGES_CURSOR_LAG'])).isoformat(),
+        'projects': projects,
+        'evaluations': [evaluation.to_dict() for evaluation in evaluations.order_by(Evaluation.id)],
+        'deleted': [project_id for project_id, in deleted.order_by(ProjectTombstone.deleted_at)]
+    }
+
+
+def _after_flush(session, flush_context):
+    """Record a tombstone for every project deleted in this flush"""
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Project)]
+    if not deleted:
+        return
+    connection = session.connection()
+    table = ProjectTombstone.__table__
+    now = datetime.utcnow()
+    connection.execute(delete(table).where(table.c.project_id.in_(deleted)))
+    connection.execute(insert(table), [{'project_id': project_id, 'deleted_at': now} for project_id in deleted])
+
+
+def purge_tombstones() -> int:
+    """
+    Delete tombstones older than the retention period (the caller commits)
+
+    Returns:
+        Number of purged tombstones
+    """
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config['CHANGES_TOMBSTONE_RETENTION_DAYS'])
+    purged = ProjectTombstone.query.filter(ProjectTombstone.deleted_at < cutoff).delete()
+    if purged:
+        logger.info(f"Purged {purged} project tombstones older than {cutoff:%Y-%m-%d}")
+    return purged
+
+
+def init_app(app):
+    """
+    Record project tombstones on every flush
+
+    Args:
+        app: Flask application
+    """
+    app.config.setdefault('CHANGES_CURSOR_LAG', 5)
+    app.config.setdefault('CHANGES_TOMBSTONE_RETENTION_DAYS', 90)
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
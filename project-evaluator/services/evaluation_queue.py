@@ -0,0 +1,141 @@
+"""
+Background evaluation of imported projects
+Bulk imports insert projects without calling the model and queue their IDs
+here; worker threads evaluate them one by one with the regular evaluation
+path, so the leaderboard, search index and dashboard events follow as each
+evaluation is committed. The queue is not persisted: it lives in the
+memory of the process that imported the projects, like the 'local' backend
+of services/events.py. Projects still waiting when that process stops keep
+no evaluation row, which is the durable record of the work left;
+enqueue_unevaluated() (POST /admin/evaluations/queue) queues them again.
+Run it in a single process: each process only checks for an evaluation
+just before calling the model, so two processes can evaluate a project twice.
+"""
+import logging
+import queue
+import threading
+from typing import Iterable, List
+from sqlalchemy import select
+from models import db, Project
+from .ai_service import AIService
+from .evaluations import record_evaluation
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class EvaluationQueue:
+    """In-process queue of project IDs awaiting their first evaluation"""
+
+    def __init__(self):
+        self.app = None
+        self.workers = 0
+        self._queue = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Configure the number of worker threads
+
+        Workers start with the first queued project. With
+        EVALUATION_QUEUE_WORKERS=0 nothing runs in the background and the
+        queue is emptied by drain().
+
+        Args:
+            app: Flask application
+        """
+        app.config.setdefault('EVALUATION_QUEUE_WORKERS', 2)
+        self.app = app
+        self.workers = app.config['EVALUATION_QUEUE_WORKERS']
+        app.extensions['evaluation_queue'] = self
+
+    @property
+    def depth(self) -> int:
+        """Projects waiting for evaluation"""
+        return self._queue.qsize()
+
+    def enqueue(self, project_ids: Iterable[int]) -> int:
+        """
+        Queue projects for evaluation
+
+        Args:
+            project_ids: IDs of committed projects
+
+        Returns:
+            Number of queued projects
+        """
+        count = 0
+        for project_id in project_ids:
+            self._queue.put(project_id)
+            count += 1
+        metrics.set('evaluation_queue_depth', self.depth)
+        if count:
+            self._start_workers()
+        return count
+
+    def enqueue_unevaluated(self) -> int:
+        """
+        Queue every project that has no evaluation yet
+
+        Returns:
+            Number of queued projects
+        """
+        project_ids = db.session.scalars(
+            select(Project.id).where(~Project.evaluations.any()).order_by(Project.id)
+        ).all()
+        return self.enqueue(project_ids)
+
+    def drain(self) -> int:
+        """
+        Evaluate every queued project in the calling thread
+
+        Returns:
+            Number of projects evaluated
+        """
+        ai_service = AIService()
+        evaluated = 0
+        while True:
+            try:
+                project_id = self._queue.get_nowait()
+            except queue.Empty:
+                return evaluated
+            evaluated += self._process(project_id, ai_service)
+            self._queue.task_done()
+
+    def _start_workers(self):
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for index in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._run, name=f'evaluation-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        with self.app.app_context():
+            ai_service = AIService()
+            while True:
+                project_id = self._queue.get()
+                try:
+                    self._process(project_id, ai_service)
+                finally:
+                    self._queue.task_done()
+                    db.session.remove()
+
+    def _process(self, project_id: int, ai_service) -> bool:
+        """Evaluate one queued project unless it was deleted or evaluated meanwhile"""
+        metrics.set('evaluation_queue_depth', self.depth)
+        try:
+            project = db.session.get(Project, project_id)
+            if project is None or project.evaluations:
+                return False
+            record_evaluation(project, ai_service.evaluate_project(project.evaluable_data))
+            db.session.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error evaluating queued project {project_id}: {e}")
+            db.session.rollback()
+            return False
+
+
+evaluation_queue = EvaluationQueue()
@@ -0,0 +1,156 @@
+"""
+Storing evaluation results and deciding when a project needs a new one
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from flask import current_app
+from models import db, Project, Evaluation
+from .ai_service import AIService
+from .rescoring import register_weight_set
+from .scoring import CRITERIA, EVALUABLE_FIELDS, compute_score_final
+
+logger = logging.getLogger(__name__)
+
+
+def record_evaluation(project: Project, evaluation_result: Dict[str, Any]) -> Evaluation:
+    """
+    Store an evaluation result for a project (the caller commits)
+
+    Args:
+        project: Evaluated project
+        evaluation_result: Result returned by AIService.evaluate_project
+
+    Returns:
+        New evaluation, added to the session
+    """
+    metadata = evaluation_result.get('metadata', {})
+
+    # Update project with AI-generated fields
+    project.defis_techniques = '\n'.join(evaluation_result.get('defis_techniques', []))
+    project.duree_estimee = evaluation_result.get('duree_estimee', 90)
+    project.content_hash = project.compute_content_hash()
+
+    evaluation = Evaluation(
+        project_id=project.id,
+        score_final=evaluation_result['score_final'],
+        model=metadata.get('model'),
+        prompt_version=metadata.get('prompt_version'),
+        weights_fingerprint=register_weight_set(current_app.config['EVALUATION_WEIGHTS']).fingerprint,
+        **{criterion: evaluation_result['scores'][criterion] for criterion in CRITERIA}
+    )
+    evaluation.set_suggestions(evaluation_result.get('suggestions', {}))
+
+    db.session.add(evaluation)
+    return evaluation
+
+
+def reevaluate_project(project: Project, force: bool = False,
+                       ai_service: Optional[AIService] = None) -> Tuple[Evaluation, str]:
+    """
+    Reevaluate a project, skipping the model call when its inputs did not change
+
+    The latest evaluation is reused when the evaluable fields, model and prompt
+    version match. If only the weights changed, score_final of that evaluation
+    is recomputed locally from its stored criterion scores.
+
+    Args:
+        project: Project to reevaluate
+        force: Always call the model
+        ai_service: AI service to use (created on demand)
+
+    Returns:
+        Tuple of (evaluation, status) where status is 'unchanged', 'rescored' or 'evaluated'
+    """
+    ai_service = ai_service or AIService()
+    weights = current_app.config['EVALUATION_WEIGHTS']
+    latest = project.latest_evaluation
+
+    if (not force and latest is not None
+            and project.content_hash == project.compute_content_hash()
+            and (latest.model, latest.prompt_version) in ai_service.get_evaluation_signatures()):
+        fingerprint = register_weight_set(weights).fingerprint
+        if latest.weights_fingerprint == fingerprint:
+            logger.info(f"Project {project.id} unchanged since evaluation {latest.id}, skipping model call")
+            return latest, 'unchanged'
+
+        # Same criterion scores and texts: only the weighted sum changes, in place
+        # like rescore_evaluations; the project's updated_at moves for /api/changes
+        latest.score_final = compute_score_final(latest.scores, weights)
+        latest.weights_fingerprint = fingerprint
+        project.updated_at = datetime.utcnow()
+        logger.info(f"Project {project.id} rescored locally with weights {fingerprint}")
+        return latest, 'rescored'
+
+    evaluation_result = ai_service.evaluate_project(project.evaluable_data)
+    return record_evaluation(project, evaluation_result), 'evaluated'
+
+
+def update_project(project: Project, changes: Dict[str, str],
+                   ai_service: Optional[AIService] = None) -> Tuple[Optional[Evaluation], str, list]:
+    """
+    Apply edits to a project and re-evaluate only the criteria they affect
+
+    Unchanged criteria scores and suggestions are carried forward from the
+    latest evaluation. Edits that affect every criterion, or projects without
+    a usable evaluation, get a full evaluation.
+
+    Args:
+        project: Project to edit
+        changes: New values for any of the evaluable fields
+        ai_service: AI service to use (created on demand)
+
+    Returns:
+        Tuple of (evaluation, status, re-evaluated criteria) where status is
+        'unchanged', 'partial' or 'evaluated'
+    """
+    changed_fields = [field for field in EVALUABLE_FIELDS
+                      if field in changes and changes[field] != getattr(project, field)]
+    latest = project.latest_evaluation
+    if not changed_fields:
+        return latest, 'unchanged', []
+
+    for field in changed_fields:
+        setattr(project, field, changes[field])
+
+    field_criteria = current_app.config['EVALUATION_FIELD_CRITERIA']
+    affected = {criterion for field in changed_fields for criterion in field_criteria.get(field, CRITERIA)}
+    criteria = [criterion for criterion in CRITERIA if criterion in affected]
+
+    ai_service = ai_service or AIService()
+    partial = None
+    if latest is not None and latest.model is not None and len(criteria) < len(CRITERIA):
+        partial = ai_service.evaluate_criteria(project.evaluable_data, changed_fields,
+                                               criteria, latest.scores)
+
+    if partial is None:
+        evaluation, _ = reevaluate_project(project, force=True, ai_service=ai_service)
+        return evaluation, 'evaluated', list(CRITERIA)
+
+    weights = current_app.config['EVALUATION_WEIGHTS']
+    scores = dict(latest.scores, **partial['scores'])
+    suggestions = dict(latest.get_suggestions(), **partial['suggestions'])
+
+    if 'defis_techniques' in partial:
+        project.defis_techniques = '\n'.join(partial['defis_techniques'])
+    if 'duree_estimee' in partial:
+        project.duree_estimee = partial['duree_estimee']
+    project.content_hash = project.compute_content_hash()
+
+    # Record the model that answered: a fallback provider may have scored the
+    # criteria. The prompt version of the extended evaluation only still applies
+    # for the same model; a mixed evaluation gets a full one at the next reevaluation.
+    model = partial.get('metadata', {}).get('model') or latest.model
+    evaluation = Evaluation(
+        project_id=project.id,
+        score_final=compute_score_final(scores, weights),
+        model=model,
+        prompt_version=latest.prompt_version if model == latest.model else None,
+        weights_fingerprint=register_weight_set(weights).fingerprint,
+        **scores
+    )
+    evaluation.set_suggestions(suggestions)
+    db.session.add(evaluation)
+
+    logger.info(f"Project {project.id}: re-evaluated {criteria} after editing {changed_fields}")
+    return evaluation, 'partial', criteria
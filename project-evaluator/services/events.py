@@ -0,0 +1,354 @@
+"""
+Server-sent events for live dashboard updates
+Every open /api/events stream is fed by its worker's broker, which gets the
+events from one of two backends (EVENTS_BACKEND):
+- 'changes' (default): one thread per worker polls the change feed of
+  services/changes.py while streams are open. The database is the shared
+  channel, so every worker streams every committed change, whichever worker
+  made it. An idle poll costs a single primary-key read of the portfolio version.
+- 'local': committed changes are published straight from the session
+  events to the streams of the same process, without polling. Only suited
+  to a single worker process.
+Events carry the fields the dashboard renders, so clients patch their rows
+without querying back. Changes too numerous to patch one by one (bulk
+imports, rescoring, a client falling behind) are coalesced into a single
+'refresh' event that makes the client reload its page.
+Each stream holds a worker thread: SSE_MAX_SUBSCRIBERS caps them per worker
+and streams close after SSE_STREAM_MAX_AGE seconds, the browser reconnecting
+(possibly to another worker) and resuming from its Last-Event-ID.
+"""
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from .metrics import metrics
+from .scoring import PRIORITY_TEXTS, PRIORITY_ACTIONS, priority_for_score
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('changes', 'local')
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class Subscriber(queue.Queue):
+    """Queue of (id, event, data) messages for one stream; None disconnects it"""
+
+    def __init__(self, maxsize: int, resume_id: Optional[int] = None):
+        super().__init__(maxsize=maxsize)
+        # Position sent to the client when the stream opens, so that it can resume from it
+        self.resume_id = resume_id
+
+
+class EventBroker:
+    """Fan-out of committed changes to SSE subscribers"""
+
+    def __init__(self, history: int = 200, queue_size: int = 100):
+        """
+        Initialize the broker
+
+        Args:
+            history: Recent events kept for replay on reconnection with the 'local' backend
+            queue_size: Events buffered per subscriber before its backlog is replaced by a refresh
+        """
+        self.app = None
+        self.backend = 'local'
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._poller: Optional[threading.Thread] = None
+
+    def init_app(self, app):
+        """Select the backend and publish committed project and evaluation changes"""
+        app.config.setdefault('SSE_HEARTBEAT_INTERVAL', 15)
+        app.config.setdefault('SSE_MAX_SUBSCRIBERS', 50)
+        app.config.setdefault('SSE_STREAM_MAX_AGE', 300)
+        app.config.setdefault('SSE_BULK_THRESHOLD', 20)
+        app.config.setdefault('EVENTS_BACKEND', 'changes')
+        app.config.setdefault('EVENTS_POLL_INTERVAL', 2)
+
+        backend = app.config['EVENTS_BACKEND']
+        if backend not in BACKENDS:
+            logger.warning(f"Unknown EVENTS_BACKEND {backend!r}, using 'changes'")
+            backend = 'changes'
+        self.app = app
+        self.backend = backend
+        app.extensions['event_broker'] = self
+        if not event.contains(Session, 'after_flush', self._after_flush):
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    @property
+    def subscriber_count(self) -> int:
+        """Streams open in this process"""
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        """
+        Announce a committed change
+
+        With the 'changes' backend this is a no-op: the pollers of every
+        worker read the change from the database.
+
+        Args:
+            event_type: SSE event name
+            data: JSON-serializable payload
+        """
+        if self.backend == 'local':
+            with self._lock:
+                self._last_id = next(self._ids)
+                message = (self._last_id, event_type, data)
+                self._history.append(message)
+            self._deliver([message])
+
+    def _deliver(self, messages: List[Tuple[int, str, Dict[str, Any]]]):
+        """Queue messages for every subscriber of this process"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            for message in messages:
+                self._put(subscriber, message)
+        for _, event_type, _ in messages:
+            metrics.inc('sse_events_total', event=event_type)
+
+    def _put(self, subscriber: Subscriber, message: Tuple[int, str, Dict[str, Any]]):
+        with subscriber.mutex:
+            if subscriber.queue and subscriber.queue[-1] and subscriber.queue[-1][1] == 'refresh':
+                return  # The client reloads its page anyway
+        try:
+            subscriber.put_nowait(message)
+        except queue.Full:
+            # A stalled client keeps its stream: its backlog becomes a single refresh
+            with subscriber.mutex:
+                subscriber.queue.clear()
+                subscriber.queue.append((message[0], 'refresh', {}))
+                subscriber.not_empty.notify()
+            metrics.inc('sse_refreshes_total', reason='overflow')
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscriber:
+        """
+        Register a subscriber (within an application context)
+
+        Args:
+            last_event_id: ID of the last event the client received; the events it missed are replayed
+
+        Returns:
+            Subscriber queue to pass to stream()
+        """
+        if self.backend == 'changes':
+            subscriber = Subscriber(self.queue_size, _cursor_id(_lagged_now()))
+            if last_event_id is not None:
+                for message in self._replay(last_event_id):
+                    self._put(subscriber, message)
+        else:
+            subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            if self.backend == 'local':
+                subscriber.resume_id = self._last_id
+                if last_event_id is not None:
+                    for message in self._history:
+                        if message[0] > last_event_id:
+                            self._put(subscriber, message)
+            self._subscribers.add(subscriber)
+            if self.backend == 'changes' and self._poller is None:
+                self._poller = threading.Thread(target=self._poll, args=(_lagged_now(),),
+                                                name='sse-poller', daemon=True)
+                self._poller.start()
+        metrics.set('sse_subscribers', len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Remove a subscriber"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        metrics.set('sse_subscribers', len(self._subscribers))
+
+    def stream(self, subscriber: Subscriber, heartbeat: float, max_age: Optional[float] = None) -> Iterator[str]:
+        """
+        Format a subscriber's events as an SSE stream
+
+        Args:
+            subscriber: Queue returned by subscribe
+            heartbeat: Seconds between keep-alive comments when idle
+            max_age: Seconds after which the stream ends and the client reconnects (None to keep it open)
+
+        Yields:
+            SSE frames
+        """
+        deadline = float('inf') if max_age is None else time.monotonic() + max_age
+        try:
+            frame = 'retry: 3000\n'
+            if subscriber.resume_id is not None:
+                frame += f'id: {subscriber.resume_id}\n'
+            yield frame + '\n'
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    message = subscriber.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if message is None:
+                    return
+                event_id, event_type, data = message
+                yield f'id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+    # Change feed backend
+
+    def _poll(self, since: datetime):
+        """Poll the change feed from a cursor while this process has subscribers"""
+        from .http_cache import portfolio_version
+
+        with self.app.app_context():
+            version, seen = None, {}
+            while True:
+                time.sleep(self.app.config['EVENTS_POLL_INTERVAL'])
+                with self._lock:
+                    if not self._subscribers:
+                        self._poller = None
+                        return
+                try:
+                    current = portfolio_version()[0]
+                    if current != version:
+                        event_id = _cursor_id(since)
+                        since, events = self._read_changes(since, seen)
+                        if not events and version is not None:
+                            # Writes the feed does not show leave nothing to patch: reload
+                            events = [(event_id, 'refresh', {})]
+                        self._deliver(events)
+                        version = current
+                except Exception as e:
+                    logger.warning(f"Event poll failed: {e}")
+                finally:
+                    db.session.remove()
+
+    def _replay(self, last_event_id: int) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Changes committed after the cursor encoded in an event ID"""
+        from .changes import CursorExpired
+
+        since = EPOCH + timedelta(microseconds=last_event_id)
+        try:
+            return self._read_changes(since)[1]
+        except CursorExpired:
+            return [(_cursor_id(_lagged_now()), 'refresh', {})]
+
+    def _read_changes(self, since: datetime, seen: Optional[Dict[int, Any]] = None
+                      ) -> Tuple[datetime, List[Tuple[int, str, Dict[str, Any]]]]:
+        """
+        Turn the change feed after a cursor into events
+
+        Args:
+            since: Cursor
+            seen: Last payload sent per project ID, updated; changes already sent are skipped
+
+        Returns:
+            Next cursor and the events, all identified by the cursor they were read from
+        """
+        from .changes import get_changes
+        from .project_queries import LISTING_FIELDS, project_listing_query, serialize_projects
+
+        fieldset = {'fields': list(LISTING_FIELDS), 'include': []}
+        changes = get_changes(since, fieldset)
+        projects = {project['id']: project for project in changes['projects']}
+        # A new evaluation does not always move its project's updated_at
+        missing = {evaluation['project_id'] for evaluation in changes['evaluations']} - projects.keys()
+        if missing:
+            query = project_listing_query({'ids': sorted(missing)}, fieldset)
+            projects.update((project['id'], project) for project in serialize_projects(query.all(), fieldset))
+
+        seen = seen if seen is not None else {}
+        event_id = _cursor_id(since)
+        events = []
+        for project_id, project in projects.items():
+            if seen.get(project_id) != project:
+                seen[project_id] = project
+                created = datetime.fromisoformat(project['created_at']) >= since
+                events.append((event_id, 'project_created' if created else 'evaluation', project))
+        for project_id in changes['deleted']:
+            if project_id not in seen or seen[project_id] is not None:
+                seen[project_id] = None
+                events.append((event_id, 'project_deleted', {'id': project_id}))
+
+        if len(events) > current_app.config['SSE_BULK_THRESHOLD']:
+            metrics.inc('sse_refreshes_total', reason='bulk')
+            events = [(event_id, 'refresh', {'changes': len(events)})]
+        return datetime.fromisoformat(changes['cursor']), events
+
+    # Local backend session events
+
+    def _after_flush(self, session, flush_context):
+        """Collect the changes of this flush; they are published once committed"""
+        if self.backend != 'local':
+            return
+        from models import Project, Evaluation
+
+        pending = session.info.setdefault('sse_events', [])
+        for obj in session.new:
+            if isinstance(obj, Project):
+                pending.append(('project_created', _project_payload(obj, None)))
+        for obj in session.new:
+            if isinstance(obj, Evaluation):
+                project = session.get(Project, obj.project_id)
+                if project is not None:
+                    pending.append(('evaluation', _project_payload(project, obj.score_final)))
+        for obj in session.deleted:
+            if isinstance(obj, Project):
+                pending.append(('project_deleted', {'id': obj.id}))
+
+    def _after_commit(self, session):
+        pending = session.info.pop('sse_events', [])
+        threshold = self.app.config['SSE_BULK_THRESHOLD'] if self.app else len(pending)
+        if len(pending) > threshold:
+            metrics.inc('sse_refreshes_total', reason='bulk')
+            pending = [('refresh', {'changes': len(pending)})]
+        for event_type, data in pending:
+            self.publish(event_type, data)
+
+    def _after_rollback(self, session):
+        session.info.pop('sse_events', None)
+
+
+def _lagged_now() -> datetime:
+    """Current change feed position, minus the lag covering transactions in flight"""
+    return datetime.utcnow() - timedelta(seconds=current_app.config['CHANGES_CURSOR_LAG'])
+
+
+def _cursor_id(cursor: datetime) -> int:
+    """Event ID encoding a change feed cursor (microseconds since the epoch)"""
+    return (cursor - EPOCH) // timedelta(microseconds=1)
+
+
+def _project_payload(project, score_final: Optional[float]) -> Dict[str, Any]:
+    """Fields of a dashboard row"""
+    thresholds = current_app.config.get('PRIORITY_THRESHOLDS') if has_app_context() else None
+    priority = priority_for_score(score_final, thresholds) if score_final is not None else 'non-évalué'
+    return {
+        'id': project.id,
+        'titre': project.titre,
+        'pvp': project.pvp,
+        'score_final': score_final,
+        'priority': priority,
+        'priority_text': PRIORITY_TEXTS[priority],
+        'action_text': PRIORITY_ACTIONS[priority],
+        'created_at': project.created_at.isoformat() if project.created_at else None
+    }
+
+
+event_broker = EventBroker()
@@ -0,0 +1,197 @@
+"""
+Streaming export of the portfolio
+Rows are read through a server-side cursor in batches and written out as they
+arrive, so memory stays constant whatever the portfolio size. NDJSON and CSV
+carry every project field; Parquet and Arrow carry the criterion scores in
+columnar form and require pyarrow.
+"""
+import csv
+import io
+import json
+import logging
+import tempfile
+from typing import Iterator, List
+from sqlalchemy import select
+from models import db, Project, Evaluation, LeaderboardEntry
+from .scoring import CRITERIA
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+PROJECT_COLUMNS = ('titre', 'pvp', 'contexte', 'objectifs', 'fonctionnalites',
+                   'defis_techniques', 'duree_estimee')
+EVALUATION_COLUMNS = CRITERIA + ('score_final', 'model', 'prompt_version')
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream'
+}
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+
+def _statement(history: bool, columnar: bool):
+    """
+    Select one row per project (latest evaluation) or per evaluation (history)
+
+    Projects without an evaluation are exported with empty scores, except in
+    the columnar formats, which only hold scores.
+    """
+    project_columns = [Project.pvp] if columnar else [getattr(Project, c) for c in PROJECT_COLUMNS]
+    columns = [Project.id.label('project_id'), *project_columns, Project.created_at,
+               Evaluation.id.label('evaluation_id'),
+               *[getattr(Evaluation, c) for c in EVALUATION_COLUMNS],
+               Evaluation.created_at.label('evaluated_at')]
+
+    if history:
+        statement = (select(*columns).select_from(Project)
+                     .join(Evaluation, Evaluation.project_id == Project.id)
+                     .order_by(Project.id, Evaluation.id))
+    else:
+        statement = (select(*columns).select_from(Project)
+                     .outerjoin(LeaderboardEntry, LeaderboardEntry.project_id == Project.id)
+                     .outerjoin(Evaluation, Evaluation.id == LeaderboardEntry.evaluation_id)
+                     .order_by(Project.id))
+        if columnar:
+            statement = statement.where(Evaluation.id.isnot(None))
+    return statement.execution_options(stream_results=True, yield_per=BATCH_SIZE)
+
+
+def _batches(history: bool, columnar: bool = False) -> Iterator[List]:
+    """Yield lists of rows from a server-side cursor"""
+    result = db.session.execute(_statement(history, columnar))
+    try:
+        for partition in result.partitions(BATCH_SIZE):
+            yield partition
+    finally:
+        result.close()
+
+
+def _column_names(history: bool, columnar: bool = False) -> List[str]:
+    return list(_statement(history, columnar).selected_columns.keys())
+
+
+def _serialize(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def export_ndjson(history: bool = False) -> Iterator[str]:
+    """Yield the portfolio as newline-delimited JSON, one object per row"""
+    names = _column_names(history)
+    for batch in _batches(history):
+        yield ''.join(
+            json.dumps({name: _serialize(value) for name, value in zip(names, row)}, ensure_ascii=False) + '\n'
+            for row in batch
+        )
+
+
+def export_csv(history: bool = False) -> Iterator[str]:
+    """Yield the portfolio as CSV with a header row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(_column_names(history))
+    for batch in _batches(history):
+        writer.writerows([_serialize(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _arrow_schema(history: bool):
+    fields = [pa.field('project_id', pa.int64()), pa.field('pvp', pa.string()),
+              pa.field('created_at', pa.timestamp('us')), pa.field('evaluation_id', pa.int64())]
+    fields += [pa.field(criterion, pa.float64()) for criterion in CRITERIA]
+    fields += [pa.field('score_final', pa.float64()), pa.field('model', pa.string()),
+               pa.field('prompt_version', pa.string()), pa.field('evaluated_at', pa.timestamp('us'))]
+    return pa.schema(fields)
+
+
+def _record_batches(history: bool) -> Iterator:
+    schema = _arrow_schema(history)
+    for batch in _batches(history, columnar=True):
+        columns = list(zip(*batch))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting what the Arrow writer emits until it is drained"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def export_arrow(history: bool = False) -> Iterator[bytes]:
+    """Yield the criterion scores as an Arrow IPC stream, one record batch at a time"""
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, _arrow_schema(history)) as writer:
+        for record_batch in _record_batches(history):
+            writer.write_batch(record_batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_parquet(history: bool = False) -> Iterator[bytes]:
+    """
+    Yield the criterion scores as a Parquet file
+
+    Parquet writes its footer last, so row groups are spooled to a temporary
+    file (on disk beyond a few MB) and then streamed in chunks.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        with pq.ParquetWriter(spool, _arrow_schema(history)) as writer:
+            for record_batch in _record_batches(history):
+                writer.write_batch(record_batch)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(64 * 1024)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_portfolio(export_format: str, history: bool = False) -> Iterator:
+    """
+    Stream the portfolio in a format
+
+    Args:
+        export_format: One of FORMATS
+        history: Export every evaluation instead of the latest one per project
+
+    Returns:
+        Generator of str or bytes chunks
+
+    Raises:
+        RuntimeError: When a columnar format is requested without pyarrow
+    """
+    if export_format in COLUMNAR_FORMATS and pa is None:
+        raise RuntimeError('pyarrow is required for Parquet and Arrow exports')
+    exporters = {'ndjson': export_ndjson, 'csv': export_csv,
+                 'parquet': export_parquet, 'arrow': export_arrow}
+    return exporters[export_format](history)
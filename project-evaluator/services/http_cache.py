@@ -0,0 +1,147 @@
+"""
+HTTP validators for project pages and the project API
+Detail responses are identified by the project's updated_at and latest
+evaluation; listings by a portfolio version counter bumped in the same
+transaction as every write to projects or evaluations. A request whose
+If-None-Match (or If-Modified-Since) still matches gets 304 Not Modified
+after a single primary-key lookup, without loading or rendering anything.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Tuple
+from flask import current_app, make_response, request, session
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from models import db, Project, Evaluation, LeaderboardEntry, PortfolioVersion
+
+logger = logging.getLogger(__name__)
+
+table = PortfolioVersion.__table__
+
+
+def ensure_portfolio_version():
+    """Create the counter row of a new database"""
+    if db.session.get(PortfolioVersion, 1) is None:
+        db.session.add(PortfolioVersion(id=1, version=0))
+        db.session.commit()
+
+
+def bump_portfolio_version(connection=None):
+    """
+    Increment the portfolio version (part of the caller's transaction)
+
+    Session events bump it automatically; bulk statements that bypass them
+    call this directly.
+
+    Args:
+        connection: Connection to execute on (defaults to the session's)
+    """
+    connection = connection if connection is not None else db.session.connection()
+    connection.execute(update(table).where(table.c.id == 1)
+                       .values(version=table.c.version + 1, updated_at=datetime.utcnow()))
+
+
+def portfolio_version() -> Tuple[int, Optional[datetime]]:
+    """Current portfolio version and when it last changed"""
+    row = db.session.execute(select(table.c.version, table.c.updated_at).where(table.c.id == 1)).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def project_validators(project_id: int) -> Optional[Tuple[tuple, datetime]]:
+    """
+    Version of a project, read from indexed columns only
+
+    Rescoring updates score_final in place, so the weights fingerprint of the
+    latest evaluation is part of the version.
+
+    Args:
+        project_id: Project ID
+
+    Returns:
+        Tuple of (ETag parts, last modification time), or None when the project does not exist
+    """
+    row = db.session.execute(
+        select(Project.updated_at, LeaderboardEntry.evaluation_id,
+               Evaluation.weights_fingerprint, Evaluation.created_at)
+        .outerjoin(LeaderboardEntry, LeaderboardEntry.project_id == Project.id)
+        .outerjoin(Evaluation, Evaluation.id == LeaderboardEntry.evaluation_id)
+        .where(Project.id == project_id)
+    ).first()
+    if row is None:
+        return None
+    modified = max(filter(None, (row.updated_at, row.created_at)), default=None)
+    return (project_id, row.updated_at, row.evaluation_id, row.weights_fingerprint), modified
+
+
+def fingerprint(parts: Any) -> str:
+    """Stable hash of the values identifying a representation"""
+    return hashlib.sha256(json.dumps(parts, default=str, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional(parts: Any, last_modified: Optional[datetime], build: Callable):
+    """
+    Answer with 304 when the client's validators match, otherwise build the response
+
+    Pages carrying flashed messages are never cached, since rendering consumes them.
+
+    Args:
+        parts: Values identifying the representation (JSON-serializable)
+        last_modified: Time of the last change (naive UTC)
+        build: Callable returning the full response
+
+    Returns:
+        Flask response with ETag, Last-Modified and Cache-Control on 200 and 304
+    """
+    if '_flashes' in session:
+        return build()
+
+    etag = fingerprint(parts)
+    if _not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    max_age = current_app.config['HTTP_CACHE_MAX_AGE']
+    if max_age:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.cache_control.must_revalidate = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def _after_flush(session, flush_context):
+    """Bump the portfolio version when projects or evaluations were written in this flush"""
+    tracked = (Project, Evaluation)
+    if (any(isinstance(obj, tracked) for obj in session.new)
+            or any(isinstance(obj, tracked) for obj in session.deleted)
+            or any(isinstance(obj, tracked) and session.is_modified(obj) for obj in session.dirty)):
+        bump_portfolio_version(session.connection())
+
+
+def init_app(app):
+    """
+    Keep the portfolio version current on every flush
+
+    Args:
+        app: Flask application
+    """
+    app.config.setdefault('HTTP_CACHE_MAX_AGE', 0)
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
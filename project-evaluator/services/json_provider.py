@@ -0,0 +1,76 @@
+"""
+Fast JSON serialization for API responses and stored JSON columns
+OrjsonProvider replaces Flask's stdlib provider when orjson is installed
+(JSON_PROVIDER='orjson', the default). Responses are written as UTF-8 bytes
+without key sorting or ASCII escaping; datetimes keep Flask's HTTP date
+format. loads() is also used to parse the JSON text columns of the models.
+"""
+import json
+import logging
+from typing import Any
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    # Datetimes go through Flask's default hook so the format does not change
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    JSONDecodeError = orjson.JSONDecodeError  # Subclass of json.JSONDecodeError
+else:
+    ORJSON_OPTIONS = 0
+    JSONDecodeError = json.JSONDecodeError
+
+
+def loads(value):
+    """Parse JSON text or UTF-8 bytes with the fastest available library"""
+    return orjson.loads(value) if orjson is not None else json.loads(value)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson"""
+
+    sort_keys = False
+    ensure_ascii = False
+
+    def _dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        option = ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize to a string; arguments orjson does not support fall back to the json module"""
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        """Deserialize JSON text or bytes"""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        """Serialize straight to the response body, skipping the str round trip"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+def init_app(app):
+    """
+    Install the configured JSON provider
+
+    Args:
+        app: Flask application
+    """
+    app.config.setdefault('JSON_PROVIDER', 'orjson')
+    if app.config['JSON_PROVIDER'] != 'orjson':
+        return
+    if orjson is None:
+        logger.warning("JSON_PROVIDER=orjson but the orjson package is not installed, using the json module")
+        return
+    app.json = OrjsonProvider(app)
@@ -0,0 +1,217 @@
+"""
+Materialized project leaderboard
+Each project with an evaluation has one row holding its global rank,
+department rank and priority. Rows are maintained in the same
+transaction as the writes that change them: a new evaluation removes the
+project from its old position and inserts it at the new one, shifting only the
+ranks in between. Reads ("top 50", "rank of project X", per-department
+rankings) are then index lookups. compute_leaderboard() keeps the from-scratch
+ranking available to check the table against. The percentile depends on the
+number of ranked projects, so it is computed when a row is read rather than
+rewritten for every row whenever a project joins or leaves.
+"""
+import logging
+from typing import Dict, Any, List, Optional
+from flask import current_app, has_app_context
+from sqlalchemy import and_, delete, event, func, insert, inspect, or_, select, update
+from sqlalchemy.orm import Session
+from models import db, Project, Evaluation, LeaderboardEntry
+from .http_cache import bump_portfolio_version
+from .scoring import priority_for_score
+
+logger = logging.getLogger(__name__)
+
+table = LeaderboardEntry.__table__
+
+
+def _thresholds() -> Optional[Dict[str, float]]:
+    return current_app.config.get('PRIORITY_THRESHOLDS') if has_app_context() else None
+
+
+def _remove(connection, project_id: int):
+    """Remove a project and close the gap it leaves; returns its former rank"""
+    row = connection.execute(
+        select(table.c.rank, table.c.pvp, table.c.pvp_rank).where(table.c.project_id == project_id)
+    ).first()
+    if row is None:
+        return None
+    connection.execute(delete(table).where(table.c.project_id == project_id))
+    connection.execute(update(table).where(table.c.rank > row.rank).values(rank=table.c.rank - 1))
+    connection.execute(
+        update(table)
+        .where(table.c.pvp == row.pvp, table.c.pvp_rank > row.pvp_rank)
+        .values(pvp_rank=table.c.pvp_rank - 1)
+    )
+    return row.rank
+
+
+def _place(connection, project_id: int, evaluation_id: int, pvp: str, score: float) -> int:
+    """Insert a project at its position (score descending, then project id); returns its rank"""
+    ahead = or_(table.c.score_final > score,
+                and_(table.c.score_final == score, table.c.project_id < project_id))
+    rank = connection.scalar(select(func.count()).select_from(table).where(ahead)) + 1
+    pvp_rank = connection.scalar(select(func.count()).select_from(table).where(table.c.pvp == pvp, ahead)) + 1
+
+    connection.execute(update(table).where(table.c.rank >= rank).values(rank=table.c.rank + 1))
+    connection.execute(
+        update(table)
+        .where(table.c.pvp == pvp, table.c.pvp_rank >= pvp_rank)
+        .values(pvp_rank=table.c.pvp_rank + 1)
+    )
+    connection.execute(insert(table).values(
+        project_id=project_id,
+        evaluation_id=evaluation_id,
+        pvp=pvp,
+        score_final=score,
+        rank=rank,
+        pvp_rank=pvp_rank,
+        priority=priority_for_score(score, _thresholds())
+    ))
+    return rank
+
+
+def apply_changes(connection, placements: Dict[int, tuple], removals: List[int]):
+    """
+    Apply score changes and deletions to the leaderboard
+
+    Args:
+        connection: Connection of the current transaction
+        placements: (evaluation_id, pvp, score_final) by project ID
+        removals: IDs of deleted projects
+    """
+    for project_id in removals:
+        _remove(connection, project_id)
+    for project_id, (evaluation_id, pvp, score) in placements.items():
+        _remove(connection, project_id)
+        _place(connection, project_id, evaluation_id, pvp, score)
+
+
+def compute_leaderboard() -> List[Dict[str, Any]]:
+    """
+    Rank every evaluated project from scratch
+
+    Returns:
+        Leaderboard rows in rank order
+    """
+    latest_ids = select(func.max(Evaluation.id)).group_by(Evaluation.project_id).scalar_subquery()
+    rows = db.session.execute(
+        select(Evaluation.project_id, Evaluation.id, Project.pvp, Evaluation.score_final)
+        .join(Project, Project.id == Evaluation.project_id)
+        .where(Evaluation.id.in_(latest_ids))
+    ).all()
+    rows.sort(key=lambda row: (-row.score_final, row.project_id))
+
+    thresholds = _thresholds()
+    pvp_counts: Dict[str, int] = {}
+    entries = []
+    for rank, row in enumerate(rows, 1):
+        pvp_counts[row.pvp] = pvp_counts.get(row.pvp, 0) + 1
+        entries.append({
+            'project_id': row.project_id,
+            'evaluation_id': row.id,
+            'pvp': row.pvp,
+            'score_final': row.score_final,
+            'rank': rank,
+            'pvp_rank': pvp_counts[row.pvp],
+            'priority': priority_for_score(row.score_final, thresholds)
+        })
+    return entries
+
+
+def rebuild_leaderboard() -> int:
+    """
+    Replace the leaderboard with the from-scratch ranking (the caller commits)
+
+    Returns:
+        Number of ranked projects
+    """
+    entries = compute_leaderboard()
+    db.session.execute(delete(table))
+    if entries:
+        db.session.execute(insert(table), entries)
+    # Bulk statements bypass the session events that bump the version
+    bump_portfolio_version()
+    logger.info(f"Leaderboard rebuilt with {len(entries)} projects")
+    return len(entries)
+
+
+def check_leaderboard() -> Dict[str, Any]:
+    """
+    Compare the materialized leaderboard with the from-scratch ranking
+
+    Returns:
+        Dictionary with a consistency flag and the differing project IDs
+    """
+    expected = {entry['project_id']: entry for entry in compute_leaderboard()}
+    stored = {row.project_id: dict(row._mapping) for row in db.session.execute(select(table))}
+    mismatches = sorted(
+        project_id for project_id in set(expected) | set(stored)
+        if expected.get(project_id) != stored.get(project_id)
+    )
+    return {
+        'consistent': not mismatches,
+        'ranked_projects': len(stored),
+        'evaluated_projects': len(expected),
+        'mismatches': mismatches[:100]
+    }
+
+
+def ensure_leaderboard():
+    """Build the leaderboard of a database created before it existed (or before percentiles were computed on read)"""
+    columns = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    if 'percentile' in columns:
+        # Tables created when the percentile was stored: derived data, recreated without it
+        table.drop(db.session.connection())
+        table.create(db.session.connection())
+        db.session.commit()
+        logger.info("Recreated the leaderboard table without the stored percentile")
+    if LeaderboardEntry.query.first() is None and Evaluation.query.first() is not None:
+        rebuild_leaderboard()
+        db.session.commit()
+
+
+def _after_flush(session, flush_context):
+    """Move the projects whose latest evaluation, its score or their department changed in this flush"""
+    placements = {}
+    removals = []
+    for obj in session.new:
+        if isinstance(obj, Evaluation):
+            current = placements.get(obj.project_id)
+            if current is None or obj.id > current[0]:
+                project = session.get(Project, obj.project_id)
+                placements[obj.project_id] = (obj.id, project.pvp, obj.score_final)
+    # Ranked evaluations re-scored in place, before department moves so those use the new score
+    for obj in session.dirty:
+        if (isinstance(obj, Evaluation) and obj.project_id not in placements
+                and inspect(obj).attrs.score_final.history.has_changes()):
+            ranked_id = session.connection().scalar(
+                select(table.c.evaluation_id).where(table.c.project_id == obj.project_id)
+            )
+            if ranked_id == obj.id:
+                project = session.get(Project, obj.project_id)
+                placements[obj.project_id] = (obj.id, project.pvp, obj.score_final)
+    for obj in session.dirty:
+        if (isinstance(obj, Project) and obj.id not in placements
+                and inspect(obj).attrs.pvp.history.has_changes()):
+            entry = session.connection().execute(
+                select(table.c.evaluation_id, table.c.score_final).where(table.c.project_id == obj.id)
+            ).first()
+            if entry is not None:
+                placements[obj.id] = (entry.evaluation_id, obj.pvp, entry.score_final)
+    for obj in session.deleted:
+        if isinstance(obj, Project):
+            removals.append(obj.id)
+
+    if placements or removals:
+        apply_changes(session.connection(), placements, removals)
+
+
+def init_app(app):
+    """
+    Keep the leaderboard current on every flush
+
+    Args:
+        app: Flask application
+    """
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
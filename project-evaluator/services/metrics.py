@@ -0,0 +1,356 @@
+"""
+Prometheus-style metrics for AI provider calls
+Counters, gauges and histograms are kept in memory and, when
+METRICS_MULTIPROC_DIR is set, snapshotted per worker process (at most every METRICS_FLUSH_INTERVAL
+seconds and on each scrape) so that the /metrics endpoint aggregates every
+gunicorn worker
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, Any, Tuple, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Iterable[Tuple[str, str]], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ''
+    escaped = [
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """Process-local metric store with optional multi-process snapshots"""
+
+    def __init__(self):
+        self._definitions: Dict[str, Dict[str, Any]] = {}
+        self._values: Dict[str, Dict[LabelKey, Any]] = {}
+        # Reentrant: snapshots are taken and written while holding it
+        self._lock = threading.RLock()
+        self.multiproc_dir: Optional[str] = None
+        self.flush_interval = 5.0
+        self.pricing: Dict[str, Dict[str, float]] = {}
+        self._last_flush = 0.0
+        self._flushed_pid: Optional[int] = None
+        self._flush_timer: Optional[threading.Timer] = None
+
+    def init_app(self, app):
+        """
+        Configure the registry from Flask config and expose /metrics
+
+        Args:
+            app: Flask application
+        """
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_MULTIPROC_DIR', None)
+        app.config.setdefault('METRICS_FLUSH_INTERVAL', 5.0)
+        app.config.setdefault('MODEL_PRICING', {})
+
+        self.pricing = app.config['MODEL_PRICING']
+        self.flush_interval = app.config['METRICS_FLUSH_INTERVAL']
+        self.multiproc_dir = app.config['METRICS_MULTIPROC_DIR']
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            self.retire_dead_snapshots()
+            atexit.register(self._flush)
+
+        if app.config['METRICS_ENABLED']:
+            app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+
+    # Definitions
+
+    def counter(self, name: str, documentation: str):
+        self._define(name, 'counter', documentation)
+
+    def gauge(self, name: str, documentation: str):
+        self._define(name, 'gauge', documentation)
+
+    def histogram(self, name: str, documentation: str, buckets=DEFAULT_LATENCY_BUCKETS):
+        self._define(name, 'histogram', documentation, buckets=tuple(buckets))
+
+    def _define(self, name: str, metric_type: str, documentation: str, **extra):
+        self._definitions[name] = {'type': metric_type, 'help': documentation, **extra}
+        self._values.setdefault(name, {})
+
+    # Updates
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        """Increment a counter or gauge"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0.0) + amount
+        self._schedule_flush()
+
+    def dec(self, name: str, amount: float = 1.0, **labels):
+        """Decrement a gauge"""
+        self.inc(name, -amount, **labels)
+
+    def set(self, name: str, value: float, **labels):
+        """Set a gauge"""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[name][key] = float(value)
+        self._schedule_flush()
+
+    def observe(self, name: str, value: float, **labels):
+        """Record an observation in a histogram"""
+        buckets = self._definitions[name]['buckets']
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values[name]
+            state = series.get(key)
+            if state is None:
+                state = series[key] = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    state['buckets'][i] += 1
+            state['sum'] += value
+            state['count'] += 1
+        self._schedule_flush()
+
+    def record_call(self, provider: str, model: str, operation: str, latency: float,
+                    input_tokens: int = 0, output_tokens: int = 0, error: bool = False):
+        """
+        Record a single provider API call
+
+        Args:
+            provider: Provider name
+            model: Model name
+            operation: 'evaluation', 'improvement', ...
+            latency: Call duration in seconds
+            input_tokens: Prompt tokens reported by the SDK
+            output_tokens: Completion tokens reported by the SDK
+            error: Whether the call raised
+        """
+        self.inc('ai_provider_calls_total', provider=provider, model=model, operation=operation)
+        self.observe('ai_provider_request_duration_seconds', latency,
+                     provider=provider, model=model, operation=operation)
+        if error:
+            self.inc('ai_provider_failures_total', provider=provider, model=model,
+                     operation=operation, reason='error')
+        if input_tokens:
+            self.inc('ai_tokens_total', input_tokens, provider=provider, model=model, direction='input')
+        if output_tokens:
+            self.inc('ai_tokens_total', output_tokens, provider=provider, model=model, direction='output')
+
+        cost = self.estimate_cost(model, input_tokens, output_tokens)
+        if cost:
+            self.inc('ai_cost_usd_total', cost, provider=provider, model=model)
+
+    def estimate_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        """
+        Estimate the USD cost of a call from MODEL_PRICING (USD per million tokens)
+
+        Returns:
+            Estimated cost, 0.0 for unknown models
+        """
+        price = self.pricing.get(model)
+        if price is None:
+            # Allow pricing keys without the date suffix (e.g. 'gpt-4.1')
+            matches = [k for k in self.pricing if model and model.startswith(k)]
+            if not matches:
+                return 0.0
+            price = self.pricing[max(matches, key=len)]
+        return (input_tokens * price.get('input', 0.0) + output_tokens * price.get('output', 0.0)) / 1_000_000
+
+    # Multi-process snapshots
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self.multiproc_dir, f'metrics_{pid}.json')
+
+    def _snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'values': {
+                    name: [[list(map(list, key)), value] for key, value in series.items()]
+                    for name, series in self._values.items()
+                }
+            }
+
+    def _schedule_flush(self):
+        """Write the snapshot if the last write is older than flush_interval, else once it is"""
+        if not self.multiproc_dir:
+            return
+        delay = self._last_flush + self.flush_interval - time.monotonic()
+        if delay <= 0:
+            self._flush()
+            return
+        with self._lock:
+            # Timers do not survive a fork: a worker never sees its parent's timer alive
+            if self._flush_timer is None or not self._flush_timer.is_alive():
+                self._flush_timer = threading.Timer(delay, self._flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush(self):
+        if not self.multiproc_dir:
+            return
+        path = self._snapshot_path(os.getpid())
+        with self._lock:
+            if self._flushed_pid != os.getpid():
+                # First write of this process: a snapshot with its PID belongs to an exited predecessor
+                self._retire(os.getpid())
+                self._flushed_pid = os.getpid()
+            # A unique temporary file per write, replaced atomically: readers
+            # only ever see a complete snapshot
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix='.metrics_', suffix='.tmp', dir=self.multiproc_dir)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self._snapshot(), f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.error(f"Error writing metrics snapshot {path}: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+            self._last_flush = time.monotonic()
+
+    def retire_dead_snapshots(self):
+        """
+        Rename the snapshots of exited workers so that a new worker reusing
+        their PID cannot overwrite them; their counters stay in the totals
+
+        Returns:
+            Number of snapshots retired
+        """
+        retired = 0
+        for filename in os.listdir(self.multiproc_dir):
+            pid = filename[len('metrics_'):-len('.json')]
+            if filename.startswith('metrics_') and filename.endswith('.json') and pid.isdigit():
+                if int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                    retired += self._retire(int(pid))
+        return retired
+
+    def _retire(self, pid: int) -> bool:
+        try:
+            os.replace(self._snapshot_path(pid),
+                       os.path.join(self.multiproc_dir, f'metrics_dead_{pid}_{uuid.uuid4().hex[:8]}.json'))
+            return True
+        except FileNotFoundError:
+            return False  # No snapshot, or retired by another worker starting at the same time
+
+    def _load_snapshots(self):
+        """Yield (pid, values) for every worker snapshot; pid is None for retired snapshots"""
+        if not self.multiproc_dir:
+            yield os.getpid(), self._snapshot()['values']
+            return
+
+        self._flush()
+        for filename in os.listdir(self.multiproc_dir):
+            if not (filename.startswith('metrics_') and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, filename), encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                # Retired snapshots may carry the PID of a live process that reused it
+                yield None if filename.startswith('metrics_dead_') else snapshot['pid'], snapshot['values']
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping unreadable metrics snapshot {filename}: {e}")
+
+    def collect(self) -> Dict[str, Dict[LabelKey, Any]]:
+        """
+        Aggregate metrics across worker processes
+
+        Counters and histograms are summed over every snapshot; gauges are
+        summed over live processes only
+
+        Returns:
+            Mapping of metric name to label key to aggregated value
+        """
+        aggregated: Dict[str, Dict[LabelKey, Any]] = {name: {} for name in self._definitions}
+
+        for pid, values in self._load_snapshots():
+            alive = pid is not None and (pid == os.getpid() or _pid_alive(pid))
+            for name, series in values.items():
+                definition = self._definitions.get(name)
+                if definition is None:
+                    continue
+                if definition['type'] == 'gauge' and not alive:
+                    continue
+                target = aggregated[name]
+                for raw_key, value in series:
+                    key = tuple(tuple(pair) for pair in raw_key)
+                    if definition['type'] == 'histogram':
+                        state = target.setdefault(key, {'buckets': [0] * len(definition['buckets']),
+                                                        'sum': 0.0, 'count': 0})
+                        state['buckets'] = [a + b for a, b in zip(state['buckets'], value['buckets'])]
+                        state['sum'] += value['sum']
+                        state['count'] += value['count']
+                    else:
+                        target[key] = target.get(key, 0.0) + value
+
+        return aggregated
+
+    def render(self) -> str:
+        """Render aggregated metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, series in self.collect().items():
+            definition = self._definitions[name]
+            lines.append(f"# HELP {name} {definition['help']}")
+            lines.append(f"# TYPE {name} {definition['type']}")
+            for key, value in sorted(series.items()):
+                if definition['type'] == 'histogram':
+                    for bound, count in zip(definition['buckets'], value['buckets']):
+                        lines.append(f"{name}_bucket{_format_labels(key, {'le': repr(float(bound))})} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, {'le': '+Inf'})} {value['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {value['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def _metrics_view(self):
+        from flask import Response
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+metrics = MetricsRegistry()
+
+metrics.histogram('ai_provider_request_duration_seconds', 'Latency of AI provider API calls')
+metrics.counter('ai_provider_calls_total', 'AI provider API calls')
+metrics.counter('ai_provider_failures_total', 'Failed AI provider attempts by reason')
+metrics.counter('ai_provider_fallbacks_total', 'Attempts made on a fallback provider')
+metrics.counter('ai_cache_hits_total', 'Cache hits by cache name')
+metrics.counter('ai_cache_misses_total', 'Cache misses by cache name')
+metrics.counter('ai_parse_repairs_total', 'Model responses that needed JSON clean-up before parsing')
+metrics.counter('ai_tokens_total', 'Tokens reported by provider SDK usage fields')
+metrics.counter('ai_cost_usd_total', 'Estimated provider cost in USD')
+metrics.counter('ai_cascade_evaluations_total', 'Cascade evaluations by outcome and escalation reason')
+metrics.counter('ai_cascade_latency_seconds_total', 'Time spent in each cascade stage')
+metrics.counter('ai_cascade_latency_saved_seconds_total', 'Estimated default-model time saved by accepted cheap evaluations')
+metrics.counter('ai_cascade_latency_added_seconds_total', 'Cheap-model time spent on evaluations that were escalated')
+metrics.gauge('ai_provider_in_flight', 'AI provider calls currently in progress')
+metrics.gauge('evaluation_queue_depth', 'Evaluations waiting in the background queue')
+metrics.gauge('sse_subscribers', 'Open server-sent event streams')
+metrics.counter('sse_events_total', 'Server-sent events published by type')
+metrics.counter('sse_refreshes_total', 'Refresh events sent instead of individual changes, by reason')
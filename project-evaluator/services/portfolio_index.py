@@ -0,0 +1,326 @@
+"""
+In-memory column store of the latest criterion scores of every project
+Used by what-if simulations: re-ranking the whole portfolio under other
+weights is a pass over six float arrays, with no database or AI call.
+The index is loaded once per worker, updated in place when this worker
+commits evaluations, and reloaded after PORTFOLIO_INDEX_TTL seconds to pick
+up writes made by other workers.
+"""
+import logging
+import threading
+import time
+from array import array
+from typing import Dict, Any, List, Optional
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from .scoring import CRITERIA, priority_for_score
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioIndex:
+    """Column arrays (one per criterion) for the latest evaluation of each project"""
+
+    def __init__(self):
+        """Initialize an empty index"""
+        self.db = None
+        self.ttl = 60.0
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._reset()
+
+    def init_app(self, app, db):
+        """
+        Bind the index to an application and keep it current on commits
+
+        Args:
+            app: Flask application
+            db: Flask-SQLAlchemy instance
+        """
+        app.config.setdefault('PORTFOLIO_INDEX_TTL', 60.0)
+        with self._lock:
+            self.db = db
+            self.ttl = float(app.config['PORTFOLIO_INDEX_TTL'])
+            self.invalidate()
+
+        if not event.contains(Session, 'after_flush', self._after_flush):
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def invalidate(self):
+        """Drop the index; it is reloaded on next use"""
+        with self._lock:
+            self._reset()
+            self._loaded_at = None
+
+    def _reset(self):
+        self.project_ids = array('q')
+        self.evaluation_ids = array('q')
+        self.columns = {criterion: array('d') for criterion in CRITERIA}
+        self.titles: List[str] = []
+        self.pvps: List[str] = []
+        self.durations: List[Optional[int]] = []
+        self._rows: Dict[int, int] = {}
+
+    def __len__(self):
+        return len(self.project_ids)
+
+    # Loading
+
+    def ensure_loaded(self):
+        """Load the index if it is empty or older than the TTL"""
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+                self.load()
+
+    def load(self):
+        """Load the latest evaluation of every project in one query"""
+        from models import Project, Evaluation
+
+        start = time.perf_counter()
+        latest_ids = (
+            self.db.session.query(func.max(Evaluation.id))
+            .group_by(Evaluation.project_id)
+            .scalar_subquery()
+        )
+        rows = (
+            self.db.session.query(Evaluation.project_id, Evaluation.id, Project.titre, Project.pvp,
+                                  Project.duree_estimee,
+                                  *[getattr(Evaluation, criterion) for criterion in CRITERIA])
+            .join(Project, Project.id == Evaluation.project_id)
+            .filter(Evaluation.id.in_(latest_ids))
+            .all()
+        )
+
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._append(row[0], row[1], row[2], row[3], row[4], row[5:])
+            self._loaded_at = time.monotonic()
+
+        logger.info(f"Portfolio index loaded: {len(rows)} projects in "
+                    f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def _append(self, project_id, evaluation_id, titre, pvp, duree, scores):
+        self._rows[project_id] = len(self.project_ids)
+        self.project_ids.append(project_id)
+        self.evaluation_ids.append(evaluation_id)
+        for criterion, score in zip(CRITERIA, scores):
+            self.columns[criterion].append(float(score))
+        self.titles.append(titre)
+        self.pvps.append(pvp)
+        self.durations.append(duree)
+
+    # Incremental updates
+
+    def upsert(self, project_id: int, evaluation_id: int, scores: List[float]):
+        """
+        Set the latest criterion scores of a project
+
+        Args:
+            project_id: Project ID
+            evaluation_id: ID of its newest evaluation
+            scores: Criterion scores, in CRITERIA order
+        """
+        with self._lock:
+            row = self._rows.get(project_id)
+            if row is None:
+                self._append(project_id, evaluation_id, None, None, None, scores)
+                return
+            if evaluation_id < self.evaluation_ids[row]:
+                return
+            self.evaluation_ids[row] = evaluation_id
+            for criterion, score in zip(CRITERIA, scores):
+                self.columns[criterion][row] = float(score)
+
+    def update_project(self, project_id: int, titre: str, pvp: str, duree: Optional[int]):
+        """Refresh the descriptive fields of a project"""
+        with self._lock:
+            row = self._rows.get(project_id)
+            if row is not None:
+                self.titles[row] = titre
+                self.pvps[row] = pvp
+                self.durations[row] = duree
+
+    def remove(self, project_id: int):
+        """Remove a project (the last row is moved into its slot)"""
+        with self._lock:
+            row = self._rows.pop(project_id, None)
+            if row is None:
+                return
+            last = len(self.project_ids) - 1
+            if row != last:
+                moved_id = self.project_ids[last]
+                self.project_ids[row] = moved_id
+                self.evaluation_ids[row] = self.evaluation_ids[last]
+                for column in self.columns.values():
+                    column[row] = column[last]
+                self.titles[row] = self.titles[last]
+                self.pvps[row] = self.pvps[last]
+                self.durations[row] = self.durations[last]
+                self._rows[moved_id] = row
+            self.project_ids.pop()
+            self.evaluation_ids.pop()
+            for column in self.columns.values():
+                column.pop()
+            self.titles.pop()
+            self.pvps.pop()
+            self.durations.pop()
+
+    # Scoring
+
+    def scores(self, weights: Dict[str, float]) -> List[float]:
+        """
+        Weighted final score of every row
+
+        Args:
+            weights: Evaluation criteria weights
+
+        Returns:
+            Scores in row order
+        """
+        with self._lock:
+            if np is not None:
+                total = np.zeros(len(self.project_ids))
+                for criterion in CRITERIA:
+                    total += np.frombuffer(self.columns[criterion], dtype=np.float64) * weights[criterion]
+                return np.round(total, 2).tolist()
+
+            columns = [self.columns[criterion] for criterion in CRITERIA]
+            factors = [weights[criterion] for criterion in CRITERIA]
+            return [
+                round(sum(column[i] * factor for column, factor in zip(columns, factors)), 2)
+                for i in range(len(self.project_ids))
+            ]
+
+    def snapshot(self, weights: Dict[str, float]) -> Dict[str, list]:
+        """
+        Consistent copy of the index with the final score of every row
+
+        Args:
+            weights: Evaluation criteria weights
+
+        Returns:
+            Dictionary of row-aligned lists: project_ids, titles, pvps, durations, scores
+        """
+        self.ensure_loaded()
+        with self._lock:
+            return {
+                'project_ids': list(self.project_ids),
+                'titles': list(self.titles),
+                'pvps': list(self.pvps),
+                'durations': list(self.durations),
+                'scores': self.scores(weights)
+            }
+
+    def simulate(self, weights: Dict[str, float], thresholds: Dict[str, float],
+                 base_weights: Dict[str, float], base_thresholds: Dict[str, float],
+                 limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Re-rank the portfolio under alternative weights and thresholds
+
+        Args:
+            weights: Simulated weights
+            thresholds: Simulated priority thresholds
+            base_weights: Current weights
+            base_thresholds: Current priority thresholds
+            limit: Maximum number of ranked projects returned
+
+        Returns:
+            Dictionary with the re-ranked projects and a summary of the changes
+        """
+        with self._lock:
+            rows = self.snapshot(base_weights)
+            new_scores = self.scores(weights)
+        base_scores, ids = rows['scores'], rows['project_ids']
+        titles, pvps = rows['titles'], rows['pvps']
+
+        base_order = sorted(range(len(ids)), key=lambda i: (-base_scores[i], ids[i]))
+        new_order = sorted(range(len(ids)), key=lambda i: (-new_scores[i], ids[i]))
+        base_rank = {row: rank for rank, row in enumerate(base_order, 1)}
+
+        projects = []
+        priority_changes = {}
+        moved = 0
+        for rank, row in enumerate(new_order, 1):
+            before = priority_for_score(base_scores[row], base_thresholds)
+            after = priority_for_score(new_scores[row], thresholds)
+            if before != after:
+                key = f'{before}->{after}'
+                priority_changes[key] = priority_changes.get(key, 0) + 1
+            delta = base_rank[row] - rank
+            if delta:
+                moved += 1
+            if limit is None or rank <= limit:
+                projects.append({
+                    'project_id': ids[row],
+                    'titre': titles[row],
+                    'pvp': pvps[row],
+                    'score_final': base_scores[row],
+                    'simulated_score': new_scores[row],
+                    'rank': base_rank[row],
+                    'simulated_rank': rank,
+                    'rank_delta': delta,
+                    'priority': before,
+                    'simulated_priority': after,
+                    'priority_changed': before != after
+                })
+
+        return {
+            'total_projects': len(ids),
+            'projects_moved': moved,
+            'priority_changes': priority_changes,
+            'projects': projects
+        }
+
+
+    # Session events
+
+    def _after_flush(self, session, flush_context):
+        """Collect the changes of this flush; they are applied once committed"""
+        from models import Project, Evaluation
+
+        if self._loaded_at is None:
+            return
+        pending = session.info.setdefault('portfolio_changes', [])
+        projects = {}
+        for obj in session.new:
+            if isinstance(obj, Evaluation):
+                pending.append(('evaluation', obj.project_id, obj.id,
+                                [getattr(obj, criterion) for criterion in CRITERIA]))
+                project = session.get(Project, obj.project_id)
+                if project is not None:
+                    projects[project.id] = project
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, Project):
+                projects[obj.id] = obj
+        for project in projects.values():
+            pending.append(('project', project.id, project.titre, project.pvp, project.duree_estimee))
+        for obj in session.deleted:
+            if isinstance(obj, Project):
+                pending.append(('delete', obj.id))
+
+    def _after_commit(self, session):
+        changes = session.info.pop('portfolio_changes', None)
+        if not changes or self._loaded_at is None:
+            return
+        with self._lock:
+            for kind, *values in changes:
+                if kind == 'evaluation':
+                    self.upsert(*values)
+                elif kind == 'project':
+                    self.update_project(*values)
+                else:
+                    self.remove(*values)
+
+    def _after_rollback(self, session):
+        session.info.pop('portfolio_changes', None)
+
+
+portfolio_index = PortfolioIndex()
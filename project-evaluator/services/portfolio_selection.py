@@ -0,0 +1,149 @@
+"""
+Budget-constrained portfolio selection
+Chooses which projects to fund so that the total score_final is maximal while
+the estimated person-days (duree_estimee) of each department (pvp) stay within
+its capacity. Departments are independent, so the problem splits into one 0/1
+knapsack per department, solved by dynamic programming over capacity units.
+"""
+import logging
+import math
+import time
+from typing import Dict, Any, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on DP columns per department; larger capacities are solved in
+# coarser units (durations rounded up, so selections always fit)
+MAX_CAPACITY_UNITS = 2000
+
+
+def _knapsack(values: List[float], weights: List[int], capacity: int) -> List[int]:
+    """
+    Solve a 0/1 knapsack exactly
+
+    Args:
+        values: Item values
+        weights: Item weights in capacity units
+        capacity: Capacity in capacity units
+
+    Returns:
+        Indexes of the chosen items
+    """
+    n = len(values)
+    if n == 0 or capacity <= 0:
+        return []
+
+    if np is not None:
+        best = np.zeros(capacity + 1)
+        taken = np.zeros((n, capacity + 1), dtype=bool)
+        for i in range(n):
+            w = weights[i]
+            if w > capacity:
+                continue
+            candidate = best[:capacity + 1 - w] + values[i]
+            improved = candidate > best[w:]
+            taken[i, w:] = improved
+            best[w:] = np.where(improved, candidate, best[w:])
+        keep = lambda i, c: taken[i, c]
+    else:
+        best = [0.0] * (capacity + 1)
+        taken = []
+        for i in range(n):
+            w, v = weights[i], values[i]
+            row = bytearray(capacity + 1)
+            # Descending capacity so each item is used at most once
+            for c in range(capacity, w - 1, -1):
+                candidate = best[c - w] + v
+                if candidate > best[c]:
+                    best[c] = candidate
+                    row[c] = 1
+            taken.append(row)
+        keep = lambda i, c: taken[i][c]
+
+    chosen = []
+    c = capacity
+    for i in range(n - 1, -1, -1):
+        if keep(i, c):
+            chosen.append(i)
+            c -= weights[i]
+    return chosen[::-1]
+
+
+def _greedy(values: List[float], durations: List[int], capacity: int) -> List[int]:
+    """Take items by descending value, skipping those that no longer fit"""
+    chosen = []
+    remaining = capacity
+    for i in sorted(range(len(values)), key=lambda i: -values[i]):
+        if durations[i] <= remaining:
+            chosen.append(i)
+            remaining -= durations[i]
+    return chosen
+
+
+def select_portfolio(rows: Dict[str, list], capacities: Dict[str, int],
+                     default_capacity: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Choose the projects to fund under per-department capacities
+
+    Args:
+        rows: Row-aligned lists from PortfolioIndex.snapshot
+        capacities: Person-days available per department
+        default_capacity: Capacity of departments absent from capacities
+            (those departments are skipped when None)
+
+    Returns:
+        Dictionary with the optimal and greedy selections per department and overall
+    """
+    start = time.perf_counter()
+    candidates: Dict[str, List[int]] = {}
+    unestimated = []
+    for row, pvp in enumerate(rows['pvps']):
+        if rows['durations'][row] is None:
+            unestimated.append(rows['project_ids'][row])
+            continue
+        candidates.setdefault(pvp, []).append(row)
+
+    departments = []
+    totals = {'optimal_score': 0.0, 'greedy_score': 0.0, 'optimal_count': 0, 'greedy_count': 0}
+    for pvp in sorted(set(candidates) | set(capacities)):
+        capacity = capacities.get(pvp, default_capacity)
+        if capacity is None:
+            continue
+        members = candidates.get(pvp, [])
+        values = [rows['scores'][row] for row in members]
+        durations = [max(int(rows['durations'][row]), 0) for row in members]
+
+        unit = max(1, math.ceil(capacity / MAX_CAPACITY_UNITS))
+        optimal = _knapsack(values, [math.ceil(d / unit) for d in durations], capacity // unit)
+        greedy = _greedy(values, durations, capacity)
+
+        department = {'pvp': pvp, 'capacity': capacity, 'candidates': len(members), 'unit_days': unit}
+        for name, chosen in (('optimal', optimal), ('greedy', greedy)):
+            score = round(sum(values[i] for i in chosen), 2)
+            department[name] = {
+                'project_ids': [rows['project_ids'][members[i]] for i in chosen],
+                'score': score,
+                'days': sum(durations[i] for i in chosen)
+            }
+            totals[f'{name}_score'] += score
+            totals[f'{name}_count'] += len(chosen)
+        department['gain'] = round(department['optimal']['score'] - department['greedy']['score'], 2)
+        departments.append(department)
+
+    duration_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Portfolio selection over {len(rows['project_ids'])} projects in {duration_ms:.1f} ms")
+    return {
+        'departments': departments,
+        'optimal_score': round(totals['optimal_score'], 2),
+        'optimal_count': totals['optimal_count'],
+        'greedy_score': round(totals['greedy_score'], 2),
+        'greedy_count': totals['greedy_count'],
+        'gain': round(totals['optimal_score'] - totals['greedy_score'], 2),
+        'unestimated_project_ids': unestimated,
+        'elapsed_ms': round(duration_ms, 2)
+    }
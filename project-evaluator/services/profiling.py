@@ -0,0 +1,210 @@
+"""
+On-demand sampling profiler for live requests
+A request is profiled when an admin sends the X-Profile: 1 header, or when
+it is picked by the per-endpoint sample rate set through /admin/profiling.
+Sample rates are kept in the shared runtime settings file.
+Profiles are written in the folded stack format used by flamegraph.pl and
+speedscope, one file per request under PROFILE_OUTPUT_DIR/<endpoint>/
+"""
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from flask import g, request
+from .admin_auth import is_admin_request
+from .runtime_settings import runtime_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """Samples the call stack of one thread at a fixed interval"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        """
+        Initialize the profiler
+
+        Args:
+            thread_id: Identifier of the thread to sample
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.started_at = None
+        self.duration = 0.0
+
+    def start(self):
+        """Start sampling in a background thread"""
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Return samples in the folded stack format"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their profiles"""
+
+    def __init__(self):
+        self.output_dir = None
+        self.interval = 0.005
+
+    def init_app(self, app):
+        """
+        Register request hooks on a Flask application
+
+        Args:
+            app: Flask application
+        """
+        app.config.setdefault('PROFILING_ENABLED', True)
+        app.config.setdefault('PROFILE_INTERVAL', 0.005)
+        if not app.config.get('PROFILE_OUTPUT_DIR'):
+            app.config['PROFILE_OUTPUT_DIR'] = os.path.join(app.instance_path, 'profiles')
+
+        self.output_dir = app.config['PROFILE_OUTPUT_DIR']
+        self.interval = app.config['PROFILE_INTERVAL']
+
+        if not app.config['PROFILING_ENABLED']:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    def get_sample_rates(self) -> Dict[str, float]:
+        """
+        Get the per-endpoint sample rates ('*' applies to every endpoint)
+
+        Returns:
+            Mapping of endpoint name to sample rate between 0 and 1
+        """
+        return dict(runtime_settings.get('profiling_sample_rates', {}))
+
+    def set_sample_rate(self, endpoint: str, rate: float):
+        """
+        Set the sample rate for an endpoint (0 disables profiling)
+
+        Args:
+            endpoint: Flask endpoint name, or '*' for every endpoint
+            rate: Fraction of requests to profile
+        """
+        rates = self.get_sample_rates()
+        if rate <= 0:
+            rates.pop(endpoint, None)
+        else:
+            rates[endpoint] = min(rate, 1.0)
+        runtime_settings.set('profiling_sample_rates', rates)
+
+    def list_profiles(self, endpoint: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        List stored profiles, newest first
+
+        Args:
+            endpoint: Optional endpoint filter
+            limit: Maximum number of profiles
+
+        Returns:
+            List of profile descriptions
+        """
+        profiles = []
+        if not self.output_dir or not os.path.isdir(self.output_dir):
+            return profiles
+
+        endpoints = [endpoint] if endpoint else os.listdir(self.output_dir)
+        for name in endpoints:
+            directory = os.path.join(self.output_dir, name)
+            if not os.path.isdir(directory):
+                continue
+            for filename in os.listdir(directory):
+                if filename.endswith('.folded'):
+                    path = os.path.join(directory, filename)
+                    profiles.append({
+                        'endpoint': name,
+                        'filename': filename,
+                        'size': os.path.getsize(path),
+                        'modified': os.path.getmtime(path)
+                    })
+
+        profiles.sort(key=lambda p: p['modified'], reverse=True)
+        return profiles[:limit]
+
+    def profile_path(self, endpoint: str, filename: str) -> Optional[str]:
+        """Resolve a stored profile path, refusing anything outside the output directory"""
+        path = os.path.realpath(os.path.join(self.output_dir, endpoint, filename))
+        if not path.startswith(os.path.realpath(self.output_dir) + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    # Request hooks
+
+    def _should_profile(self) -> bool:
+        if request.headers.get('X-Profile') == '1' and is_admin_request():
+            return True
+        rates = self.get_sample_rates()
+        rate = rates.get(request.endpoint, rates.get('*', 0.0))
+        return rate > 0 and random.random() < rate
+
+    def _start_request(self):
+        if request.endpoint == 'static' or not self._should_profile():
+            return
+        profiler = SamplingProfiler(threading.get_ident(), self.interval)
+        profiler.start()
+        g.request_profiler = profiler
+
+    def _finish_request(self, response):
+        profiler = g.get('request_profiler')
+        if profiler is not None and is_admin_request():
+            response.headers['X-Profile-Endpoint'] = request.endpoint or 'unknown'
+        return response
+
+    def _teardown_request(self, error=None):
+        profiler = g.pop('request_profiler', None)
+        if profiler is None:
+            return
+        profiler.stop()
+
+        endpoint = request.endpoint or 'unknown'
+        directory = os.path.join(self.output_dir, endpoint)
+        filename = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{os.getpid()}.folded"
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, filename), 'w', encoding='utf-8') as f:
+                f.write(profiler.folded())
+            logger.info(f"Profiled {endpoint}: {profiler.samples} samples in "
+                        f"{profiler.duration:.3f}s -> {filename}")
+        except OSError as e:
+            logger.error(f"Error writing profile for {endpoint}: {e}")
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,290 @@
+"""
+Server-side filtering, sorting and sparse serialization of the project list
+The latest score of each project comes from the leaderboard table, so score,
+priority and ranking filters use its indexes instead of loading evaluations,
+and listings that only ask for a few fields never load the long texts.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from flask import current_app
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import load_only, selectinload, undefer, undefer_group
+from models import db, Project, Evaluation, LeaderboardEntry
+from .scoring import PRIORITY_TEXTS, PRIORITY_ACTIONS, priority_for_score
+
+PRIORITIES = ('élevée', 'moyenne', 'faible', 'non-évalué')
+
+# Fields selectable with ?fields=, by where they are read from
+PROJECT_FIELDS = ('id', 'titre', 'pvp', 'contexte', 'objectifs', 'fonctionnalites',
+                  'defis_techniques', 'duree_estimee', 'created_at')
+RANKING_FIELDS = ('score_final', 'rank', 'priority', 'priority_text', 'action_text')
+INCLUDES = ('evaluation',)
+
+# Fields rendered by the dashboard rows
+LISTING_FIELDS = ('id', 'titre', 'pvp', 'score_final', 'priority', 'priority_text', 'action_text', 'created_at')
+
+MAX_IDS = 500
+
+SORTS = {
+    '-score': (LeaderboardEntry.rank.is_(None), LeaderboardEntry.rank, Project.created_at),
+    'score': (LeaderboardEntry.rank.is_(None), LeaderboardEntry.rank.desc(), Project.created_at),
+    '-created_at': (Project.created_at.desc(), Project.id.desc()),
+    'created_at': (Project.created_at, Project.id),
+    'updated_at': (Project.updated_at, Project.id),
+    'titre': (Project.titre, Project.id),
+    '-titre': (Project.titre.desc(), Project.id.desc())
+}
+
+
+def _parse_date(value: str, name: str, end: bool = False) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Le paramètre {name} doit être une date (AAAA-MM-JJ)')
+    # A bare date includes the whole day when used as an upper bound
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def parse_project_filters(args) -> Dict[str, Any]:
+    """
+    Validate the filter and sort parameters of a project listing
+
+    Args:
+        args: Request query parameters
+
+    Returns:
+        Filters accepted by filter_projects
+
+    Raises:
+        ValueError: With a message for the client when a parameter is invalid
+    """
+    filters: Dict[str, Any] = {'sort': args.get('sort', '-score')}
+    if filters['sort'] not in SORTS:
+        raise ValueError(f'Le paramètre sort doit être parmi {", ".join(SORTS)}')
+
+    if args.get('pvp'):
+        filters['pvp'] = [pvp for pvp in args.get('pvp').split(',') if pvp]
+    if args.get('priority'):
+        filters['priority'] = args.get('priority').split(',')
+        unknown = [priority for priority in filters['priority'] if priority not in PRIORITIES]
+        if unknown:
+            raise ValueError(f'Le paramètre priority doit être parmi {", ".join(PRIORITIES)}')
+
+    for name in ('min_score', 'max_score'):
+        if args.get(name):
+            try:
+                filters[name] = float(args.get(name))
+            except ValueError:
+                raise ValueError(f'Le paramètre {name} doit être numérique')
+
+    if args.get('created_after'):
+        filters['created_after'] = _parse_date(args.get('created_after'), 'created_after')
+    if args.get('created_before'):
+        filters['created_before'] = _parse_date(args.get('created_before'), 'created_before', end=True)
+
+    if args.get('ids'):
+        try:
+            filters['ids'] = [int(project_id) for project_id in args.get('ids').split(',') if project_id]
+        except ValueError:
+            raise ValueError('Le paramètre ids doit être une liste d\'entiers séparés par des virgules')
+        if len(filters['ids']) > MAX_IDS:
+            raise ValueError(f'Le paramètre ids est limité à {MAX_IDS} projets')
+
+    for name in ('limit', 'offset'):
+        if args.get(name):
+            try:
+                filters[name] = max(int(args.get(name)), 0)
+            except ValueError:
+                raise ValueError(f'Le paramètre {name} doit être un entier')
+    return filters
+
+
+def _priority_condition(priority: str, thresholds: Dict[str, float]):
+    """Translate a priority level into a score range on the indexed leaderboard column"""
+    score = LeaderboardEntry.score_final
+    if priority == 'élevée':
+        return score >= thresholds['high']
+    if priority == 'moyenne':
+        return and_(score >= thresholds['medium'], score < thresholds['high'])
+    if priority == 'faible':
+        return score < thresholds['medium']
+    return LeaderboardEntry.project_id.is_(None)
+
+
+def filter_projects(filters: Dict[str, Any], query=None):
+    """
+    Build the filtered and sorted project query
+
+    Args:
+        filters: Filters returned by parse_project_filters
+        query: Base query selecting Project (defaults to every project)
+
+    Returns:
+        Query joined to the leaderboard, without limit or offset
+    """
+    query = query if query is not None else db.session.query(Project)
+    query = query.outerjoin(LeaderboardEntry, LeaderboardEntry.project_id == Project.id)
+
+    if 'ids' in filters:
+        query = query.filter(Project.id.in_(filters['ids']))
+    if 'changed_since' in filters:
+        since = filters['changed_since']
+        query = query.filter(or_(Project.updated_at >= since, Project.created_at >= since))
+    if filters.get('pvp'):
+        query = query.filter(Project.pvp.in_(filters['pvp']))
+    if filters.get('priority'):
+        thresholds = current_app.config['PRIORITY_THRESHOLDS']
+        query = query.filter(or_(*[_priority_condition(p, thresholds) for p in filters['priority']]))
+    if 'min_score' in filters:
+        query = query.filter(LeaderboardEntry.score_final >= filters['min_score'])
+    if 'max_score' in filters:
+        query = query.filter(LeaderboardEntry.score_final <= filters['max_score'])
+    if 'created_after' in filters:
+        query = query.filter(Project.created_at >= filters['created_after'])
+    if 'created_before' in filters:
+        query = query.filter(Project.created_at < filters['created_before'])
+
+    return query.order_by(*SORTS[filters.get('sort', '-score')])
+
+
+def paginate(query, filters: Dict[str, Any], default_limit: Optional[int] = None):
+    """
+    Apply limit and offset to a filtered query
+
+    Args:
+        query: Query returned by filter_projects
+        filters: Filters returned by parse_project_filters
+        default_limit: Limit used when the request has none (None for no limit)
+
+    Returns:
+        Tuple of (projects, total matching projects)
+    """
+    # Count over the IDs only: the projects subquery would otherwise name every column, texts included
+    total = query.order_by(None).with_entities(Project.id).count()
+    limit = filters.get('limit', default_limit)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.offset(filters.get('offset', 0)).all(), total
+
+
+def priority_counts() -> Dict[str, int]:
+    """Number of projects per priority level, in one aggregate query"""
+    thresholds = current_app.config['PRIORITY_THRESHOLDS']
+    row = (
+        db.session.query(*[func.count(case((_priority_condition(priority, thresholds), 1)))
+                           for priority in PRIORITIES])
+        .select_from(Project)
+        .outerjoin(LeaderboardEntry, LeaderboardEntry.project_id == Project.id)
+        .one()
+    )
+    return dict(zip(PRIORITIES, row))
+
+
+def parse_fieldset(args) -> Dict[str, Any]:
+    """
+    Validate the ?fields= and ?include= parameters
+
+    Args:
+        args: Request query parameters
+
+    Returns:
+        Dictionary with 'fields' (None for the full representation) and 'include'
+
+    Raises:
+        ValueError: With a message for the client when a parameter is invalid
+    """
+    fields = None
+    if args.get('fields'):
+        fields = [field for field in args.get('fields').split(',') if field]
+        unknown = [field for field in fields if field not in PROJECT_FIELDS + RANKING_FIELDS]
+        if unknown:
+            raise ValueError(f'Champs inconnus: {", ".join(unknown)} '
+                             f'(disponibles: {", ".join(PROJECT_FIELDS + RANKING_FIELDS)})')
+
+    include = [name for name in args.get('include', '').split(',') if name]
+    unknown = [name for name in include if name not in INCLUDES]
+    if unknown:
+        raise ValueError(f'Le paramètre include doit être parmi {", ".join(INCLUDES)}')
+    return {'fields': fields, 'include': include}
+
+
+def sparse_query(query, fieldset: Dict[str, Any]):
+    """
+    Restrict a filtered project query to the requested columns
+
+    Args:
+        query: Query returned by filter_projects (based on Project)
+        fieldset: Fieldset returned by parse_fieldset
+
+    Returns:
+        Query returning (project, score_final, rank, evaluation_id) rows
+    """
+    columns = [getattr(Project, field) for field in fieldset['fields'] if field in PROJECT_FIELDS]
+    return query.options(load_only(Project.id, *columns)).add_columns(
+        LeaderboardEntry.score_final, LeaderboardEntry.rank, LeaderboardEntry.evaluation_id
+    )
+
+
+def serialize_projects(rows, fieldset: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Serialize projects with only the requested fields
+
+    Args:
+        rows: Projects (full representation) or rows from sparse_query
+        fieldset: Fieldset returned by parse_fieldset
+
+    Returns:
+        List of project dictionaries
+    """
+    if fieldset['fields'] is None:
+        return [project.to_dict() for project in rows]
+
+    evaluations = {}
+    if 'evaluation' in fieldset['include']:
+        evaluation_ids = [row.evaluation_id for row in rows if row.evaluation_id is not None]
+        if evaluation_ids:
+            evaluations = {e.id: e.to_dict() for e in Evaluation.query.options(undefer(Evaluation.ai_suggestions))
+                           .filter(Evaluation.id.in_(evaluation_ids))}
+
+    thresholds = current_app.config['PRIORITY_THRESHOLDS']
+    projects = []
+    for project, score_final, rank, evaluation_id in rows:
+        priority = priority_for_score(score_final, thresholds) if score_final is not None else 'non-évalué'
+        values = {
+            'score_final': score_final,
+            'rank': rank,
+            'priority': priority,
+            'priority_text': PRIORITY_TEXTS[priority],
+            'action_text': PRIORITY_ACTIONS[priority]
+        }
+        item = {}
+        for field in fieldset['fields']:
+            if field in PROJECT_FIELDS:
+                value = getattr(project, field)
+                item[field] = value.isoformat() if field == 'created_at' and value else value
+            else:
+                item[field] = values[field]
+        if 'evaluation' in fieldset['include']:
+            item['evaluation'] = evaluations.get(evaluation_id)
+        projects.append(item)
+    return projects
+
+
+def project_listing_query(filters: Dict[str, Any], fieldset: Dict[str, Any]):
+    """
+    Build the listing query loading only what the fieldset serializes
+
+    Args:
+        filters: Filters returned by parse_project_filters
+        fieldset: Fieldset returned by parse_fieldset
+
+    Returns:
+        Query for paginate(), whose rows serialize_projects() accepts
+    """
+    if fieldset['fields'] is None:
+        return filter_projects(filters, Project.query.options(
+            undefer_group('texts'), selectinload(Project.evaluations).undefer(Evaluation.ai_suggestions)
+        ))
+    return sparse_query(filter_projects(filters), fieldset)
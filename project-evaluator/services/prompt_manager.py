@@ -6,6 +6,7 @@ import os
 import logging
 from typing import Dict, Any, Optional, List
 from pathlib import Path
+from .metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +46,9 @@ class PromptManager:
         
         # Check cache first
         if cache_key in self._cache:
+            metrics.inc('ai_cache_hits_total', cache='prompt_template')
             return self._cache[cache_key]
+        metrics.inc('ai_cache_misses_total', cache='prompt_template')
         
         # Build file path
         prompt_file = self.prompts_dir / provider / model / f"{prompt_type}.yaml"
@@ -183,7 +186,7 @@ class PromptManager:
         Get a fallback template when no specific template is found
         
         Args:
-            prompt_type: Type of prompt ('evaluation' or 'improvement')
+            prompt_type: Type of prompt ('evaluation', 'partial_evaluation', 'improvement' or 'batch_improvement')
             
         Returns:
             Basic fallback template
@@ -252,6 +255,87 @@ Assurez-vous que :
                     'max_tokens': 2000
                 }
             }
+        elif prompt_type == 'partial_evaluation':
+            return {
+                'metadata': {
+                    'provider': 'fallback',
+                    'model': 'fallback',
+                    'prompt_type': 'partial_evaluation',
+                    'version': '1.0',
+                    'language': 'fr-CA'
+                },
+                'system_message': "Vous êtes un expert en évaluation de projets d'investissement technologique. Un projet déjà évalué a été modifié : vous réévaluez uniquement les critères touchés par la modification, en français québécois formel. Répondez uniquement en JSON valide.",
+                'user_prompt_template': '''Le projet suivant a été modifié. Réévaluez uniquement les critères listés (score de 1 à 10).
+
+PROJET :
+Titre : {titre}
+Département PVP : {pvp}
+
+CHAMPS MODIFIÉS (nouvelle version) :
+{changed_fields}
+
+CRITÈRES À RÉÉVALUER :
+{criteria}
+
+Scores avant la modification : {previous_scores}
+
+Répondez en JSON avec cette structure exacte, une entrée par critère ({criteria_keys}) :
+{{
+  "scores": {{
+    "nom_du_critere": 7.5
+  }},
+  "suggestions": {{
+    "nom_du_critere": "Suggestion d'amélioration..."
+  }},
+  "defis_techniques": ["Défi technique 1", "Défi technique 2", "Défi technique 3"],
+  "duree_estimee": 180
+}}
+
+Assurez-vous que :
+- Tous les scores sont entre 1.0 et 10.0
+- Les scores ne changent que si la modification le justifie
+- "defis_techniques" et "duree_estimee" (jours ouvrables) ne sont inclus que si les fonctionnalités ont été modifiées
+- Tout le texte est en français québécois formel''',
+                'parameters': {
+                    'temperature': 0.3,
+                    'max_tokens': 1200
+                }
+            }
+        elif prompt_type == 'batch_improvement':
+            return {
+                'metadata': {
+                    'provider': 'fallback',
+                    'model': 'fallback',
+                    'prompt_type': 'batch_improvement',
+                    'version': '1.0',
+                    'language': 'fr-CA'
+                },
+                'system_message': "Vous êtes un consultant expert en rédaction de projets d'investissement. Améliorez le contenu fourni en français québécois formel et professionnel. Répondez uniquement en JSON valide.",
+                'user_prompt_template': '''Analysez et améliorez les champs suivants d'un même projet d'investissement :
+
+Contexte du projet : {project_context}
+
+CHAMPS À AMÉLIORER :
+{fields}
+
+Pour chaque champ, fournissez une version améliorée qui soit :
+- Plus claire et précise
+- Mieux structurée
+- Plus convaincante pour les investisseurs
+- Conforme aux meilleures pratiques
+- Cohérente avec les autres champs du projet
+
+Répondez en JSON avec cette structure exacte, une clé par champ ({field_names}) :
+{{
+  "ameliorations": {{
+    "nom_du_champ": "Texte amélioré..."
+  }}
+}}''',
+                'parameters': {
+                    'temperature': 0.7,
+                    'max_tokens': 2400
+                }
+            }
         else:  # improvement
             return {
                 'metadata': {
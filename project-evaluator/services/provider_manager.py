@@ -2,8 +2,12 @@
 Provider manager for handling provider selection and fallback logic
 """
 import logging
+import time
 from typing import Dict, Any, List, Optional, Type
 from .providers import AIProvider, OpenAIProvider
+from .tracing import tracer
+from .metrics import metrics
+from .routing_policy import routing_policy
 
 # Import other providers conditionally
 try:
@@ -131,49 +135,120 @@ class ProviderManager:
         Returns:
             Evaluation result
         """
-        # Determine provider order
-        providers_to_try = []
+        model = prompt_template.get('metadata', {}).get('model')
+        providers_to_try = self._get_providers_to_try(preferred_provider, model, 'evaluation')
         
-        # Try preferred provider first if specified
-        if preferred_provider and preferred_provider in self._providers:
-            providers_to_try.append(self._providers[preferred_provider])
-        
-        # Add primary provider if not already added
-        primary = self.get_primary_provider()
-        if primary and primary not in providers_to_try:
-            providers_to_try.append(primary)
+        # Try each provider in order
+        for attempt, provider in enumerate(providers_to_try):
+            result = self._attempt_evaluation(provider, project_data, prompt_template, model, attempt)
+            if result is not None:
+                return result
         
-        # Add fallback providers
-        exclude = preferred_provider if preferred_provider in self._providers else None
-        if not exclude and primary:
-            exclude = primary.name
+        # If all providers failed, return fallback
+        logger.error("All providers failed for evaluation")
+        return self._get_ultimate_fallback()
+    
+    def evaluate_with_provider(self, provider_name: str, project_data: Dict[str, Any],
+                               prompt_template: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Evaluate a project with a single provider, without fallback
         
-        fallbacks = self.get_fallback_providers(exclude)
-        providers_to_try.extend(fallbacks)
+        Args:
+            provider_name: Provider name
+            project_data: Project data to evaluate
+            prompt_template: Prompt template to use
+            
+        Returns:
+            Evaluation result, or None if the provider is unavailable or did not
+            return a valid evaluation
+        """
+        provider = self._providers.get(provider_name)
+        if provider is None:
+            return None
+        model = prompt_template.get('metadata', {}).get('model')
+        return self._attempt_evaluation(provider, project_data, prompt_template, model)
+    
+    def _attempt_evaluation(self, provider: AIProvider, project_data: Dict[str, Any],
+                            prompt_template: Dict[str, Any], model: Optional[str],
+                            attempt: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Run one evaluation attempt and record its outcome
         
-        # Try each provider in order
-        last_error = None
-        for provider in providers_to_try:
+        Returns:
+            Evaluation result, or None if the attempt failed or was not valid
+        """
+        with tracer.span('provider.attempt', provider=provider.name, model=model,
+                         retries=attempt, operation='evaluation') as span:
+            start = time.perf_counter()
             try:
                 logger.info(f"Attempting evaluation with provider: {provider.name}")
                 result = provider.evaluate_project(project_data, prompt_template)
                 
                 # Check if we got a valid result (not fallback)
-                if result.get('score_final', 0) != 5.0 or any(
-                    'Évaluation automatique non disponible' not in suggestion 
-                    for suggestion in result.get('suggestions', {}).values()
-                ):
+                valid = self.is_valid_evaluation(result)
+                self._annotate_attempt(span, provider, 'success' if valid else 'invalid',
+                                       'evaluation', attempt, time.perf_counter() - start)
+                if valid:
                     logger.info(f"Successful evaluation with provider: {provider.name}")
+                    result['metadata'] = {
+                        'provider': provider.name,
+                        'model': provider.last_call.get('model', model),
+                        'prompt_version': prompt_template.get('metadata', {}).get('version')
+                    }
                     return result
-                    
+                
             except Exception as e:
-                last_error = e
+                span.record_error(e)
+                self._annotate_attempt(span, provider, 'error', 'evaluation', attempt,
+                                       time.perf_counter() - start)
                 logger.warning(f"Provider {provider.name} failed: {e}")
-                continue
         
-        # If all providers failed, return fallback
-        logger.error(f"All providers failed. Last error: {last_error}")
-        return self._get_ultimate_fallback()
+        return None
+    
+    def evaluate_criteria_with_fallback(self, variables: Dict[str, Any], criteria: List[str],
+                                        prompt_template: Dict[str, Any],
+                                        preferred_provider: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Re-evaluate a subset of criteria with automatic fallback to other providers
+        
+        Args:
+            variables: Variables for the partial evaluation prompt
+            criteria: Criteria to score
+            prompt_template: Partial evaluation prompt template
+            preferred_provider: Preferred provider name (optional)
+            
+        Returns:
+            Partial evaluation result, or None if every provider failed
+        """
+        model = prompt_template.get('metadata', {}).get('model')
+        providers_to_try = self._get_providers_to_try(preferred_provider, model, 'partial_evaluation')
+        
+        # Try each provider in order
+        for attempt, provider in enumerate(providers_to_try):
+            with tracer.span('provider.attempt', provider=provider.name, model=model, retries=attempt,
+                             operation='partial_evaluation', criteria=','.join(criteria)) as span:
+                start = time.perf_counter()
+                try:
+                    logger.info(f"Attempting partial evaluation with provider: {provider.name}")
+                    result = provider.evaluate_criteria(variables, criteria, prompt_template)
+                    self._annotate_attempt(span, provider, 'success', 'partial_evaluation', attempt,
+                                           time.perf_counter() - start)
+                    result['metadata'] = {
+                        'provider': provider.name,
+                        'model': provider.last_call.get('model', model),
+                        'prompt_version': prompt_template.get('metadata', {}).get('version')
+                    }
+                    return result
+                    
+                except Exception as e:
+                    span.record_error(e)
+                    self._annotate_attempt(span, provider, 'error', 'partial_evaluation', attempt,
+                                           time.perf_counter() - start)
+                    logger.warning(f"Provider {provider.name} failed for partial evaluation: {e}")
+                    continue
+        
+        logger.error("All providers failed for partial evaluation")
+        return None
     
     def improve_field_with_fallback(self, field_name: str, field_content: str, 
                                   project_context: str, prompt_template: Dict[str, Any],
@@ -191,41 +266,174 @@ class ProviderManager:
         Returns:
             Improved field content
         """
-        # Determine provider order (same logic as evaluate_with_fallback)
+        model = prompt_template.get('metadata', {}).get('model')
+        providers_to_try = self._get_providers_to_try(preferred_provider, model, 'improvement')
+        
+        # Try each provider in order
+        for attempt, provider in enumerate(providers_to_try):
+            with tracer.span('provider.attempt', provider=provider.name, model=model,
+                             retries=attempt, operation='improvement', field=field_name) as span:
+                start = time.perf_counter()
+                try:
+                    logger.info(f"Attempting field improvement with provider: {provider.name}")
+                    result = provider.improve_field(field_name, field_content, project_context, prompt_template)
+                    
+                    # Check if content was actually improved (not just returned as-is)
+                    improved = result != field_content
+                    self._annotate_attempt(span, provider, 'success' if improved else 'invalid',
+                                           'improvement', attempt, time.perf_counter() - start)
+                    if improved:
+                        logger.info(f"Successful field improvement with provider: {provider.name}")
+                        return result
+                        
+                except Exception as e:
+                    span.record_error(e)
+                    self._annotate_attempt(span, provider, 'error', 'improvement', attempt,
+                                           time.perf_counter() - start)
+                    logger.warning(f"Provider {provider.name} failed for field improvement: {e}")
+                    continue
+        
+        # If all providers failed, return original content
+        logger.error("All providers failed for field improvement")
+        return field_content
+    
+    def improve_fields_with_fallback(self, fields: Dict[str, str], project_context: str,
+                                     prompt_template: Dict[str, Any],
+                                     preferred_provider: str = None) -> Dict[str, str]:
+        """
+        Improve several fields in one call per provider, with automatic fallback
+        
+        Args:
+            fields: Mapping of field name to current content
+            project_context: Project context
+            prompt_template: Batch improvement prompt template
+            preferred_provider: Preferred provider name (optional)
+            
+        Returns:
+            Mapping of field name to improved content
+        """
+        model = prompt_template.get('metadata', {}).get('model')
+        providers_to_try = self._get_providers_to_try(preferred_provider, model, 'batch_improvement')
+        
+        # Try each provider in order
+        for attempt, provider in enumerate(providers_to_try):
+            with tracer.span('provider.attempt', provider=provider.name, model=model,
+                             retries=attempt, operation='batch_improvement',
+                             fields=','.join(fields)) as span:
+                start = time.perf_counter()
+                try:
+                    logger.info(f"Attempting batch field improvement with provider: {provider.name}")
+                    result = provider.improve_fields(fields, project_context, prompt_template)
+                    
+                    # Accept the result if at least one field was improved
+                    improved = [name for name in fields if result.get(name) != fields[name]]
+                    span.set_attribute('improved_fields', len(improved))
+                    self._annotate_attempt(span, provider, 'success' if improved else 'invalid',
+                                           'batch_improvement', attempt, time.perf_counter() - start)
+                    if improved:
+                        logger.info(f"Successful batch field improvement with provider: {provider.name}")
+                        return result
+                        
+                except Exception as e:
+                    span.record_error(e)
+                    self._annotate_attempt(span, provider, 'error', 'batch_improvement', attempt,
+                                           time.perf_counter() - start)
+                    logger.warning(f"Provider {provider.name} failed for batch field improvement: {e}")
+                    continue
+        
+        # If all providers failed, return original content
+        logger.error("All providers failed for batch field improvement")
+        return dict(fields)
+    
+    def _get_providers_to_try(self, preferred_provider: str = None, model: str = None,
+                              operation: str = 'evaluation') -> List[AIProvider]:
+        """
+        Determine the order in which providers are attempted
+        
+        The static order (preferred, primary, then fallback_order) is reordered
+        by the adaptive routing policy when it is enabled
+        
+        Args:
+            preferred_provider: Preferred provider name (optional)
+            model: Model from the prompt template (optional)
+            operation: 'evaluation', 'partial_evaluation', 'improvement' or 'batch_improvement'
+            
+        Returns:
+            List of provider instances
+        """
         providers_to_try = []
         
+        # Try preferred provider first if specified
         if preferred_provider and preferred_provider in self._providers:
             providers_to_try.append(self._providers[preferred_provider])
         
+        # Add primary provider if not already added
         primary = self.get_primary_provider()
         if primary and primary not in providers_to_try:
             providers_to_try.append(primary)
         
+        # Add fallback providers
         exclude = preferred_provider if preferred_provider in self._providers else None
         if not exclude and primary:
             exclude = primary.name
         
-        fallbacks = self.get_fallback_providers(exclude)
-        providers_to_try.extend(fallbacks)
+        for provider in self.get_fallback_providers(exclude):
+            if provider not in providers_to_try:
+                providers_to_try.append(provider)
         
-        # Try each provider in order
-        for provider in providers_to_try:
-            try:
-                logger.info(f"Attempting field improvement with provider: {provider.name}")
-                result = provider.improve_field(field_name, field_content, project_context, prompt_template)
-                
-                # Check if content was actually improved (not just returned as-is)
-                if result != field_content:
-                    logger.info(f"Successful field improvement with provider: {provider.name}")
-                    return result
-                    
-            except Exception as e:
-                logger.warning(f"Provider {provider.name} failed for field improvement: {e}")
-                continue
+        if not routing_policy.enabled or not providers_to_try:
+            return providers_to_try
         
-        # If all providers failed, return original content
-        logger.error("All providers failed for field improvement")
-        return field_content
+        with tracer.span('routing.decide', operation=operation) as span:
+            candidates = [(p.name, model or p.DEFAULT_MODEL) for p in providers_to_try]
+            order = routing_policy.order(
+                candidates,
+                preferred_provider if preferred_provider in self._providers else None,
+                operation
+            )
+            span.set_attribute('order', ','.join(order))
+        return [self._providers[name] for name in order]
+    
+    @staticmethod
+    def is_valid_evaluation(result: Dict[str, Any]) -> bool:
+        """
+        Check whether an evaluation result comes from the model rather than
+        a provider fallback
+        
+        Args:
+            result: Evaluation result
+            
+        Returns:
+            True if the result is a real evaluation
+        """
+        return result.get('score_final', 0) != 5.0 or any(
+            'Évaluation automatique non disponible' not in suggestion 
+            for suggestion in result.get('suggestions', {}).values()
+        )
+    
+    def _annotate_attempt(self, span, provider: AIProvider, outcome: str,
+                          operation: str = 'evaluation', attempt: int = 0,
+                          latency: Optional[float] = None):
+        """Record an attempt's outcome on its span, in the metrics and in the routing statistics"""
+        span.set_attribute('outcome', outcome)
+        call = getattr(provider, 'last_call', None) or {}
+        model = call.get('model', 'unknown')
+        
+        if latency is not None:
+            routing_policy.record(provider.name, call.get('model', provider.DEFAULT_MODEL), latency,
+                                  outcome == 'success', call.get('input_tokens', 0),
+                                  call.get('output_tokens', 0))
+        
+        if attempt > 0:
+            metrics.inc('ai_provider_fallbacks_total', provider=provider.name, operation=operation)
+        if outcome != 'success':
+            metrics.inc('ai_provider_failures_total', provider=provider.name, model=model,
+                        operation=operation, reason=outcome)
+        
+        for key in ('model', 'input_tokens', 'output_tokens', 'request_bytes',
+                    'response_bytes', 'parse_repaired'):
+            if key in call:
+                span.set_attribute(key, call[key])
     
     def get_available_providers(self) -> List[str]:
         """
@@ -2,9 +2,8 @@
 Anthropic (Claude) provider implementation
 """
 import anthropic
-import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from .base_provider import AIProvider
 
 logger = logging.getLogger(__name__)
@@ -12,6 +11,8 @@ logger = logging.getLogger(__name__)
 class AnthropicProvider(AIProvider):
     """Anthropic Claude provider implementation"""
     
+    DEFAULT_MODEL = 'claude-3-5-sonnet-20241022'
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize Anthropic provider"""
         super().__init__(config)
@@ -30,36 +31,10 @@ class AnthropicProvider(AIProvider):
             return self._get_fallback_evaluation()
         
         try:
-            # Get model and parameters from template
-            model = prompt_template.get('metadata', {}).get('model', 'claude-3-5-sonnet-20241022')
-            parameters = prompt_template.get('parameters', {})
-            
-            # Build system message and user prompt
-            system_message = prompt_template.get('system_message', '')
-            user_prompt = self._substitute_template_variables(
-                prompt_template.get('user_prompt_template', ''), 
-                project_data
-            )
-            
-            # Map OpenAI parameters to Anthropic parameters
-            anthropic_params = self._map_parameters(parameters)
-            
-            response = self.client.messages.create(
-                model=model,
-                system=system_message,
-                messages=[{
-                    "role": "user",
-                    "content": user_prompt
-                }],
-                **anthropic_params
-            )
-            
-            content = response.content[0].text.strip()
+            content = self.generate(prompt_template, project_data)
             
             # Clean up the response to ensure valid JSON
-            content = self._clean_json_response(content)
-            
-            result = json.loads(content)
+            result = self._parse_json_response(content)
             
             # Get weights from Flask config
             weights = self.config.get('weights', {
@@ -85,10 +60,6 @@ class AnthropicProvider(AIProvider):
             return field_content
         
         try:
-            # Get model and parameters from template
-            model = prompt_template.get('metadata', {}).get('model', 'claude-3-5-sonnet-20241022')
-            parameters = prompt_template.get('parameters', {})
-            
             # Substitute variables in prompt
             variables = {
                 'field_name': field_name,
@@ -96,31 +67,34 @@ class AnthropicProvider(AIProvider):
                 'project_context': project_context
             }
             
-            system_message = prompt_template.get('system_message', '')
-            user_prompt = self._substitute_template_variables(
-                prompt_template.get('user_prompt_template', ''), 
-                variables
-            )
-            
-            # Map parameters
-            anthropic_params = self._map_parameters(parameters)
-            
-            response = self.client.messages.create(
-                model=model,
-                system=system_message,
-                messages=[{
-                    "role": "user",
-                    "content": user_prompt
-                }],
-                **anthropic_params
-            )
-            
-            return response.content[0].text.strip()
+            return self.generate(prompt_template, variables)
             
         except Exception as e:
             logger.error(f"Error improving field {field_name}: {e}")
             return field_content
     
+    def _complete(self, model: str, system_message: str, user_prompt: str,
+                  parameters: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+        """Send a messages request to Anthropic"""
+        # Map OpenAI parameters to Anthropic parameters
+        anthropic_params = self._map_parameters(parameters)
+        
+        response = self.client.messages.create(
+            model=model,
+            system=system_message,
+            messages=[{
+                "role": "user",
+                "content": user_prompt
+            }],
+            **anthropic_params
+        )
+        
+        usage = getattr(response, 'usage', None)
+        return response.content[0].text, {
+            'input_tokens': getattr(usage, 'input_tokens', 0) or 0,
+            'output_tokens': getattr(usage, 'output_tokens', 0) or 0
+        }
+    
     def supports_feature(self, feature: str) -> bool:
         """Check if Anthropic supports a feature"""
         supported_features = {
@@ -165,16 +139,3 @@ class AnthropicProvider(AIProvider):
             mapped['max_tokens'] = 2000
         
         return mapped
-    
-    def _clean_json_response(self, content: str) -> str:
-        """Clean JSON response from Anthropic"""
-        # Remove code block markers
-        if content.startswith('```json'):
-            content = content[7:]
-        elif content.startswith('```'):
-            content = content[3:]
-        
-        if content.endswith('```'):
-            content = content[:-3]
-        
-        return content.strip()
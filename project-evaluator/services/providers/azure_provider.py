@@ -2,9 +2,8 @@
 Azure OpenAI provider implementation
 """
 import openai
-import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from .base_provider import AIProvider
 
 logger = logging.getLogger(__name__)
@@ -12,6 +11,8 @@ logger = logging.getLogger(__name__)
 class AzureProvider(AIProvider):
     """Azure OpenAI provider implementation"""
     
+    DEFAULT_MODEL = 'gpt-4'
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize Azure OpenAI provider"""
         super().__init__(config)
@@ -32,25 +33,10 @@ class AzureProvider(AIProvider):
             return self._get_fallback_evaluation()
         
         try:
-            # Get deployment name (model) and parameters from template
-            deployment_name = prompt_template.get('metadata', {}).get('model', 'gpt-4')
-            parameters = prompt_template.get('parameters', {})
-            
-            # Build messages
-            messages = self._build_messages(project_data, prompt_template)
-            
-            response = self.client.chat.completions.create(
-                model=deployment_name,  # This is the deployment name in Azure
-                messages=messages,
-                **parameters
-            )
-            
-            content = response.choices[0].message.content.strip()
+            content = self.generate(prompt_template, project_data)
             
             # Clean up the response to ensure valid JSON
-            content = self._clean_json_response(content)
-            
-            result = json.loads(content)
+            result = self._parse_json_response(content)
             
             # Get weights from Flask config
             weights = self.config.get('weights', {
@@ -76,10 +62,6 @@ class AzureProvider(AIProvider):
             return field_content
         
         try:
-            # Get deployment name and parameters from template
-            deployment_name = prompt_template.get('metadata', {}).get('model', 'gpt-4')
-            parameters = prompt_template.get('parameters', {})
-            
             # Substitute variables in prompt
             variables = {
                 'field_name': field_name,
@@ -87,38 +69,38 @@ class AzureProvider(AIProvider):
                 'project_context': project_context
             }
             
-            messages = []
-            
-            # Add system message if present
-            system_msg = prompt_template.get('system_message', '')
-            if system_msg:
-                messages.append({
-                    'role': 'system',
-                    'content': system_msg
-                })
-            
-            # Add user message
-            user_prompt = self._substitute_template_variables(
-                prompt_template.get('user_prompt_template', ''), 
-                variables
-            )
-            messages.append({
-                'role': 'user',
-                'content': user_prompt
-            })
-            
-            response = self.client.chat.completions.create(
-                model=deployment_name,
-                messages=messages,
-                **parameters
-            )
-            
-            return response.choices[0].message.content.strip()
+            return self.generate(prompt_template, variables)
             
         except Exception as e:
             logger.error(f"Error improving field {field_name}: {e}")
             return field_content
     
+    def _complete(self, model: str, system_message: str, user_prompt: str,
+                  parameters: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+        """Send a chat completion request to Azure OpenAI"""
+        messages = []
+        if system_message:
+            messages.append({
+                'role': 'system',
+                'content': system_message
+            })
+        messages.append({
+            'role': 'user',
+            'content': user_prompt
+        })
+        
+        response = self.client.chat.completions.create(
+            model=model,  # This is the deployment name in Azure
+            messages=messages,
+            **parameters
+        )
+        
+        usage = getattr(response, 'usage', None)
+        return response.choices[0].message.content, {
+            'input_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+            'output_tokens': getattr(usage, 'completion_tokens', 0) or 0
+        }
+    
     def supports_feature(self, feature: str) -> bool:
         """Check if Azure OpenAI supports a feature"""
         supported_features = {
@@ -147,40 +129,3 @@ class AzureProvider(AIProvider):
         api_key = self.config.get('api_key')
         endpoint = self.config.get('endpoint')
         return bool(api_key and endpoint and endpoint.startswith('https://'))
-    
-    def _build_messages(self, project_data: Dict[str, Any], prompt_template: Dict[str, Any]) -> List[Dict[str, str]]:
-        """Build messages array for Azure OpenAI API"""
-        messages = []
-        
-        # Add system message if present
-        system_msg = prompt_template.get('system_message', '')
-        if system_msg:
-            messages.append({
-                'role': 'system',
-                'content': system_msg
-            })
-        
-        # Add user message with project data substituted
-        user_prompt = self._substitute_template_variables(
-            prompt_template.get('user_prompt_template', ''), 
-            project_data
-        )
-        messages.append({
-            'role': 'user',
-            'content': user_prompt
-        })
-        
-        return messages
-    
-    def _clean_json_response(self, content: str) -> str:
-        """Clean JSON response from Azure OpenAI"""
-        # Remove code block markers
-        if content.startswith('```json'):
-            content = content[7:]
-        elif content.startswith('```'):
-            content = content[3:]
-        
-        if content.endswith('```'):
-            content = content[:-3]
-        
-        return content.strip()
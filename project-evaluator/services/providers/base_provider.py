@@ -2,14 +2,22 @@
 Abstract base class for AI providers
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import json
 import logging
+import time
+from ..tracing import tracer
+from ..metrics import metrics
+from ..scoring import compute_score_final
 
 logger = logging.getLogger(__name__)
 
 class AIProvider(ABC):
     """Abstract base class for AI providers"""
     
+    # Model used when a prompt template does not specify one
+    DEFAULT_MODEL = 'gpt-4o'
+    
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize the provider with configuration
@@ -19,6 +27,12 @@ class AIProvider(ABC):
         """
         self.config = config
         self.name = self.__class__.__name__.replace('Provider', '').lower()
+        
+        # Details of the most recent model call (model, tokens, bytes, latency).
+        # Read back after generate() by ProviderManager and the cascade, so a
+        # provider instance must not be shared between threads: each AIService
+        # (one per request or queue worker) builds its own providers.
+        self.last_call: Dict[str, Any] = {}
     
     @abstractmethod
     def evaluate_project(self, project_data: Dict[str, Any], prompt_template: Dict[str, Any]) -> Dict[str, Any]:
@@ -51,6 +65,73 @@ class AIProvider(ABC):
         """
         pass
     
+    def evaluate_criteria(self, variables: Dict[str, Any], criteria: List[str],
+                          prompt_template: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Re-evaluate a subset of criteria with a targeted prompt
+        
+        Args:
+            variables: Variables substituted into the partial evaluation prompt
+            criteria: Criteria the model must score
+            prompt_template: YAML prompt template for partial evaluation
+            
+        Returns:
+            Dictionary with 'scores' and 'suggestions' for the requested criteria,
+            plus 'defis_techniques'/'duree_estimee' when the model returned them
+            
+        Raises:
+            ValueError: If a requested criterion was not scored
+        """
+        result = self._parse_json_response(self.generate(prompt_template, variables))
+        scores = result.get('scores', {})
+        missing = [criterion for criterion in criteria if criterion not in scores]
+        if missing:
+            raise ValueError(f"Partial evaluation is missing criteria: {missing}")
+        
+        suggestions = result.get('suggestions', {})
+        partial = {
+            'scores': {c: max(1.0, min(10.0, float(scores[c]))) for c in criteria},
+            'suggestions': {c: suggestions[c] for c in criteria if suggestions.get(c)}
+        }
+        for key in ('defis_techniques', 'duree_estimee'):
+            if result.get(key):
+                partial[key] = result[key]
+        return partial
+    
+    def improve_fields(self, fields: Dict[str, str], project_context: str,
+                       prompt_template: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Suggest improvements for several fields in a single structured call
+        
+        Args:
+            fields: Mapping of field name to current content
+            project_context: Additional context about the project, sent once
+            prompt_template: YAML prompt template for batch improvement
+            
+        Returns:
+            Mapping of field name to improved content; fields the model did not
+            return keep their original content
+        """
+        improved = dict(fields)
+        try:
+            variables = {
+                'fields': '\n\n'.join(f"### {name}\n{content}" for name, content in fields.items()),
+                'field_names': ', '.join(fields),
+                'project_context': project_context
+            }
+            result = self._parse_json_response(self.generate(prompt_template, variables))
+            result = result.get('ameliorations', result)
+            
+            for name in fields:
+                value = result.get(name)
+                if isinstance(value, str) and value.strip():
+                    improved[name] = value.strip()
+            
+        except Exception as e:
+            logger.error(f"Error improving fields {list(fields)} with {self.name}: {e}")
+        
+        return improved
+    
     @abstractmethod
     def supports_feature(self, feature: str) -> bool:
         """
@@ -93,6 +174,106 @@ class AIProvider(ABC):
         """
         pass
     
+    def generate(self, prompt_template: Dict[str, Any], variables: Dict[str, Any]) -> str:
+        """
+        Run a single completion for a prompt template and record call details
+        
+        Args:
+            prompt_template: YAML prompt template with system/user messages and parameters
+            variables: Variables substituted into the user prompt template
+            
+        Returns:
+            Raw text returned by the model
+        """
+        model = prompt_template.get('metadata', {}).get('model', self.DEFAULT_MODEL)
+        operation = prompt_template.get('metadata', {}).get('prompt_type', 'unknown')
+        parameters = prompt_template.get('parameters', {})
+        system_message = prompt_template.get('system_message', '')
+        user_prompt = self._substitute_template_variables(
+            prompt_template.get('user_prompt_template', ''), 
+            variables
+        )
+        
+        self.last_call = {
+            'model': model,
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'request_bytes': len((system_message + user_prompt).encode('utf-8')),
+            'response_bytes': 0,
+            'parse_repaired': False
+        }
+        
+        with tracer.span('provider.call', provider=self.name, model=model) as span:
+            metrics.inc('ai_provider_in_flight', provider=self.name)
+            start = time.perf_counter()
+            try:
+                content, usage = self._complete(model, system_message, user_prompt, parameters)
+            except Exception:
+                metrics.record_call(self.name, model, operation, time.perf_counter() - start, error=True)
+                raise
+            finally:
+                metrics.dec('ai_provider_in_flight', provider=self.name)
+            content = (content or '').strip()
+            
+            self.last_call.update(usage)
+            self.last_call['response_bytes'] = len(content.encode('utf-8'))
+            self.last_call['latency'] = time.perf_counter() - start
+            span.set_attributes(**self.last_call)
+            
+            metrics.record_call(self.name, model, operation, self.last_call['latency'],
+                                self.last_call['input_tokens'], self.last_call['output_tokens'])
+        
+        return content
+    
+    @abstractmethod
+    def _complete(self, model: str, system_message: str, user_prompt: str,
+                  parameters: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+        """
+        Send a single request to the provider API
+        
+        Args:
+            model: Model (or deployment) name
+            system_message: System message, possibly empty
+            user_prompt: User prompt with variables substituted
+            parameters: Generation parameters from the prompt template
+            
+        Returns:
+            Tuple of (response text, usage dict with input_tokens/output_tokens)
+        """
+        pass
+    
+    def _parse_json_response(self, content: str) -> Dict[str, Any]:
+        """
+        Parse a JSON model response, stripping code block markers if needed
+        
+        Args:
+            content: Raw model response
+            
+        Returns:
+            Parsed JSON content
+        """
+        with tracer.span('provider.parse_json', provider=self.name) as span:
+            cleaned = self._clean_json_response(content)
+            repaired = cleaned != content.strip()
+            self.last_call['parse_repaired'] = repaired
+            if repaired:
+                metrics.inc('ai_parse_repairs_total', provider=self.name,
+                            model=self.last_call.get('model', self.DEFAULT_MODEL))
+            span.set_attributes(repaired=repaired, bytes=len(cleaned.encode('utf-8')))
+            return json.loads(cleaned)
+    
+    def _clean_json_response(self, content: str) -> str:
+        """Remove code block markers around a JSON response"""
+        if content.startswith('```json'):
+            content = content[7:]
+        elif content.startswith('```'):
+            content = content[3:]
+        
+        if content.endswith('```'):
+            content = content[:-3]
+        
+        return content.strip()
+    
     def _substitute_template_variables(self, template: str, variables: Dict[str, Any]) -> str:
         """
         Substitute variables in template string
@@ -138,6 +319,9 @@ class AIProvider(ABC):
         required_scores = ['valeur_business', 'faisabilite_technique', 'effort_requis', 
                           'niveau_risque', 'urgence', 'alignement_strategique']
         
+        missing_scores = [key for key in required_scores if key not in result['scores']]
+        self.last_call['missing_scores'] = missing_scores
+        
         for score_key in required_scores:
             if score_key not in result['scores']:
                 result['scores'][score_key] = 5.0
@@ -147,16 +331,7 @@ class AIProvider(ABC):
                 result['scores'][score_key] = max(1.0, min(10.0, score))
         
         # Calculate final score using weights
-        final_score = (
-            result['scores']['valeur_business'] * weights['valeur_business'] +
-            result['scores']['faisabilite_technique'] * weights['faisabilite_technique'] +
-            result['scores']['effort_requis'] * weights['effort_requis'] +
-            result['scores']['niveau_risque'] * weights['niveau_risque'] +
-            result['scores']['urgence'] * weights['urgence'] +
-            result['scores']['alignement_strategique'] * weights['alignement_strategique']
-        )
-        
-        result['score_final'] = round(final_score, 2)
+        result['score_final'] = compute_score_final(result['scores'], weights)
         
         return result
     
@@ -2,9 +2,8 @@
 Databricks provider implementation
 """
 import requests
-import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from .base_provider import AIProvider
 
 logger = logging.getLogger(__name__)
@@ -12,6 +11,8 @@ logger = logging.getLogger(__name__)
 class DatabricksProvider(AIProvider):
     """Databricks provider implementation"""
     
+    DEFAULT_MODEL = 'meta-llama/Meta-Llama-3.1-70B-Instruct'
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize Databricks provider"""
         super().__init__(config)
@@ -35,38 +36,10 @@ class DatabricksProvider(AIProvider):
             return self._get_fallback_evaluation()
         
         try:
-            # Get model and parameters from template
-            model = prompt_template.get('metadata', {}).get('model', 'meta-llama/Meta-Llama-3.1-70B-Instruct')
-            parameters = prompt_template.get('parameters', {})
-            
-            # Build messages
-            messages = self._build_messages(project_data, prompt_template)
-            
-            # Map parameters to Databricks format
-            databricks_params = self._map_parameters(parameters)
-            
-            # Make API request
-            endpoint = f"{self.host}/serving-endpoints/{model}/invocations"
-            payload = {
-                'messages': messages,
-                **databricks_params
-            }
-            
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                json=payload,
-                timeout=60
-            )
-            response.raise_for_status()
-            
-            result_data = response.json()
-            content = result_data['choices'][0]['message']['content'].strip()
+            content = self.generate(prompt_template, project_data)
             
             # Clean up the response to ensure valid JSON
-            content = self._clean_json_response(content)
-            
-            result = json.loads(content)
+            result = self._parse_json_response(content)
             
             # Get weights from Flask config
             weights = self.config.get('weights', {
@@ -92,10 +65,6 @@ class DatabricksProvider(AIProvider):
             return field_content
         
         try:
-            # Get model and parameters from template
-            model = prompt_template.get('metadata', {}).get('model', 'meta-llama/Meta-Llama-3.1-70B-Instruct')
-            parameters = prompt_template.get('parameters', {})
-            
             # Substitute variables in prompt
             variables = {
                 'field_name': field_name,
@@ -103,51 +72,50 @@ class DatabricksProvider(AIProvider):
                 'project_context': project_context
             }
             
-            messages = []
-            
-            # Add system message if present
-            system_msg = prompt_template.get('system_message', '')
-            if system_msg:
-                messages.append({
-                    'role': 'system',
-                    'content': system_msg
-                })
-            
-            # Add user message
-            user_prompt = self._substitute_template_variables(
-                prompt_template.get('user_prompt_template', ''), 
-                variables
-            )
-            messages.append({
-                'role': 'user',
-                'content': user_prompt
-            })
-            
-            # Map parameters
-            databricks_params = self._map_parameters(parameters)
-            
-            # Make API request
-            endpoint = f"{self.host}/serving-endpoints/{model}/invocations"
-            payload = {
-                'messages': messages,
-                **databricks_params
-            }
-            
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                json=payload,
-                timeout=60
-            )
-            response.raise_for_status()
-            
-            result_data = response.json()
-            return result_data['choices'][0]['message']['content'].strip()
+            return self.generate(prompt_template, variables)
             
         except Exception as e:
             logger.error(f"Error improving field {field_name}: {e}")
             return field_content
     
+    def _complete(self, model: str, system_message: str, user_prompt: str,
+                  parameters: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+        """Send a chat request to a Databricks serving endpoint"""
+        messages = []
+        if system_message:
+            messages.append({
+                'role': 'system',
+                'content': system_message
+            })
+        messages.append({
+            'role': 'user',
+            'content': user_prompt
+        })
+        
+        # Map parameters to Databricks format
+        databricks_params = self._map_parameters(parameters)
+        
+        endpoint = f"{self.host}/serving-endpoints/{model}/invocations"
+        payload = {
+            'messages': messages,
+            **databricks_params
+        }
+        
+        response = requests.post(
+            endpoint,
+            headers=self.headers,
+            json=payload,
+            timeout=60
+        )
+        response.raise_for_status()
+        
+        result_data = response.json()
+        usage = result_data.get('usage') or {}
+        return result_data['choices'][0]['message']['content'], {
+            'input_tokens': usage.get('prompt_tokens', 0) or 0,
+            'output_tokens': usage.get('completion_tokens', 0) or 0
+        }
+    
     def supports_feature(self, feature: str) -> bool:
         """Check if Databricks supports a feature"""
         supported_features = {
@@ -173,31 +141,7 @@ class DatabricksProvider(AIProvider):
         host = self.config.get('host')
         token = self.config.get('token')
         return bool(host and token and host.startswith('https://'))
-    
-    def _build_messages(self, project_data: Dict[str, Any], prompt_template: Dict[str, Any]) -> List[Dict[str, str]]:
-        """Build messages array for Databricks API"""
-        messages = []
-        
-        # Add system message if present
-        system_msg = prompt_template.get('system_message', '')
-        if system_msg:
-            messages.append({
-                'role': 'system',
-                'content': system_msg
-            })
-        
-        # Add user message with project data substituted
-        user_prompt = self._substitute_template_variables(
-            prompt_template.get('user_prompt_template', ''), 
-            project_data
-        )
-        messages.append({
-            'role': 'user',
-            'content': user_prompt
-        })
-        
-        return messages
-    
+
     def _map_parameters(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Map OpenAI-style parameters to Databricks parameters"""
         mapped = {}
@@ -211,16 +155,3 @@ class DatabricksProvider(AIProvider):
             mapped['top_p'] = parameters['top_p']
         
         return mapped
-    
-    def _clean_json_response(self, content: str) -> str:
-        """Clean JSON response from Databricks"""
-        # Remove code block markers
-        if content.startswith('```json'):
-            content = content[7:]
-        elif content.startswith('```'):
-            content = content[3:]
-        
-        if content.endswith('```'):
-            content = content[:-3]
-        
-        return content.strip()
@@ -2,9 +2,8 @@
 Google Gemini provider implementation for google-genai library
 """
 import google.genai as genai
-import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from .base_provider import AIProvider
 
 logger = logging.getLogger(__name__)
@@ -12,6 +11,8 @@ logger = logging.getLogger(__name__)
 class GoogleProvider(AIProvider):
     """Google Gemini provider implementation"""
     
+    DEFAULT_MODEL = 'gemini-1.5-pro'
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize Google provider"""
         super().__init__(config)
@@ -36,38 +37,10 @@ class GoogleProvider(AIProvider):
             return self._get_fallback_evaluation()
         
         try:
-            # Get model and parameters from template
-            model_name = prompt_template.get('metadata', {}).get('model', 'gemini-1.5-pro')
-            parameters = prompt_template.get('parameters', {})
-            
-            # Build prompt (Google uses a single prompt, combine system + user)
-            system_message = prompt_template.get('system_message', '')
-            user_prompt = self._substitute_template_variables(
-                prompt_template.get('user_prompt_template', ''), 
-                project_data
-            )
-            
-            full_prompt = f"{system_message}\n\n{user_prompt}" if system_message else user_prompt
-            
-            # Map parameters to Google format
-            generation_config = self._map_parameters(parameters)
-            
-            # Use the new google-genai library
-            response = self.client.models.generate_content(
-                model=model_name,
-                contents=[{
-                    "role": "user",
-                    "parts": [{"text": full_prompt}]
-                }],
-                config=generation_config
-            )
-            
-            content = response.text.strip()
+            content = self.generate(prompt_template, project_data)
             
             # Clean up the response to ensure valid JSON
-            content = self._clean_json_response(content)
-            
-            result = json.loads(content)
+            result = self._parse_json_response(content)
             
             # Get weights from Flask config
             weights = self.config.get('weights', {
@@ -93,10 +66,6 @@ class GoogleProvider(AIProvider):
             return field_content
         
         try:
-            # Get model and parameters from template
-            model_name = prompt_template.get('metadata', {}).get('model', 'gemini-1.5-pro')
-            parameters = prompt_template.get('parameters', {})
-            
             # Substitute variables in prompt
             variables = {
                 'field_name': field_name,
@@ -104,33 +73,36 @@ class GoogleProvider(AIProvider):
                 'project_context': project_context
             }
             
-            system_message = prompt_template.get('system_message', '')
-            user_prompt = self._substitute_template_variables(
-                prompt_template.get('user_prompt_template', ''), 
-                variables
-            )
-            
-            full_prompt = f"{system_message}\n\n{user_prompt}" if system_message else user_prompt
-            
-            # Map parameters
-            generation_config = self._map_parameters(parameters)
-            
-            # Use the new google-genai library
-            response = self.client.models.generate_content(
-                model=model_name,
-                contents=[{
-                    "role": "user", 
-                    "parts": [{"text": full_prompt}]
-                }],
-                config=generation_config
-            )
-            
-            return response.text.strip()
+            return self.generate(prompt_template, variables)
             
         except Exception as e:
             logger.error(f"Error improving field {field_name}: {e}")
             return field_content
     
+    def _complete(self, model: str, system_message: str, user_prompt: str,
+                  parameters: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+        """Send a generate_content request to Google Gemini"""
+        # Google uses a single prompt, combine system + user
+        full_prompt = f"{system_message}\n\n{user_prompt}" if system_message else user_prompt
+        
+        # Map parameters to Google format
+        generation_config = self._map_parameters(parameters)
+        
+        response = self.client.models.generate_content(
+            model=model,
+            contents=[{
+                "role": "user",
+                "parts": [{"text": full_prompt}]
+            }],
+            config=generation_config
+        )
+        
+        usage = getattr(response, 'usage_metadata', None)
+        return response.text, {
+            'input_tokens': getattr(usage, 'prompt_token_count', 0) or 0,
+            'output_tokens': getattr(usage, 'candidates_token_count', 0) or 0
+        }
+    
     def supports_feature(self, feature: str) -> bool:
         """Check if Google supports a feature"""
         supported_features = {
@@ -171,16 +143,3 @@ class GoogleProvider(AIProvider):
             mapped['top_k'] = parameters['top_k']
         
         return mapped
-    
-    def _clean_json_response(self, content: str) -> str:
-        """Clean JSON response from Google"""
-        # Remove code block markers
-        if content.startswith('```json'):
-            content = content[7:]
-        elif content.startswith('```'):
-            content = content[3:]
-        
-        if content.endswith('```'):
-            content = content[:-3]
-        
-        return content.strip()
@@ -2,9 +2,9 @@
 OpenAI provider implementation
 """
 import openai
-import json
 import logging
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Tuple
 from .base_provider import AIProvider
 
 logger = logging.getLogger(__name__)
@@ -12,6 +12,8 @@ logger = logging.getLogger(__name__)
 class OpenAIProvider(AIProvider):
     """OpenAI provider implementation"""
     
+    DEFAULT_MODEL = 'gpt-4o'
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize OpenAI provider"""
         super().__init__(config)
@@ -37,31 +39,10 @@ class OpenAIProvider(AIProvider):
             return self._get_fallback_evaluation()
         
         try:
-            # Get model and parameters from template
-            model = prompt_template.get('metadata', {}).get('model', 'gpt-4o')
-            parameters = prompt_template.get('parameters', {})
-            
-            # Build messages
-            messages = self._build_messages(project_data, prompt_template)
-            
-            # Handle special models (o3/o3-mini thinking models)
-            if model.startswith('o3') or 'mini-2025' in model:
-                # Thinking models don't support system messages or temperature
-                messages = [msg for msg in messages if msg['role'] != 'system']
-                parameters = {k: v for k, v in parameters.items() if k != 'temperature'}
-            
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                **parameters
-            )
-            
-            content = response.choices[0].message.content.strip()
+            content = self.generate(prompt_template, project_data)
             
             # Clean up the response to ensure valid JSON
-            content = self._clean_json_response(content)
-            
-            result = json.loads(content)
+            result = self._parse_json_response(content)
             
             # Get weights from Flask config (will be injected by the main service)
             weights = self.config.get('weights', {
@@ -87,10 +68,6 @@ class OpenAIProvider(AIProvider):
             return field_content
         
         try:
-            # Get model and parameters from template
-            model = prompt_template.get('metadata', {}).get('model', 'gpt-4o')
-            parameters = prompt_template.get('parameters', {})
-            
             # Substitute variables in prompt
             variables = {
                 'field_name': field_name,
@@ -98,43 +75,45 @@ class OpenAIProvider(AIProvider):
                 'project_context': project_context
             }
             
-            messages = []
-            
-            # Add system message if supported and present
-            if not (model.startswith('o3') or 'mini-2025' in model):
-                system_msg = prompt_template.get('system_message', '')
-                if system_msg:
-                    messages.append({
-                        'role': 'system',
-                        'content': system_msg
-                    })
-            
-            # Add user message
-            user_prompt = self._substitute_template_variables(
-                prompt_template.get('user_prompt_template', ''), 
-                variables
-            )
-            messages.append({
-                'role': 'user',
-                'content': user_prompt
-            })
-            
-            # Handle special models
-            if model.startswith('o3') or 'mini-2025' in model:
-                parameters = {k: v for k, v in parameters.items() if k != 'temperature'}
-            
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                **parameters
-            )
-            
-            return response.choices[0].message.content.strip()
+            return self.generate(prompt_template, variables)
             
         except Exception as e:
             logger.error(f"Error improving field {field_name}: {e}")
             return field_content
     
+    def _complete(self, model: str, system_message: str, user_prompt: str,
+                  parameters: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+        """Send a chat completion request to OpenAI"""
+        # Thinking models (o1/o3/o4-mini) don't support system messages or temperature;
+        # gpt-4.1-mini is a regular chat model
+        thinking_model = re.match(r'o\d', model) is not None
+        
+        messages = []
+        if system_message and not thinking_model:
+            messages.append({
+                'role': 'system',
+                'content': system_message
+            })
+        messages.append({
+            'role': 'user',
+            'content': user_prompt
+        })
+        
+        if thinking_model:
+            parameters = {k: v for k, v in parameters.items() if k != 'temperature'}
+        
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            **parameters
+        )
+        
+        usage = getattr(response, 'usage', None)
+        return response.choices[0].message.content, {
+            'input_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+            'output_tokens': getattr(usage, 'completion_tokens', 0) or 0
+        }
+    
     def supports_feature(self, feature: str) -> bool:
         """Check if OpenAI supports a feature"""
         supported_features = {
@@ -161,43 +140,3 @@ class OpenAIProvider(AIProvider):
         """Validate OpenAI configuration"""
         api_key = self.config.get('api_key')
         return bool(api_key and api_key.startswith('sk-'))
-    
-    def _build_messages(self, project_data: Dict[str, Any], prompt_template: Dict[str, Any]) -> List[Dict[str, str]]:
-        """Build messages array for OpenAI API"""
-        messages = []
-        
-        model = prompt_template.get('metadata', {}).get('model', 'gpt-4o')
-        
-        # Add system message if supported
-        if not (model.startswith('o3') or 'mini-2025' in model):
-            system_msg = prompt_template.get('system_message', '')
-            if system_msg:
-                messages.append({
-                    'role': 'system',
-                    'content': system_msg
-                })
-        
-        # Add user message with project data substituted
-        user_prompt = self._substitute_template_variables(
-            prompt_template.get('user_prompt_template', ''), 
-            project_data
-        )
-        messages.append({
-            'role': 'user',
-            'content': user_prompt
-        })
-        
-        return messages
-    
-    def _clean_json_response(self, content: str) -> str:
-        """Clean JSON response from OpenAI"""
-        # Remove code block markers
-        if content.startswith('```json'):
-            content = content[7:]
-        elif content.startswith('```'):
-            content = content[3:]
-        
-        if content.endswith('```'):
-            content = content[:-3]
-        
-        return content.strip()
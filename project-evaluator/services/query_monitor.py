@@ -0,0 +1,167 @@
+"""
+Per-request SQL query monitoring
+Counts queries and database time for each request, detects N+1 patterns
+and reports totals through the Server-Timing response header
+"""
+import logging
+import re
+import time
+from collections import Counter
+from typing import Dict, Any, Optional
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a request exceeds its SQL query budget"""
+    pass
+
+
+_IN_LIST_PATTERN = re.compile(r'\(\s*(?:\?|%\([^)]*\)s|:\w+)(?:\s*,\s*(?:\?|%\([^)]*\)s|:\w+))+\s*\)')
+_STRING_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a SQL statement so that queries differing only by their
+    parameters share the same shape
+
+    Args:
+        statement: SQL statement as sent to the DBAPI cursor
+
+    Returns:
+        Normalized statement
+    """
+    shape = _STRING_LITERAL_PATTERN.sub('?', statement)
+    shape = _NUMBER_LITERAL_PATTERN.sub('?', shape)
+    shape = _IN_LIST_PATTERN.sub('(?)', shape)
+    return _WHITESPACE_PATTERN.sub(' ', shape).strip()
+
+
+class QueryMonitor:
+    """Attaches SQLAlchemy cursor events and Flask request hooks to an app"""
+
+    def __init__(self, app=None, db=None):
+        """
+        Initialize the query monitor
+
+        Args:
+            app: Optional Flask application
+            db: Flask-SQLAlchemy extension instance
+        """
+        self.db = db
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db=None):
+        """
+        Register the monitor on a Flask application
+
+        Args:
+            app: Flask application
+            db: Flask-SQLAlchemy extension instance
+        """
+        if db is not None:
+            self.db = db
+
+        app.config.setdefault('SQL_MONITOR_ENABLED', True)
+        app.config.setdefault('SQL_QUERY_BUDGET', 30)
+        app.config.setdefault('SQL_QUERY_BUDGETS', {})
+        app.config.setdefault('SQL_REPEAT_THRESHOLD', 5)
+        app.config.setdefault('SQL_QUERY_BUDGET_STRICT', False)
+
+        if not app.config['SQL_MONITOR_ENABLED']:
+            return
+
+        with app.app_context():
+            engine = self.db.engine
+
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _start_request(self):
+        """Reset per-request query statistics"""
+        g.sql_stats = {
+            'count': 0,
+            'duration': 0.0,
+            'shapes': Counter()
+        }
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        """Remember when the statement started"""
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        """Record the statement against the current request"""
+        start_times = conn.info.get('query_start_time')
+        if not start_times:
+            return
+        elapsed = time.perf_counter() - start_times.pop()
+
+        if not has_request_context():
+            return
+        stats = g.get('sql_stats')
+        if stats is None:
+            return
+
+        stats['count'] += 1
+        stats['duration'] += elapsed
+        stats['shapes'][statement_shape(statement)] += 1
+
+    def _finish_request(self, response):
+        """Add the Server-Timing header and enforce the query budget"""
+        stats = g.pop('sql_stats', None)
+        if stats is None or request.endpoint == 'static':
+            return response
+
+        duration_ms = stats['duration'] * 1000
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={duration_ms:.2f};desc="{stats["count"]} queries"'
+        )
+
+        problems = self.check_budget(request.endpoint, stats)
+        if problems:
+            message = f"SQL budget exceeded for {request.endpoint}: " + '; '.join(problems)
+            if current_app.config['SQL_QUERY_BUDGET_STRICT']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+    def check_budget(self, endpoint: Optional[str], stats: Dict[str, Any]) -> list:
+        """
+        Compare request statistics against the configured budgets
+
+        Args:
+            endpoint: Flask endpoint name
+            stats: Per-request statistics
+
+        Returns:
+            List of human readable problems (empty when within budget)
+        """
+        config = current_app.config
+
+        budget = config['SQL_QUERY_BUDGETS'].get(endpoint, config['SQL_QUERY_BUDGET'])
+        threshold = config['SQL_REPEAT_THRESHOLD']
+
+        problems = []
+        if budget is not None and stats['count'] > budget:
+            problems.append(f"{stats['count']} queries (budget {budget})")
+
+        for shape, count in stats['shapes'].most_common():
+            if count < threshold:
+                break
+            problems.append(f"possible N+1: {count}x {shape[:200]}")
+
+        return problems
+
+
+query_monitor = QueryMonitor()
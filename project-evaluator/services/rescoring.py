@@ -0,0 +1,96 @@
+"""
+Portfolio re-scoring when EVALUATION_WEIGHTS change
+score_final is recomputed for every stored evaluation from its criterion
+columns in a single set-based UPDATE, without any provider call
+"""
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+from sqlalchemy import select, update, func, or_
+from models import db, Project, Evaluation, WeightSet
+from .events import event_broker
+from .leaderboard import rebuild_leaderboard
+from .scoring import CRITERIA, weights_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def register_weight_set(weights: Dict[str, float]) -> WeightSet:
+    """
+    Get or create the versioned weight set for a set of weights (the caller commits)
+
+    Args:
+        weights: Evaluation criteria weights
+
+    Returns:
+        Weight set
+    """
+    fingerprint = weights_fingerprint(weights)
+    weight_set = WeightSet.query.filter_by(fingerprint=fingerprint).first()
+    if weight_set is None:
+        weight_set = WeightSet(
+            fingerprint=fingerprint,
+            weights=json.dumps({criterion: float(weights[criterion]) for criterion in CRITERIA})
+        )
+        db.session.add(weight_set)
+        db.session.flush()
+        logger.info(f"Registered weight set v{weight_set.id} ({fingerprint})")
+    return weight_set
+
+
+def rescore_evaluations(weights: Dict[str, float], project_ids: Optional[list] = None) -> Dict[str, Any]:
+    """
+    Recompute score_final of stored evaluations with a set of weights
+
+    Evaluations already produced by these weights are left untouched. Priority
+    is derived from score_final, so it follows automatically; the leaderboard
+    is rebuilt when any score changed.
+
+    Args:
+        weights: Evaluation criteria weights
+        project_ids: Restrict re-scoring to these projects (optional)
+
+    Returns:
+        Dictionary with the weight set version, fingerprint and number of updated evaluations
+    """
+    start = time.perf_counter()
+    weight_set = register_weight_set(weights)
+
+    weighted_sum = sum(getattr(Evaluation, criterion) * float(weights[criterion]) for criterion in CRITERIA)
+    stale = or_(Evaluation.weights_fingerprint.is_(None), Evaluation.weights_fingerprint != weight_set.fingerprint)
+    if project_ids is not None:
+        stale = stale & Evaluation.project_id.in_(project_ids)
+
+    # Move updated_at of the affected projects first, while the stale evaluations still match,
+    # so that /api/changes reports their new scores
+    db.session.execute(
+        update(Project)
+        .where(Project.id.in_(select(Evaluation.project_id).where(stale)))
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    statement = (
+        update(Evaluation)
+        .where(stale)
+        .values(score_final=func.round(weighted_sum, 2), weights_fingerprint=weight_set.fingerprint)
+        .execution_options(synchronize_session=False)
+    )
+    updated = db.session.execute(statement).rowcount
+    if updated:
+        rebuild_leaderboard()
+    db.session.commit()
+    if updated:
+        # Bulk updates bypass the session events, so dashboards are told to reload
+        event_broker.publish('rescored', {'updated': updated, 'weight_set': weight_set.id})
+    # Loaded evaluations still hold the old scores
+    db.session.expire_all()
+
+    duration_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Re-scored {updated} evaluations with weight set v{weight_set.id} in {duration_ms:.1f} ms")
+    return {
+        'weight_set': weight_set.to_dict(),
+        'updated': updated,
+        'duration_ms': round(duration_ms, 1)
+    }
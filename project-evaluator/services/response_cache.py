@@ -0,0 +1,159 @@
+"""
+Server-side cache of rendered listing fragments and serialized API pages
+Entries are keyed by the same versions as the HTTP validators: the portfolio
+version for listings and the project version for details. A commit that
+writes projects or evaluations changes those versions, so the next request
+misses and rebuilds, while entries of untouched projects stay valid. Old
+entries are evicted by the LRU bound or expire with RESPONSE_CACHE_TTL.
+
+Backends:
+- 'lru': in-process, per worker (default)
+- 'redis': any server speaking the Redis protocol (RESPONSE_CACHE_URL), shared by workers
+- 'none': disabled
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Union
+from .http_cache import fingerprint
+from .metrics import metrics
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class LRUBackend:
+    """Bounded in-process store with per-entry expiry"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Store on a Redis-protocol server, shared by every worker"""
+
+    def __init__(self, url: str, ttl: float, prefix: str = 'responses:'):
+        self.client = redis.Redis.from_url(url)
+        self.ttl = max(int(ttl), 1)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """Get-or-build cache of response bodies"""
+
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        """
+        Select the backend from Flask config
+
+        Args:
+            app: Flask application
+        """
+        app.config.setdefault('RESPONSE_CACHE_BACKEND', 'lru')
+        app.config.setdefault('RESPONSE_CACHE_SIZE', 1024)
+        app.config.setdefault('RESPONSE_CACHE_TTL', 300)
+        app.config.setdefault('RESPONSE_CACHE_URL', None)
+
+        name = app.config['RESPONSE_CACHE_BACKEND']
+        ttl = app.config['RESPONSE_CACHE_TTL']
+        if name == 'redis' and redis is None:
+            logger.warning("RESPONSE_CACHE_BACKEND=redis but the redis package is not installed, using 'lru'")
+            name = 'lru'
+
+        if name == 'redis':
+            self.backend = RedisBackend(app.config['RESPONSE_CACHE_URL'] or 'redis://localhost:6379/0', ttl)
+        elif name == 'lru':
+            self.backend = LRUBackend(app.config['RESPONSE_CACHE_SIZE'], ttl)
+        else:
+            self.backend = None
+        app.extensions['response_cache'] = self
+
+    def get_or_set(self, parts: Any, build: Callable[[], Union[str, bytes]]) -> bytes:
+        """
+        Return the cached body for a key, building and storing it on a miss
+
+        Backend errors are logged and the body is built as if uncached.
+
+        Args:
+            parts: Values identifying the body, including its version (JSON-serializable)
+            build: Callable returning the body
+
+        Returns:
+            Body as UTF-8 bytes
+        """
+        if self.backend is None:
+            return _to_bytes(build())
+
+        key = fingerprint(parts)
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache unavailable: {e}")
+            return _to_bytes(build())
+
+        if value is not None:
+            metrics.inc('ai_cache_hits_total', cache='responses')
+            return value
+
+        metrics.inc('ai_cache_misses_total', cache='responses')
+        value = _to_bytes(build())
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            logger.warning(f"Response cache unavailable: {e}")
+        return value
+
+    def clear(self):
+        """Drop every cached body"""
+        if self.backend is not None:
+            self.backend.clear()
+
+
+def _to_bytes(value: Union[str, bytes]) -> bytes:
+    return value.encode('utf-8') if isinstance(value, str) else value
+
+
+response_cache = ResponseCache()
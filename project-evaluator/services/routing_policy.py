@@ -0,0 +1,249 @@
+"""
+Adaptive provider routing
+Keeps exponentially-weighted latency, success rate and token statistics per
+provider and model, and orders fallback attempts by expected time to a
+valid result (ascending) within the constraints set by administrators
+through /admin/routing. Successful and failed attempts keep separate
+latency averages: a provider that fails fast is not mistaken for a fast one.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+from .metrics import metrics
+from .runtime_settings import runtime_settings
+
+logger = logging.getLogger(__name__)
+
+# Success rates are floored so that a provider that keeps failing is pushed
+# back rather than given an infinite expected time
+MIN_SUCCESS_RATE = 0.05
+
+
+class AdaptiveRoutingPolicy:
+    """Latency- and error-aware provider ordering (statistics are per process)"""
+
+    def __init__(self, alpha: float = 0.2, prior_latency: float = 10.0,
+                 prior_success: float = 0.9, max_decisions: int = 100,
+                 failure_penalty: Optional[float] = None):
+        """
+        Initialize the policy
+
+        Args:
+            alpha: Weight of the newest observation in the moving averages
+            prior_latency: Latency in seconds assumed for unobserved routes
+            prior_success: Success rate assumed for unobserved routes
+            max_decisions: Number of routing decisions kept for /admin/routing
+            failure_penalty: Seconds charged per failed attempt on top of its
+                latency (defaults to prior_latency)
+        """
+        self.enabled = True
+        self.alpha = alpha
+        self.prior_latency = prior_latency
+        self.prior_success = prior_success
+        self.failure_penalty = prior_latency if failure_penalty is None else failure_penalty
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._decisions = deque(maxlen=max_decisions)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Configure the policy from Flask config
+
+        Args:
+            app: Flask application
+        """
+        app.config.setdefault('ROUTING_POLICY', 'adaptive')
+        app.config.setdefault('ROUTING_EWMA_ALPHA', 0.2)
+        app.config.setdefault('ROUTING_PRIOR_LATENCY', 10.0)
+
+        self.enabled = app.config['ROUTING_POLICY'] == 'adaptive'
+        self.alpha = app.config['ROUTING_EWMA_ALPHA']
+        self.prior_latency = app.config['ROUTING_PRIOR_LATENCY']
+        self.failure_penalty = app.config.get('ROUTING_FAILURE_PENALTY') or self.prior_latency
+
+    # Statistics
+
+    def record(self, provider: str, model: str, latency: float, success: bool,
+               input_tokens: int = 0, output_tokens: int = 0):
+        """
+        Record the outcome of one attempt
+
+        Args:
+            provider: Provider name
+            model: Model name
+            latency: Wall time of the attempt in seconds
+            success: Whether the attempt produced a valid result
+            input_tokens: Prompt tokens reported by the SDK
+            output_tokens: Completion tokens reported by the SDK
+        """
+        with self._lock:
+            stats = self._stats.get((provider, model))
+            if stats is None:
+                self._stats[(provider, model)] = {
+                    # Time to a valid result is unknown until an attempt succeeds
+                    'latency': latency if success else self.prior_latency,
+                    'failure_latency': 0.0 if success else latency,
+                    'success': 1.0 if success else 0.0,
+                    'input_tokens': float(input_tokens),
+                    'output_tokens': float(output_tokens),
+                    'samples': 1,
+                    'updated_at': time.time()
+                }
+                return
+
+            a = self.alpha
+            if success:
+                stats['latency'] += a * (latency - stats['latency'])
+            else:
+                stats['failure_latency'] += a * (latency - stats['failure_latency'])
+            stats['success'] += a * ((1.0 if success else 0.0) - stats['success'])
+            if input_tokens or output_tokens:
+                stats['input_tokens'] += a * (input_tokens - stats['input_tokens'])
+                stats['output_tokens'] += a * (output_tokens - stats['output_tokens'])
+            stats['samples'] += 1
+            stats['updated_at'] = time.time()
+
+    def estimate(self, provider: str, model: str) -> Dict[str, Any]:
+        """
+        Estimate latency, success rate, expected time and cost of a route
+
+        The expected time to a valid result is the success latency plus the
+        expected failures before a success, (1 - p) / p, each charged its own
+        latency and failure_penalty (the cost of falling through to another
+        provider). An unobserved success latency uses prior_latency.
+
+        Args:
+            provider: Provider name
+            model: Model name
+
+        Returns:
+            Dictionary describing the route
+        """
+        with self._lock:
+            stats = dict(self._stats.get((provider, model), {}))
+
+        latency = stats.get('latency', self.prior_latency)
+        failure_latency = stats.get('failure_latency', 0.0)
+        success = stats.get('success', self.prior_success)
+        rate = max(success, MIN_SUCCESS_RATE)
+        expected = latency + (1.0 - rate) / rate * (failure_latency + self.failure_penalty)
+        return {
+            'provider': provider,
+            'model': model,
+            'samples': stats.get('samples', 0),
+            'latency_ewma': round(latency, 3),
+            'failure_latency_ewma': round(failure_latency, 3),
+            'success_ewma': round(success, 3),
+            'expected_time': round(expected, 3),
+            'estimated_cost': metrics.estimate_cost(model, int(stats.get('input_tokens', 0)),
+                                                    int(stats.get('output_tokens', 0)))
+        }
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Return the statistics of every observed route, fastest first"""
+        with self._lock:
+            routes = list(self._stats)
+        return sorted((self.estimate(provider, model) for provider, model in routes),
+                      key=lambda route: route['expected_time'])
+
+    def reset(self):
+        """Forget all statistics and decisions"""
+        with self._lock:
+            self._stats.clear()
+            self._decisions.clear()
+
+    # Constraints
+
+    def get_constraints(self) -> Dict[str, Any]:
+        """
+        Get the admin routing constraints
+
+        Returns:
+            Dictionary with pinned_primary, max_cost_per_call and excluded
+        """
+        constraints = runtime_settings.get('routing_constraints', {})
+        return {
+            'pinned_primary': constraints.get('pinned_primary'),
+            'max_cost_per_call': constraints.get('max_cost_per_call'),
+            'excluded': list(constraints.get('excluded', []))
+        }
+
+    def set_constraints(self, constraints: Dict[str, Any]):
+        """
+        Store the admin routing constraints
+
+        Args:
+            constraints: Dictionary with pinned_primary, max_cost_per_call and excluded
+        """
+        runtime_settings.set('routing_constraints', constraints)
+
+    # Ordering
+
+    def order(self, candidates: List[Tuple[str, str]], preferred: Optional[str] = None,
+              operation: str = 'evaluation') -> List[str]:
+        """
+        Order candidate providers for one call
+
+        An explicitly preferred provider stays first, then the pinned primary,
+        then the remaining providers by expected time to a valid result. The
+        static order breaks ties, so unobserved routes keep their configured order.
+
+        Args:
+            candidates: (provider, model) pairs in static fallback order
+            preferred: Provider requested by the caller (optional)
+            operation: 'evaluation' or 'improvement'
+
+        Returns:
+            Provider names in the order they should be attempted
+        """
+        constraints = self.get_constraints()
+        excluded = set(constraints['excluded'])
+        max_cost = constraints['max_cost_per_call']
+        pinned = constraints['pinned_primary']
+
+        routes = []
+        for position, (provider, model) in enumerate(candidates):
+            route = self.estimate(provider, model)
+            route['static_position'] = position
+            if provider == preferred:
+                route['status'] = 'preferred'
+            elif provider in excluded:
+                route['status'] = 'excluded'
+            elif max_cost is not None and route['estimated_cost'] > max_cost:
+                route['status'] = 'over_cost_cap'
+            elif provider == pinned:
+                route['status'] = 'pinned'
+            else:
+                route['status'] = 'ranked'
+            routes.append(route)
+
+        rank = {'preferred': 0, 'pinned': 1, 'ranked': 2}
+        selected = sorted(
+            (route for route in routes if route['status'] in rank),
+            key=lambda route: (rank[route['status']], route['expected_time'], route['static_position'])
+        )
+        order = [route['provider'] for route in selected]
+
+        self._decisions.appendleft({
+            'timestamp': time.time(),
+            'operation': operation,
+            'order': order,
+            'constraints': constraints,
+            'routes': routes
+        })
+        if not order and candidates:
+            logger.warning(f"No provider left for {operation}: every route is excluded or over the cost cap ("
+                           + ', '.join(f"{r['provider']}={r['status']}" for r in routes) + ")")
+        elif candidates and order[0] != candidates[0][0]:
+            logger.info(f"Routing {operation} to {order[0]} instead of {candidates[0][0]}: "
+                        + ', '.join(f"{r['provider']}={r['expected_time']}s/{r['status']}" for r in routes))
+        return order
+
+    def get_decisions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return the most recent routing decisions, newest first"""
+        return list(self._decisions)[:limit]
+
+
+routing_policy = AdaptiveRoutingPolicy()
@@ -0,0 +1,96 @@
+"""
+Runtime settings changed by administrators without a restart
+Stored in a small JSON file so that every worker process sees updates
+"""
+import json
+import logging
+import os
+import threading
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class RuntimeSettings:
+    """JSON-file backed settings shared by all worker processes"""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._values: Dict[str, Any] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Configure the settings file from Flask config
+
+        Args:
+            app: Flask application
+        """
+        if not app.config.get('RUNTIME_SETTINGS_FILE'):
+            app.config['RUNTIME_SETTINGS_FILE'] = os.path.join(app.instance_path, 'runtime_settings.json')
+        self.path = app.config['RUNTIME_SETTINGS_FILE']
+        self._values = {}
+        self._mtime = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a setting, reloading the file if another process changed it
+
+        Args:
+            key: Setting name
+            default: Value returned when the setting is absent
+
+        Returns:
+            Setting value
+        """
+        return self.all().get(key, default)
+
+    def all(self) -> Dict[str, Any]:
+        """Return a copy of every setting"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except (OSError, TypeError):
+            return {}
+
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    with open(self.path, encoding='utf-8') as f:
+                        self._values = json.load(f)
+                    self._mtime = mtime
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error reading runtime settings {self.path}: {e}")
+            return dict(self._values)
+
+    def set(self, key: str, value: Any):
+        """
+        Store a setting
+
+        Args:
+            key: Setting name
+            value: JSON-serializable value
+        """
+        with self._lock:
+            values = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, encoding='utf-8') as f:
+                        values = json.load(f)
+                except (OSError, ValueError):
+                    values = {}
+            values[key] = value
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(values, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+            self._values = values
+            self._mtime = os.path.getmtime(self.path)
+
+
+runtime_settings = RuntimeSettings()
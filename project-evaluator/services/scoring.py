@@ -0,0 +1,108 @@
+"""
+Scoring helpers shared by providers, routes and maintenance commands
+"""
+import hashlib
+import json
+from typing import Dict, Any
+
+# Project fields sent to the evaluation prompt
+EVALUABLE_FIELDS = ('titre', 'pvp', 'contexte', 'objectifs', 'fonctionnalites')
+
+CRITERIA = ('valeur_business', 'faisabilite_technique', 'effort_requis',
+            'niveau_risque', 'urgence', 'alignement_strategique')
+
+DEFAULT_PRIORITY_THRESHOLDS = {'high': 7.0, 'medium': 4.0}
+
+# Display text and recommended action per priority level
+PRIORITY_TEXTS = {
+    'élevée': 'Priorité Élevée',
+    'moyenne': 'Priorité Moyenne',
+    'faible': 'Priorité Faible',
+    'non-évalué': 'Non Évalué'
+}
+
+PRIORITY_ACTIONS = {
+    'élevée': 'Lancement immédiat',
+    'moyenne': 'Planification court terme',
+    'faible': 'Évaluation future',
+    'non-évalué': 'Évaluation requise'
+}
+
+PRIORITY_BADGES = {
+    'élevée': 'badge bg-danger',
+    'moyenne': 'badge bg-warning',
+    'faible': 'badge bg-success',
+    'non-évalué': 'badge bg-secondary'
+}
+
+# Criterion descriptions used in targeted (partial) evaluation prompts
+CRITERIA_DESCRIPTIONS = {
+    'valeur_business': "Valeur Business : Impact et ROI pour l'entreprise (1=faible, 10=très élevé)",
+    'faisabilite_technique': 'Faisabilité Technique : Complexité et maturité technologique (1=très difficile, 10=très faisable)',
+    'effort_requis': 'Effort Requis : Ressources et temps nécessaires (1=effort énorme, 10=effort minimal)',
+    'niveau_risque': 'Niveau de Risque : Risques techniques, légaux, éthiques (1=très risqué, 10=très sûr)',
+    'urgence': 'Urgence : Pression temporelle et opportunité (1=pas urgent, 10=très urgent)',
+    'alignement_strategique': 'Alignement Stratégique : Cohérence avec les objectifs (1=pas aligné, 10=parfaitement aligné)'
+}
+
+
+def compute_score_final(scores: Dict[str, float], weights: Dict[str, float]) -> float:
+    """
+    Compute the weighted final score
+
+    Args:
+        scores: Criterion scores (1-10)
+        weights: Evaluation criteria weights
+
+    Returns:
+        Final score rounded to 2 decimals
+    """
+    return round(sum(scores[criterion] * weights[criterion] for criterion in CRITERIA), 2)
+
+
+def content_hash(data: Dict[str, Any]) -> str:
+    """
+    Hash the evaluable fields of a project
+
+    Args:
+        data: Project data (dictionary with the EVALUABLE_FIELDS keys)
+
+    Returns:
+        SHA-256 hex digest
+    """
+    payload = json.dumps([(field, data.get(field) or '') for field in EVALUABLE_FIELDS],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def weights_fingerprint(weights: Dict[str, float]) -> str:
+    """
+    Fingerprint a set of evaluation weights
+
+    Args:
+        weights: Evaluation criteria weights
+
+    Returns:
+        Short hex digest identifying the weights
+    """
+    payload = json.dumps({criterion: float(weights[criterion]) for criterion in CRITERIA}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def priority_for_score(score_final: float, thresholds: Dict[str, float] = None) -> str:
+    """
+    Get the priority level of a final score
+
+    Args:
+        score_final: Weighted final score
+        thresholds: PRIORITY_THRESHOLDS ('high' and 'medium' lower bounds)
+
+    Returns:
+        'élevée', 'moyenne' or 'faible'
+    """
+    thresholds = thresholds or DEFAULT_PRIORITY_THRESHOLDS
+    if score_final >= thresholds['high']:
+        return 'élevée'
+    elif score_final >= thresholds['medium']:
+        return 'moyenne'
+    return 'faible'
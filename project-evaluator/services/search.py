@@ -0,0 +1,173 @@
+"""
+Server-side full-text search over projects
+SQLite uses an external-content FTS5 table kept in sync with `projects` by
+triggers, tokenized with unicode61 and remove_diacritics so "systeme" matches
+"Système". PostgreSQL uses a GIN index on an unaccented French tsvector.
+Other databases fall back to LIKE filters.
+"""
+import logging
+import re
+import time
+from typing import Dict, Any
+from flask import current_app
+from sqlalchemy import or_, text
+from sqlalchemy.exc import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ('titre', 'contexte', 'objectifs', 'fonctionnalites', 'defis_techniques')
+
+# bm25 column weights, in SEARCH_FIELDS order: title matches rank first
+FTS_WEIGHTS = (10.0, 2.0, 2.0, 2.0, 1.0)
+
+SQLITE_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE projects_fts USING fts5(
+        {', '.join(SEARCH_FIELDS)},
+        content='projects', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER projects_fts_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO projects_fts(rowid, {', '.join(SEARCH_FIELDS)})
+        VALUES (new.id, {', '.join('new.' + field for field in SEARCH_FIELDS)});
+    END""",
+    f"""CREATE TRIGGER projects_fts_delete AFTER DELETE ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, {', '.join(SEARCH_FIELDS)})
+        VALUES ('delete', old.id, {', '.join('old.' + field for field in SEARCH_FIELDS)});
+    END""",
+    f"""CREATE TRIGGER projects_fts_update AFTER UPDATE ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, {', '.join(SEARCH_FIELDS)})
+        VALUES ('delete', old.id, {', '.join('old.' + field for field in SEARCH_FIELDS)});
+        INSERT INTO projects_fts(rowid, {', '.join(SEARCH_FIELDS)})
+        VALUES (new.id, {', '.join('new.' + field for field in SEARCH_FIELDS)});
+    END""",
+    # Default ranking (ORDER BY rank) weights the columns like FTS_WEIGHTS
+    f"INSERT INTO projects_fts(projects_fts, rank) VALUES ('rank', 'bm25({', '.join(map(str, FTS_WEIGHTS))})')",
+    "INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')"
+]
+
+POSTGRES_DOCUMENT = (
+    "to_tsvector('french', f_unaccent("
+    + " || ' ' || ".join(f"coalesce({field}, '')" for field in SEARCH_FIELDS)
+    + "))"
+)
+
+POSTGRES_SCHEMA = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() is not IMMUTABLE, so it cannot be used in an index expression directly
+    """CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent', $1) $$""",
+    f"CREATE INDEX IF NOT EXISTS ix_projects_search ON projects USING GIN ({POSTGRES_DOCUMENT})"
+]
+
+
+def install_search(db) -> str:
+    """
+    Create the search index for the current database if it is missing
+
+    Args:
+        db: Flask-SQLAlchemy instance
+
+    Returns:
+        Search backend in use: 'fts5', 'postgresql' or 'like'
+    """
+    dialect = db.engine.dialect.name
+    try:
+        if dialect == 'sqlite':
+            exists = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'")
+            ).first()
+            if not exists:
+                for statement in SQLITE_SCHEMA:
+                    db.session.execute(text(statement))
+                db.session.commit()
+                logger.info("Created FTS5 search index for projects")
+            return 'fts5'
+        if dialect == 'postgresql':
+            for statement in POSTGRES_SCHEMA:
+                db.session.execute(text(statement))
+            db.session.commit()
+            return 'postgresql'
+    except DatabaseError as e:
+        # e.g. SQLite built without FTS5, or no permission to create the extension
+        db.session.rollback()
+        logger.warning(f"Full-text search index unavailable, falling back to LIKE: {e}")
+    return 'like'
+
+
+def _fts_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every word
+
+    The last word is matched as a prefix so results follow typing; short
+    prefixes match too many terms to rank quickly and are matched exactly.
+    """
+    words = re.findall(r'\w+', query)
+    terms = [f'"{word}"' for word in words]
+    if words and len(words[-1]) >= 3:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_projects(db, query: str, limit: int = 20) -> Dict[str, Any]:
+    """
+    Search projects by title, context, objectives, features and technical challenges
+
+    Args:
+        db: Flask-SQLAlchemy instance
+        query: Free-text query; every word must match
+        limit: Maximum number of results
+
+    Returns:
+        Dictionary with the matching projects, best match first
+    """
+    start = time.perf_counter()
+    backend = current_app.extensions.get('search_backend', 'like')
+
+    if backend == 'fts5':
+        match = _fts_query(query)
+        rows = db.session.execute(text(f"""
+            SELECT p.id, p.titre, p.pvp, m.snippet, m.rank
+            FROM (
+                SELECT rowid, rank, snippet(projects_fts, -1, '[', ']', '…', 12) AS snippet
+                FROM projects_fts
+                WHERE projects_fts MATCH :match
+                ORDER BY rank
+                LIMIT :limit
+            ) m
+            JOIN projects p ON p.id = m.rowid
+            ORDER BY m.rank
+        """), {'match': match, 'limit': limit}).all() if match else []
+        results = [{'id': row.id, 'titre': row.titre, 'pvp': row.pvp, 'snippet': row.snippet,
+                    'score': round(-row.rank, 4)} for row in rows]
+
+    elif backend == 'postgresql':
+        rows = db.session.execute(text(f"""
+            SELECT id, titre, pvp,
+                   ts_rank({POSTGRES_DOCUMENT}, websearch_to_tsquery('french', f_unaccent(:query))) AS rank
+            FROM projects
+            WHERE {POSTGRES_DOCUMENT} @@ websearch_to_tsquery('french', f_unaccent(:query))
+            ORDER BY rank DESC
+            LIMIT :limit
+        """), {'query': query, 'limit': limit}).all()
+        results = [{'id': row.id, 'titre': row.titre, 'pvp': row.pvp, 'snippet': None,
+                    'score': round(row.rank, 4)} for row in rows]
+
+    else:
+        from models import Project
+
+        filters = [
+            or_(*[getattr(Project, field).ilike(f'%{word}%') for field in SEARCH_FIELDS])
+            for word in re.findall(r'\w+', query)
+        ]
+        projects = Project.query.filter(*filters).order_by(Project.id.desc()).limit(limit).all() if filters else []
+        results = [{'id': p.id, 'titre': p.titre, 'pvp': p.pvp, 'snippet': None, 'score': None}
+                   for p in projects]
+
+    return {
+        'query': query,
+        'backend': backend,
+        'results': results,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+    }
+
@@ -0,0 +1,108 @@
+"""
+Production tuning profile for file-based SQLite databases
+configure() sizes the connection pool before the engine is created and
+init_app() applies the PRAGMAs to every new connection: WAL journaling so
+readers never block the writer, synchronous=NORMAL (durable at each WAL
+checkpoint), a busy timeout instead of immediate "database is locked" errors,
+memory-mapped reads and a larger page cache. In-memory databases are left alone.
+"""
+import logging
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SQLITE_PROFILE_ENABLED': True,
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_MMAP_SIZE_MB': 256,
+    'SQLITE_CACHE_SIZE_MB': 64,
+    'SQLITE_POOL_SIZE': 10,
+    'SQLITE_POOL_MAX_OVERFLOW': 10,
+    'SQLITE_POOL_TIMEOUT': 10
+}
+
+
+def is_file_database(uri):
+    """Whether the URI points to an SQLite database stored in a file"""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def _enabled(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    return app.config['SQLITE_PROFILE_ENABLED'] and is_file_database(app.config['SQLALCHEMY_DATABASE_URI'])
+
+
+def pragmas(config):
+    """
+    PRAGMA statements run on each new connection
+
+    Args:
+        config: Flask configuration mapping
+
+    Returns:
+        List of (name, value) pairs, in execution order
+    """
+    return [
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT_MS'])),
+        ('mmap_size', int(config['SQLITE_MMAP_SIZE_MB']) * 1024 * 1024),
+        # A negative cache_size is a size in KiB rather than a number of pages
+        ('cache_size', -int(config['SQLITE_CACHE_SIZE_MB']) * 1024),
+        ('temp_store', 'MEMORY')
+    ]
+
+
+def configure(app):
+    """
+    Size the connection pool; must run before db.init_app() creates the engine
+
+    Args:
+        app: Flask application
+    """
+    if not _enabled(app):
+        return
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    # Each request thread and evaluation worker holds one connection; WAL lets them read concurrently
+    options.setdefault('pool_size', app.config['SQLITE_POOL_SIZE'])
+    options.setdefault('max_overflow', app.config['SQLITE_POOL_MAX_OVERFLOW'])
+    options.setdefault('pool_timeout', app.config['SQLITE_POOL_TIMEOUT'])
+    # The driver's own lock wait, kept in line with busy_timeout
+    connect_args = options.setdefault('connect_args', {})
+    connect_args.setdefault('timeout', app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+
+
+def init_app(app, db):
+    """
+    Apply the PRAGMAs to every connection of the application's engine
+
+    Args:
+        app: Flask application
+        db: Flask-SQLAlchemy extension instance
+    """
+    if not _enabled(app):
+        return
+
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas(app.config)]
+    journal_mode = str(app.config['SQLITE_JOURNAL_MODE']).lower()
+
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                row = cursor.execute(statement).fetchone()
+                # journal_mode reports the mode actually in use (WAL is refused on some filesystems)
+                if statement.startswith('PRAGMA journal_mode') and row and row[0].lower() != journal_mode:
+                    logger.warning(f"SQLite journal_mode={row[0]} instead of {journal_mode}")
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'connect', _on_connect)
+    logger.info(f"SQLite profile applied to {engine.url.database}: {', '.join(statements)}")
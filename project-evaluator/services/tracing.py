@@ -0,0 +1,296 @@
+"""
+Lightweight span-based request tracing
+Follows an evaluation from the route through AIService, ProviderManager and
+each provider attempt, and exports finished traces to a local exporter
+(in-memory ring buffer or JSON lines file)
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .admin_auth import is_admin_request
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class Span:
+    """A timed unit of work inside a trace"""
+
+    def __init__(self, name: str, trace: 'Trace', parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = 'ok'
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+
+    def set_attribute(self, key: str, value: Any):
+        """Set a single span attribute"""
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        """Set several span attributes at once"""
+        self.attributes.update(attributes)
+
+    def record_error(self, error: Exception):
+        """Mark the span as failed"""
+        self.status = 'error'
+        self.attributes['error'] = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        """Close the span"""
+        if self.duration_ms is None:
+            self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert span to dictionary"""
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+
+class _NoopSpan:
+    """Span used when the current request is not sampled"""
+
+    span_id = None
+    attributes = {}
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def record_error(self, error: Exception):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Collects the spans of a single sampled request"""
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+
+
+class RingBufferExporter:
+    """Keeps the most recent traces in memory"""
+
+    def __init__(self, max_traces: int = 200):
+        self._traces = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Dict[str, Any]]):
+        with self._lock:
+            self._traces.append(spans)
+
+    def get_traces(self, limit: int = 50) -> List[List[Dict[str, Any]]]:
+        """Return the most recent traces, newest first"""
+        with self._lock:
+            traces = list(self._traces)
+        return list(reversed(traces))[:limit]
+
+
+class JsonLinesExporter(RingBufferExporter):
+    """Appends each span as a JSON line and keeps recent traces in memory"""
+
+    def __init__(self, path: str, max_traces: int = 200):
+        super().__init__(max_traces)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Dict[str, Any]]):
+        super().export(spans)
+        lines = ''.join(json.dumps(span, ensure_ascii=False, default=str) + '\n' for span in spans)
+        with self._lock:
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+            except OSError as e:
+                logger.error(f"Error writing trace file {self.path}: {e}")
+
+
+class Tracer:
+    """Creates spans and exports sampled traces"""
+
+    def __init__(self, sample_rate: float = 0.0, exporter=None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter or RingBufferExporter()
+        self.enabled = True
+
+    def init_app(self, app):
+        """
+        Configure the tracer from Flask config and trace every request
+
+        Args:
+            app: Flask application
+        """
+        app.config.setdefault('TRACING_ENABLED', True)
+        app.config.setdefault('TRACE_SAMPLE_RATE', 0.05)
+        app.config.setdefault('TRACE_EXPORTER', 'memory')
+        if not app.config.get('TRACE_FILE'):
+            app.config['TRACE_FILE'] = os.path.join(app.instance_path, 'traces.jsonl')
+        app.config.setdefault('TRACE_BUFFER_SIZE', 200)
+
+        self.enabled = app.config['TRACING_ENABLED']
+        self.sample_rate = app.config['TRACE_SAMPLE_RATE']
+        if app.config['TRACE_EXPORTER'] == 'jsonl':
+            self.exporter = JsonLinesExporter(app.config['TRACE_FILE'], app.config['TRACE_BUFFER_SIZE'])
+        else:
+            self.exporter = RingBufferExporter(app.config['TRACE_BUFFER_SIZE'])
+
+        if not self.enabled:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+        if not event.contains(Session, 'before_commit', self._before_commit):
+            event.listen(Session, 'before_commit', self._before_commit)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def start_trace(self, name: str, force: bool = False, **attributes):
+        """
+        Start a root span if the trace is sampled
+
+        Args:
+            name: Root span name
+            force: Sample regardless of the configured rate
+
+        Returns:
+            Root span, or the no-op span when not sampled
+        """
+        if not self.enabled or not (force or random.random() < self.sample_rate):
+            return NOOP_SPAN
+
+        span = Span(name, Trace(), attributes=attributes)
+        span.trace.spans.append(span)
+        span._token = _current_span.set(span)
+        return span
+
+    def finish_trace(self, span):
+        """End a root span and export its trace"""
+        if span is NOOP_SPAN:
+            return
+        span.end()
+        try:
+            _current_span.reset(span._token)
+        except ValueError:
+            _current_span.set(None)
+        try:
+            self.exporter.export([s.to_dict() for s in span.trace.spans])
+        except Exception as e:
+            logger.error(f"Error exporting trace: {e}")
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Context manager creating a child span of the current span
+
+        Args:
+            name: Span name
+            **attributes: Initial span attributes
+        """
+        parent = _current_span.get()
+        if parent is None:
+            yield NOOP_SPAN
+            return
+
+        span = Span(name, parent.trace, parent.span_id, attributes)
+        parent.trace.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end()
+            _current_span.reset(token)
+
+    def current_span(self):
+        """Return the active span (or the no-op span)"""
+        return _current_span.get() or NOOP_SPAN
+
+    def _before_commit(self, session):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        span = Span('db.commit', parent.trace, parent.span_id)
+        parent.trace.spans.append(span)
+        session.info['trace_commit_span'] = span
+
+    def _after_commit(self, session):
+        span = session.info.pop('trace_commit_span', None)
+        if span is not None:
+            span.end()
+
+    def _after_rollback(self, session):
+        span = session.info.pop('trace_commit_span', None)
+        if span is not None:
+            span.status = 'error'
+            span.set_attribute('rolled_back', True)
+            span.end()
+
+    def _start_request(self):
+        # Admins can force sampling of a single request
+        force = request.headers.get('X-Trace') == '1' and is_admin_request()
+        g.trace_span = self.start_trace(
+            'http.request',
+            force=force,
+            method=request.method,
+            path=request.path,
+            endpoint=request.endpoint
+        )
+
+    def _finish_request(self, response):
+        span = g.get('trace_span')
+        if span is not None and span is not NOOP_SPAN:
+            span.set_attributes(status_code=response.status_code,
+                                response_bytes=response.calculate_content_length())
+            response.headers['X-Trace-Id'] = span.trace.trace_id
+        return response
+
+    def _teardown_request(self, error=None):
+        span = g.pop('trace_span', None)
+        if span is None:
+            return
+        if error is not None:
+            span.record_error(error)
+        self.finish_trace(span)
+
+
+tracer = Tracer()
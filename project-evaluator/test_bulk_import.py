@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk project import and background evaluation
+Run with: python -m pytest test_bulk_import.py
+"""
+import io
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db, Project, Evaluation, LeaderboardEntry
+from services.ai_service import AIService
+from services.evaluation_queue import evaluation_queue
+
+SCORES = {'valeur_business': 8, 'faisabilite_technique': 7, 'effort_requis': 6,
+          'niveau_risque': 7, 'urgence': 5, 'alignement_strategique': 9}
+
+
+class ImportConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVALUATION_QUEUE_WORKERS = 0
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(AIService, '__init__', lambda self: None)
+    monkeypatch.setattr(AIService, 'evaluate_project', lambda self, data: {
+        'scores': SCORES, 'score_final': 7.0, 'suggestions': {}, 'defis_techniques': ['Intégration'],
+        'duree_estimee': 60, 'metadata': {'model': 'test', 'prompt_version': '1.0'}
+    })
+    app = create_app(ImportConfig)
+    yield app
+    # The queue is module state; empty it between tests
+    with app.app_context():
+        evaluation_queue.drain()
+
+
+def project(titre, contexte='c' * 100):
+    return {'titre': titre, 'pvp': 'Opérations', 'contexte': contexte,
+            'objectifs': 'o' * 100, 'fonctionnalites': 'f' * 100}
+
+
+def test_ndjson_import_validates_and_queues(app):
+    lines = [json.dumps(project('Import A')), json.dumps(project('Import B', contexte='trop court')),
+             'pas du json', json.dumps(project('Import C'))]
+    response = app.test_client().post('/api/projects/import?format=ndjson', data='\n'.join(lines))
+    result = response.get_json()
+
+    assert response.status_code == 202
+    assert (result['imported'], result['queued'], result['rejected']) == (2, 2, 2)
+    assert [error['line'] for error in result['errors']] == [2, 3]
+
+    with app.app_context():
+        assert evaluation_queue.depth == 2
+        assert evaluation_queue.drain() == 2
+        imported = Project.query.filter(Project.titre.like('Import%')).all()
+        assert {p.titre for p in imported} == {'Import A', 'Import C'}
+        assert LeaderboardEntry.query.filter(LeaderboardEntry.project_id.in_([p.id for p in imported])).count() == 2
+
+
+def test_csv_upload(app):
+    header = ','.join(project('x'))
+    rows = [','.join(project(f'CSV {i}').values()) for i in range(3)]
+    upload = (io.BytesIO('\n'.join([header] + rows).encode('utf-8')), 'projets.csv')
+    response = app.test_client().post('/api/projects/import', data={'file': upload},
+                                      content_type='multipart/form-data')
+
+    assert response.status_code == 202
+    assert response.get_json()['imported'] == 3
+
+
+def test_enqueue_unevaluated_ignores_the_leaderboard(app):
+    with app.app_context():
+        db.session.add(Evaluation(project_id=1, score_final=7.0, **SCORES))
+        db.session.commit()
+        # A stale leaderboard row must not make an evaluated project look unevaluated
+        LeaderboardEntry.query.filter_by(project_id=1).delete()
+        db.session.commit()
+        assert evaluation_queue.enqueue_unevaluated() == 2
+        assert list(evaluation_queue._queue.queue) == [2, 3]
+
+
+def test_create_project_uses_same_validation(app):
+    response = app.test_client().post('/api/projects', json=project('Court', contexte='court'))
+    assert response.status_code == 400
+    assert 'contexte' in response.get_json()['error']
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the cheap-model evaluation cascade
+Run with: python -m pytest test_cascade.py
+"""
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from services.ai_service import AIService
+from services.providers.openai_provider import OpenAIProvider
+
+CHEAP_MODEL = 'gpt-4.1-mini-2025-04-14'
+FULL_MODEL = 'gpt-4.1-2025-04-14'
+CRITERIA = ['valeur_business', 'faisabilite_technique', 'effort_requis',
+            'niveau_risque', 'urgence', 'alignement_strategique']
+PROJECT = {'titre': 'Projet', 'pvp': 'Opérations', 'contexte': 'c' * 120,
+           'objectifs': 'o' * 120, 'fonctionnalites': 'f' * 120}
+
+
+class CascadeConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVALUATION_CASCADE_ENABLED = True
+    EVALUATION_QUEUE_WORKERS = 0
+    ROUTING_POLICY = 'static'
+
+
+def _response(score=9.0, confidence=0.9, missing=()):
+    return {
+        'scores': {criterion: score for criterion in CRITERIA if criterion not in missing},
+        'suggestions': {criterion: 'Suggestion' for criterion in CRITERIA},
+        'defis_techniques': ['Défi'], 'duree_estimee': 60, 'confiance': confidence
+    }
+
+
+@pytest.fixture
+def app(tmp_path):
+    CascadeConfig.RUNTIME_SETTINGS_FILE = str(tmp_path / 'runtime_settings.json')
+    app = create_app(CascadeConfig)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def service():
+    return AIService({'default_provider': 'openai', 'default_model': FULL_MODEL,
+                      'enable_fallback': True, 'fallback_order': ['openai'],
+                      'openai': {'api_key': 'sk-test'}})
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Models called, in order; responses are looked up per model"""
+    class Calls(list):
+        pass
+
+    calls = Calls()
+    responses = {FULL_MODEL: _response(score=2.0, confidence=0.95)}
+
+    def complete(self, model, system_message, user_prompt, parameters):
+        calls.append(model)
+        response = responses[model]
+        if isinstance(response, Exception):
+            raise response
+        return json.dumps(response), {'input_tokens': 10, 'output_tokens': 10}
+
+    monkeypatch.setattr(OpenAIProvider, '_complete', complete)
+    calls.responses = responses
+    return calls
+
+
+@pytest.mark.parametrize('result,missing,expected', [
+    (None, None, 'invalid'),
+    ({'score_final': 9.0, 'confiance': 0.9}, ['urgence'], 'invalid'),
+    ({'score_final': 7.2, 'confiance': 0.9}, None, 'near_threshold'),
+    ({'score_final': 4.4, 'confiance': 0.9}, None, 'near_threshold'),
+    ({'score_final': 9.0, 'confiance': 0.5}, None, 'low_confidence'),
+    ({'score_final': 9.0}, None, 'low_confidence'),
+    ({'score_final': 9.0, 'confiance': 'élevée'}, None, 'low_confidence'),
+    ({'score_final': 9.0, 'confiance': 0.7}, [], None),
+])
+def test_escalation_reason(app, service, result, missing, expected):
+    assert service._get_escalation_reason(result, missing) == expected
+
+
+def test_confident_cheap_evaluation_is_accepted(app, service, calls):
+    calls.responses[CHEAP_MODEL] = _response(score=9.0, confidence=0.9)
+    result = service.evaluate_project(PROJECT)
+    assert calls == [CHEAP_MODEL]
+    assert result['score_final'] == 9.0
+    assert result['metadata']['model'] == CHEAP_MODEL
+
+
+@pytest.mark.parametrize('cheap', [
+    _response(score=9.0, confidence=0.4),
+    _response(score=9.0, confidence=0.9, missing=('urgence',)),
+    RuntimeError('timeout')
+], ids=['low_confidence', 'missing_scores', 'stage_failure'])
+def test_cheap_evaluation_is_escalated(app, service, calls, cheap):
+    calls.responses[CHEAP_MODEL] = cheap
+    result = service.evaluate_project(PROJECT)
+    assert calls == [CHEAP_MODEL, FULL_MODEL]
+    assert result['score_final'] == 2.0
+    assert result['metadata']['model'] == FULL_MODEL
+
+
+def test_cheap_model_keeps_system_message_and_temperature(monkeypatch):
+    sent = {}
+
+    class Completions:
+        def create(self, **kwargs):
+            sent.clear()
+            sent.update(kwargs)
+            raise RuntimeError('stop')
+
+    provider = OpenAIProvider({'api_key': 'sk-test'})
+    monkeypatch.setattr(provider.client.chat, 'completions', Completions())
+    for model, reasoning in ((CHEAP_MODEL, False), ('o4-mini-2025-04-16', True), ('o3-2025-04-16', True)):
+        with pytest.raises(RuntimeError):
+            provider._complete(model, 'Système', 'Projet', {'temperature': 0.3})
+        assert (sent['messages'][0]['role'] == 'system') is not reasoning
+        assert ('temperature' in sent) is not reasoning
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for delta synchronization (/api/changes) and project deletion
+Run with: python -m pytest test_changes.py
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db, Project, Evaluation, ProjectTombstone
+from services.changes import purge_tombstones
+from services.rescoring import rescore_evaluations
+from services.scoring import CRITERIA
+
+
+class ChangesConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVALUATION_QUEUE_WORKERS = 0
+    CHANGES_CURSOR_LAG = 0
+
+
+@pytest.fixture
+def app():
+    app = create_app(ChangesConfig)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _changes(client, cursor=None):
+    response = client.get('/api/changes', query_string={'since': cursor} if cursor else {})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _touch(project_id, **values):
+    time.sleep(0.01)  # Distinct timestamps on either side of a cursor
+    project = db.session.get(Project, project_id)
+    for name, value in values.items():
+        setattr(project, name, value)
+    db.session.commit()
+
+
+def test_full_sync_then_incremental(client):
+    full = _changes(client)
+    assert full['since'] is None
+    assert sorted(p['id'] for p in full['projects']) == [1, 2, 3]
+
+    # Nothing happened since the cursor
+    cursor = full['cursor']
+    time.sleep(0.01)
+    assert _changes(client, cursor)['projects'] == []
+
+    _touch(2, titre='Titre modifié')
+    db.session.add(Evaluation(project_id=2, score_final=7.0, **{c: 7.0 for c in CRITERIA}))
+    db.session.commit()
+    delta = _changes(client, cursor)
+    assert [p['id'] for p in delta['projects']] == [2]
+    assert delta['projects'][0]['titre'] == 'Titre modifié'
+    assert [e['project_id'] for e in delta['evaluations']] == [2]
+    assert delta['deleted'] == []
+
+
+def test_rescored_projects_appear_in_the_feed(app, client):
+    for project_id, alignment in ((1, 5.0), (2, 9.0)):
+        scores = dict({c: 5.0 for c in CRITERIA}, alignement_strategique=alignment)
+        db.session.add(Evaluation(project_id=project_id, score_final=5.0, **scores))
+    db.session.commit()
+    cursor = _changes(client)['cursor']
+    time.sleep(0.01)
+
+    # The bulk UPDATE bypasses the session, yet the new scores must reach syncing clients
+    weights = {c: 1.0 if c == 'alignement_strategique' else 0.0 for c in CRITERIA}
+    assert rescore_evaluations(weights)['updated'] == 2
+    delta = _changes(client, cursor)
+    assert {p['id']: p['evaluation']['score_final'] for p in delta['projects']} == {1: 5.0, 2: 9.0}
+
+
+def test_cursor_lags_behind_the_current_time(app, client):
+    app.config['CHANGES_CURSOR_LAG'] = 60
+    first = _changes(client)
+    assert datetime.fromisoformat(first['cursor']) <= datetime.utcnow() - timedelta(seconds=59)
+
+    # A write just before a sync is returned again by the next one: clients apply changes by ID
+    _touch(1, titre='Déjà vu')
+    delta = _changes(client, first['cursor'])
+    assert 1 in [p['id'] for p in delta['projects']]
+    assert 1 in [p['id'] for p in _changes(client, delta['cursor'])['projects']]
+
+
+def test_delete_records_a_tombstone(client):
+    cursor = _changes(client)['cursor']
+    time.sleep(0.01)
+
+    response = client.delete('/api/projects/3')
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+    assert client.get('/api/projects/3').status_code == 404
+    assert client.delete('/api/projects/3').status_code == 404
+    assert Evaluation.query.filter_by(project_id=3).count() == 0
+
+    delta = _changes(client, cursor)
+    assert delta['deleted'] == [3]
+    assert delta['projects'] == []
+    assert 3 not in [p['id'] for p in _changes(client)['projects']]
+
+
+def test_expired_and_malformed_cursors(app, client):
+    expired = (datetime.utcnow() - timedelta(days=app.config['CHANGES_TOMBSTONE_RETENTION_DAYS'] + 1)).isoformat()
+    assert client.get('/api/changes', query_string={'since': expired}).status_code == 410
+    assert client.get('/api/changes', query_string={'since': 'hier'}).status_code == 400
+
+
+def test_old_tombstones_are_purged(app, client):
+    client.delete('/api/projects/3')
+    db.session.get(ProjectTombstone, 3).deleted_at -= timedelta(days=app.config['CHANGES_TOMBSTONE_RETENTION_DAYS'] + 1)
+    db.session.commit()
+
+    assert purge_tombstones() == 1
+    db.session.commit()
+    assert ProjectTombstone.query.count() == 0
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for the server-sent events broker and /api/events
+Run with: python -m pytest test_events.py
+"""
+import os
+import queue
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db, Project, Evaluation
+from services.events import event_broker, _lagged_now
+from services.rescoring import rescore_evaluations
+
+SCORES = {'valeur_business': 8.0, 'faisabilite_technique': 6.0, 'effort_requis': 5.0,
+          'niveau_risque': 7.0, 'urgence': 4.0, 'alignement_strategique': 9.0}
+
+
+class EventsConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVALUATION_QUEUE_WORKERS = 0
+    CHANGES_CURSOR_LAG = 0
+    EVENTS_POLL_INTERVAL = 0.05
+    SSE_BULK_THRESHOLD = 3
+
+
+def _app(backend, **settings):
+    app = create_app(type('Config', (EventsConfig,), dict(EVENTS_BACKEND=backend, **settings)))
+    with app.app_context():
+        yield app
+        poller = event_broker._poller
+        for subscriber in list(event_broker._subscribers):
+            event_broker.unsubscribe(subscriber)
+        if poller is not None:
+            poller.join()  # Stops on its next poll; the next test gets a poller on its own database
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def local_app():
+    yield from _app('local')
+
+
+@pytest.fixture
+def changes_app(tmp_path):
+    # A file database: the poller thread uses its own connection
+    yield from _app('changes', SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'projects.db'}")
+
+
+def _add_project(titre='Nouveau projet'):
+    project = Project(titre=titre, pvp='Opérations', contexte='Contexte', objectifs='Objectifs',
+                      fonctionnalites='Fonctionnalités')
+    db.session.add(project)
+    db.session.commit()
+    return project
+
+
+def _drain(subscriber, timeout=0.0):
+    messages = []
+    while True:
+        try:
+            messages.append(subscriber.get(timeout=timeout))
+        except queue.Empty:
+            return messages
+
+
+def test_local_events_are_published_on_commit_only(local_app):
+    subscriber = event_broker.subscribe()
+    db.session.add(Project(titre='Annulé', pvp='Opérations', contexte='c', objectifs='o', fonctionnalites='f'))
+    db.session.flush()
+    db.session.rollback()
+    assert _drain(subscriber) == []
+
+    project = _add_project()
+    db.session.add(Evaluation(project_id=project.id, score_final=7.5, **SCORES))
+    db.session.commit()
+    db.session.delete(project)
+    db.session.commit()
+    messages = _drain(subscriber)
+    assert [event_type for _, event_type, _ in messages] == ['project_created', 'evaluation', 'project_deleted']
+    assert messages[1][2]['score_final'] == 7.5
+
+    # A reconnecting client gets what it missed after its Last-Event-ID
+    replayed = _drain(event_broker.subscribe(last_event_id=messages[0][0]))
+    assert replayed == messages[1:]
+
+
+def test_bulk_commit_is_coalesced_into_a_refresh(local_app):
+    subscriber = event_broker.subscribe()
+    db.session.add_all(Project(titre=f'Projet {i}', pvp='Opérations', contexte='c', objectifs='o',
+                               fonctionnalites='f') for i in range(5))
+    db.session.commit()
+    assert [message[1:] for message in _drain(subscriber)] == [('refresh', {'changes': 5})]
+
+
+def test_stalled_subscriber_gets_a_refresh_instead_of_being_dropped(local_app):
+    subscriber = event_broker.subscribe()
+    for i in range(event_broker.queue_size + 10):
+        event_broker.publish('evaluation', {'id': i})
+    assert subscriber in event_broker._subscribers
+    assert [event_type for _, event_type, _ in _drain(subscriber)] == ['refresh']
+
+    event_broker.publish('evaluation', {'id': 0})
+    assert _drain(subscriber)[0][1] == 'evaluation'
+
+
+def test_change_feed_events(changes_app):
+    since = _lagged_now()
+    project = _add_project()
+    evaluated = db.session.get(Project, 1)
+    db.session.add(Evaluation(project_id=1, score_final=9.1, **SCORES))
+    db.session.delete(db.session.get(Project, 2))
+    db.session.commit()
+
+    seen = {}
+    cursor, events = event_broker._read_changes(since, seen)
+    by_type = {event_type: data for _, event_type, data in events}
+    assert set(by_type) == {'project_created', 'evaluation', 'project_deleted'}
+    assert by_type['project_created']['id'] == project.id
+    assert (by_type['evaluation']['id'], by_type['evaluation']['score_final']) == (evaluated.id, 9.1)
+    assert by_type['project_deleted'] == {'id': 2}
+
+    # Changes already sent are not repeated by the next, overlapping, poll
+    assert event_broker._read_changes(since, seen)[1] == []
+
+    # A client resuming from an event ID replays from the cursor it encodes
+    replayed = _drain(event_broker.subscribe(last_event_id=events[0][0]))
+    assert sorted(message[1] for message in replayed) == sorted(by_type)
+
+
+def test_poller_streams_commits_of_any_worker(changes_app):
+    subscriber = event_broker.subscribe()
+    assert event_broker._poller is not None
+
+    # Committed through the database only: what another worker process would do
+    project = _add_project()
+    messages = _drain(subscriber, timeout=1.0)
+    assert [(event_type, data['id']) for _, event_type, data in messages] == [('project_created', project.id)]
+
+    # Bulk rescoring moves the projects in the feed: their rows are patched with the new score
+    db.session.add(Evaluation(project_id=project.id, score_final=5.0, **SCORES))
+    db.session.commit()
+    _drain(subscriber, timeout=0.5)
+    rescore_evaluations({criterion: 1.0 if criterion == 'urgence' else 0.0 for criterion in SCORES})
+    messages = _drain(subscriber, timeout=0.5)
+    assert [(event_type, data['id'], data['score_final']) for _, event_type, data in messages] == \
+        [('evaluation', project.id, SCORES['urgence'])]
+
+    # The poller stops with the last stream
+    poller = event_broker._poller
+    event_broker.unsubscribe(subscriber)
+    poller.join(timeout=1.0)
+    assert not poller.is_alive() and event_broker._poller is None
+
+
+def test_stream_route(local_app):
+    client = local_app.test_client()
+    local_app.config['SSE_STREAM_MAX_AGE'] = 0.1
+    event_broker.publish('evaluation', {'id': 1})
+
+    response = client.get('/api/events')
+    frames = response.get_data(as_text=True)
+    assert response.mimetype == 'text/event-stream'
+    # The first frame carries the resume position; the stream closes after SSE_STREAM_MAX_AGE
+    assert frames.startswith('retry: 3000\nid: ')
+    assert event_broker.subscriber_count == 0
+
+    local_app.config['SSE_MAX_SUBSCRIBERS'] = 1
+    event_broker.subscribe()
+    response = client.get('/api/events')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '60'
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming portfolio export
+Run with: python -m pytest test_export.py
+"""
+import csv
+import io
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db, Evaluation
+from services import export
+
+
+class ExportConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(export, 'BATCH_SIZE', 2)
+    app = create_app(ExportConfig)
+    with app.app_context():
+        for score in (6.0, 8.0):
+            db.session.add(Evaluation(project_id=1, valeur_business=score, faisabilite_technique=score,
+                                      effort_requis=score, niveau_risque=score, urgence=score,
+                                      alignement_strategique=score, score_final=score))
+        db.session.commit()
+    return app.test_client()
+
+
+def test_ndjson_has_latest_evaluation_per_project(client):
+    response = client.get('/api/export')
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert response.mimetype == 'application/x-ndjson'
+    assert [row['project_id'] for row in rows] == [1, 2, 3]
+    assert rows[0]['score_final'] == 8.0
+    assert rows[1]['score_final'] is None
+
+
+def test_csv_history_has_every_evaluation(client):
+    response = client.get('/api/export?format=csv&history=true')
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['score_final'] for row in rows] == ['6.0', '8.0']
+    assert 'projets-historique.csv' in response.headers['Content-Disposition']
+
+
+def test_unknown_format_is_rejected(client):
+    assert client.get('/api/export?format=xml').status_code == 400
+
+
+def test_columnar_formats_need_pyarrow(client, monkeypatch):
+    monkeypatch.setattr(export, 'pa', None)
+    assert client.get('/api/export?format=parquet').status_code == 501
+
+
+@pytest.mark.parametrize('export_format', ['parquet', 'arrow'])
+def test_columnar_export(client, export_format):
+    pa = pytest.importorskip('pyarrow')
+    response = client.get(f'/api/export?format={export_format}&history=true')
+    assert response.status_code == 200
+    data = io.BytesIO(response.get_data())
+    if export_format == 'parquet':
+        table = pytest.importorskip('pyarrow.parquet').read_table(data)
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    assert table.column('score_final').to_pylist() == [6.0, 8.0]
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
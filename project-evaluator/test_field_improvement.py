@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the batched field improvement (/api/improve-fields)
+Run with: python -m pytest test_field_improvement.py
+"""
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from services.providers.azure_provider import AzureProvider
+from services.providers.openai_provider import OpenAIProvider
+
+FIELDS = {'contexte': 'Contexte actuel', 'objectifs': 'Objectifs actuels',
+          'fonctionnalites': 'Fonctionnalités actuelles'}
+
+
+class ImprovementConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVALUATION_QUEUE_WORKERS = 0
+    ROUTING_POLICY = 'static'
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Providers called, in order; answers are looked up per provider"""
+    class Calls(list):
+        pass
+
+    calls = Calls()
+    calls.answers = {}
+
+    def stub(name):
+        def complete(self, model, system_message, user_prompt, parameters):
+            calls.append(name)
+            answer = calls.answers.get(name, RuntimeError('unavailable'))
+            if isinstance(answer, Exception):
+                raise answer
+            return answer if isinstance(answer, str) else json.dumps(answer), {}
+        return complete
+
+    monkeypatch.setattr(OpenAIProvider, '_complete', stub('openai'))
+    monkeypatch.setattr(AzureProvider, '_complete', stub('azure'))
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    monkeypatch.setenv('AZURE_OPENAI_API_KEY', 'azure-test')
+    monkeypatch.setenv('AZURE_OPENAI_ENDPOINT', 'https://test.openai.azure.com')
+    monkeypatch.setenv('DEFAULT_AI_PROVIDER', 'openai')
+    for name in ('ANTHROPIC_API_KEY', 'GOOGLE_API_KEY', 'GOOGLE_PROJECT_ID', 'DATABRICKS_HOST', 'DATABRICKS_TOKEN'):
+        monkeypatch.delenv(name, raising=False)
+    return calls
+
+
+@pytest.fixture
+def client(tmp_path, calls):
+    config = type('Config', (ImprovementConfig,), {'RUNTIME_SETTINGS_FILE': str(tmp_path / 'settings.json')})
+    return create_app(config).test_client()
+
+
+def _improve(client, fields=FIELDS):
+    return client.post('/api/improve-fields', json={'fields': fields, 'project_context': 'Titre: Projet'})
+
+
+@pytest.mark.parametrize('fields', [{}, ['contexte'], {'budget': 'Cent mille dollars'},
+                                    {'contexte': '   '}], ids=['empty', 'not_an_object', 'unknown', 'blank'])
+def test_invalid_field_sets_are_rejected(client, calls, fields):
+    response = _improve(client, fields)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert calls == []
+
+
+def test_partial_improvement_flags_each_field(client, calls):
+    # Wrapped or not, blank and missing answers keep the original content
+    calls.answers['openai'] = {'ameliorations': {'contexte': '  Contexte amélioré  ', 'objectifs': ' '}}
+    data = _improve(client).get_json()
+    assert calls == ['openai']
+    assert data['fields']['contexte'] == {'original_content': 'Contexte actuel',
+                                          'improved_content': 'Contexte amélioré', 'improved': True}
+    for name in ('objectifs', 'fonctionnalites'):
+        assert data['fields'][name] == {'original_content': FIELDS[name],
+                                        'improved_content': FIELDS[name], 'improved': False}
+
+    calls.clear()
+    calls.answers['openai'] = '```json\n' + json.dumps({'objectifs': 'Objectifs mesurables'}) + '\n```'
+    data = _improve(client).get_json()
+    assert [name for name, field in data['fields'].items() if field['improved']] == ['objectifs']
+
+
+@pytest.mark.parametrize('first', ['Pas du JSON', {'ameliorations': dict(FIELDS)}, RuntimeError('timeout')],
+                         ids=['invalid_json', 'nothing_improved', 'error'])
+def test_falls_back_to_the_next_provider(client, calls, first):
+    calls.answers['openai'] = first
+    calls.answers['azure'] = {'ameliorations': {'fonctionnalites': 'Fonctionnalités détaillées'}}
+    data = _improve(client).get_json()
+    assert calls == ['openai', 'azure']
+    assert data['fields']['fonctionnalites']['improved_content'] == 'Fonctionnalités détaillées'
+    assert [name for name, field in data['fields'].items() if field['improved']] == ['fonctionnalites']
+
+
+def test_original_content_when_every_provider_fails(client, calls):
+    calls.answers['openai'] = 'Pas du JSON'
+    response = _improve(client)
+    assert response.status_code == 200
+    assert calls == ['openai', 'azure']
+    assert {name: field['improved_content'] for name, field in response.get_json()['fields'].items()} == FIELDS
+    assert not any(field['improved'] for field in response.get_json()['fields'].values())
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the orjson response provider and the parsing of JSON columns
+Run with: python -m pytest test_json_provider.py
+"""
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from config import Config
+from models import db, Evaluation
+from services import json_provider
+
+SCORES = {'valeur_business': 8.0, 'faisabilite_technique': 6.0, 'effort_requis': 5.0,
+          'niveau_risque': 7.0, 'urgence': 4.0, 'alignement_strategique': 9.0}
+
+
+class JSONConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVALUATION_QUEUE_WORKERS = 0
+
+
+@pytest.fixture
+def app():
+    pytest.importorskip('orjson')
+    app = create_app(JSONConfig)
+    with app.app_context():
+        yield app
+
+
+@pytest.mark.parametrize('obj', [
+    {'created_at': datetime(2026, 10, 19, 8, 30)},
+    {1: 'un', 2.5: 'deux et demi'},
+    {'titre': 'Évaluation', 'scores': [8.0, None, True]},
+], ids=['datetime', 'non_str_keys', 'unicode'])
+def test_same_output_as_the_default_provider(app, obj):
+    assert isinstance(app.json, json_provider.OrjsonProvider)
+    assert json.loads(app.json.dumps(obj)) == json.loads(DefaultJSONProvider(app).dumps(obj))
+
+
+def test_unsupported_arguments_fall_back_to_the_json_module(app):
+    obj = {'b': 1, 'a': 'é'}
+    assert app.json.dumps(obj, indent=2) == json.dumps(obj, indent=2, ensure_ascii=False)
+    assert app.json.loads('{"a": 1.5}', parse_float=str) == {'a': '1.5'}
+
+    app.debug = True
+    with app.test_request_context():
+        assert app.json.response(obj).get_data() == b'{\n  "b": 1,\n  "a": "\xc3\xa9"\n}\n'
+
+
+def test_missing_orjson_is_reported(monkeypatch, caplog):
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    with caplog.at_level(logging.WARNING, logger='services.json_provider'):
+        app = create_app(JSONConfig)
+    assert not isinstance(app.json, json_provider.OrjsonProvider)
+    assert 'orjson package is not installed' in caplog.text
+
+
+def test_json_column_cache_follows_assignments(app):
+    evaluation = Evaluation(project_id=1, score_final=7.0, **SCORES)
+    evaluation.set_suggestions({'urgence': 'Avant'})
+    first = evaluation.get_suggestions()
+    assert evaluation.get_suggestions() is first  # Parsed once while the column is unchanged
+
+    evaluation.set_suggestions({'urgence': 'Après'})
+    assert evaluation.get_suggestions() == {'urgence': 'Après'}
+    evaluation.ai_suggestions = None
+    assert evaluation.get_suggestions() == {}
+    evaluation.ai_suggestions = 'pas du JSON'
+    assert evaluation.get_suggestions() == {}
+
+    # Values reloaded from the database are parsed again
+    evaluation.set_suggestions({'urgence': 'Stockée'})
+    db.session.add(evaluation)
+    db.session.commit()
+    db.session.expire(evaluation)
+    assert evaluation.get_suggestions() == {'urgence': 'Stockée'}
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
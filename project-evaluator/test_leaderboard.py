@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the incrementally maintained leaderboard
+Run with: python -m pytest test_leaderboard.py
+"""
+import os
+import random
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db, Project, Evaluation
+from services.leaderboard import check_leaderboard
+from services.scoring import CRITERIA
+
+DEPARTMENTS = ['Opérations', 'Finance et Comptabilité', 'Ressources Humaines']
+
+
+class LeaderboardConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVALUATION_QUEUE_WORKERS = 0
+
+
+@pytest.fixture
+def app():
+    app = create_app(LeaderboardConfig)
+    with app.app_context():
+        yield app
+
+
+def _evaluate(project_id, score):
+    db.session.add(Evaluation(project_id=project_id, score_final=score, **{c: score for c in CRITERIA}))
+
+
+def test_incremental_changes_stay_consistent(app):
+    rng = random.Random(38)
+    for i in range(30):
+        db.session.add(Project(titre=f'Projet {i}', pvp=rng.choice(DEPARTMENTS), contexte='c' * 100,
+                               objectifs='o' * 100, fonctionnalites='f' * 100))
+    db.session.commit()
+
+    for step in range(150):
+        project_ids = [id for (id,) in db.session.query(Project.id)]
+        action = rng.random()
+        if action < 0.6:
+            # Ties on score are frequent: ranks then follow project IDs
+            _evaluate(rng.choice(project_ids), rng.choice([2.0, 4.5, 5.0, 7.5, 9.0, round(rng.uniform(1, 10), 2)]))
+        elif action < 0.85:
+            db.session.get(Project, rng.choice(project_ids)).pvp = rng.choice(DEPARTMENTS)
+        else:
+            db.session.delete(db.session.get(Project, rng.choice(project_ids)))
+        db.session.commit()
+        result = check_leaderboard()
+        assert result['consistent'], f"step {step}: {result['mismatches']}"
+
+
+def test_percentile_is_computed_on_read(app):
+    for score in (9.0, 6.0, 3.0):
+        _evaluate(db.session.get(Project, int(score // 3)).id, score)
+    db.session.commit()
+    client = app.test_client()
+
+    entries = client.get('/api/leaderboard').get_json()['entries']
+    assert [(e['rank'], e['percentile']) for e in entries] == [(1, 100.0), (2, 66.7), (3, 33.3)]
+
+    # A new project at the bottom moves every percentile without rewriting any row
+    db.session.add(Project(titre='Nouveau', pvp='Opérations', contexte='c' * 100,
+                           objectifs='o' * 100, fonctionnalites='f' * 100))
+    db.session.flush()
+    _evaluate(Project.query.filter_by(titre='Nouveau').one().id, 1.0)
+    db.session.commit()
+    rank = client.get('/api/projects/1/rank').get_json()
+    assert (rank['rank'], rank['total_projects'], rank['percentile']) == (3, 4, 50.0)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus-style metrics registry
+Run with: python -m pytest test_metrics.py
+"""
+import json
+import os
+import sys
+import threading
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.metrics import MetricsRegistry
+
+
+def _registry(multiproc_dir=None):
+    registry = MetricsRegistry()
+    registry.counter('calls_total', 'Calls')
+    registry.gauge('in_flight', 'In flight')
+    registry.histogram('latency_seconds', 'Latency', buckets=(1.0, 5.0))
+    registry.multiproc_dir = multiproc_dir
+    return registry
+
+
+def test_render_histogram_and_counter():
+    registry = _registry()
+    registry.inc('calls_total', provider='openai')
+    registry.observe('latency_seconds', 2.0, provider='openai')
+
+    text = registry.render()
+    assert 'calls_total{provider="openai"} 1.0' in text
+    assert 'latency_seconds_bucket{provider="openai",le="1.0"} 0' in text
+    assert 'latency_seconds_bucket{provider="openai",le="5.0"} 1' in text
+    assert 'latency_seconds_count{provider="openai"} 1' in text
+
+
+def test_aggregates_worker_snapshots(tmp_path):
+    registry = _registry(str(tmp_path))
+    registry.inc('calls_total', 2, provider='openai')
+    registry.inc('in_flight', provider='openai')
+    registry.observe('latency_seconds', 0.5, provider='openai')
+
+    # Snapshot left behind by a worker that has since exited
+    dead_pid = 2 ** 22 + 12345
+    with open(tmp_path / f'metrics_{dead_pid}.json', 'w') as f:
+        json.dump({
+            'pid': dead_pid,
+            'values': {
+                'calls_total': [[[['provider', 'openai']], 3.0]],
+                'in_flight': [[[['provider', 'openai']], 4.0]],
+                'latency_seconds': [[[['provider', 'openai']],
+                                     {'buckets': [0, 1], 'sum': 4.0, 'count': 1}]]
+            }
+        }, f)
+
+    collected = registry.collect()
+    key = (('provider', 'openai'),)
+    assert collected['calls_total'][key] == 5.0
+    # Gauges from dead workers are ignored
+    assert collected['in_flight'][key] == 1.0
+    assert collected['latency_seconds'][key]['buckets'] == [1, 2]
+    assert collected['latency_seconds'][key]['count'] == 2
+
+
+
+def test_concurrent_updates_keep_the_snapshot_readable(tmp_path):
+    registry = _registry(str(tmp_path))
+    registry.flush_interval = 0  # Write on every update to maximize contention
+
+    def work():
+        for _ in range(200):
+            registry.inc('calls_total', provider='openai')
+            registry.observe('latency_seconds', 0.5, provider='openai')
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(tmp_path / f'metrics_{os.getpid()}.json') as f:
+        snapshot = json.load(f)
+    assert snapshot['values']['calls_total'] == [[[['provider', 'openai']], 1600.0]]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+    assert registry.collect()['latency_seconds'][(('provider', 'openai'),)]['count'] == 1600
+
+
+def test_reused_pid_does_not_overwrite_a_dead_worker(tmp_path):
+    # Snapshot of an exited worker whose PID this process now has
+    with open(tmp_path / f'metrics_{os.getpid()}.json', 'w') as f:
+        json.dump({'pid': os.getpid(), 'values': {
+            'calls_total': [[[['provider', 'openai']], 3.0]],
+            'in_flight': [[[['provider', 'openai']], 4.0]]
+        }}, f)
+
+    registry = _registry(str(tmp_path))
+    registry.inc('calls_total', provider='openai')
+
+    collected = registry.collect()
+    key = (('provider', 'openai'),)
+    assert collected['calls_total'][key] == 4.0
+    assert key not in collected['in_flight']
+    assert len([name for name in os.listdir(tmp_path) if name.startswith('metrics_dead_')]) == 1
+
+def test_estimate_cost_matches_model_prefix():
+    registry = _registry()
+    registry.pricing = {'gpt-4.1': {'input': 2.0, 'output': 8.0}}
+    assert registry.estimate_cost('gpt-4.1-2025-04-14', 1_000_000, 0) == pytest.approx(2.0)
+    assert registry.estimate_cost('unknown-model', 1000, 1000) == 0.0
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory portfolio index behind what-if ranking simulations
+Run with: python -m pytest test_portfolio_index.py
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db, Project, Evaluation
+from services.portfolio_index import portfolio_index
+
+
+class PortfolioConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+
+def add_project(titre, scores, duree=None):
+    project = Project(titre=titre, pvp='Opérations', contexte='c' * 100, duree_estimee=duree,
+                      objectifs='o' * 100, fonctionnalites='f' * 100)
+    db.session.add(project)
+    db.session.flush()
+    db.session.add(Evaluation(
+        project_id=project.id,
+        valeur_business=scores[0],
+        faisabilite_technique=scores[1],
+        effort_requis=scores[2],
+        niveau_risque=scores[3],
+        urgence=scores[4],
+        alignement_strategique=scores[5],
+        score_final=0.0
+    ))
+    db.session.commit()
+    return project
+
+
+@pytest.fixture
+def app():
+    app = create_app(PortfolioConfig)
+    with app.app_context():
+        Evaluation.query.delete()
+        Project.query.delete()
+        db.session.commit()
+        add_project('Business', (9, 5, 5, 5, 2, 5), duree=100)
+        add_project('Urgent', (4, 5, 5, 5, 9, 5), duree=60)
+    return app
+
+
+def test_simulation_reranks_without_changing_scores(app):
+    client = app.test_client()
+    response = client.post('/api/rankings/simulate', json={
+        'weights': {'valeur_business': 0.05, 'urgence': 0.35},
+        'thresholds': {'medium': 5.5}
+    })
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data['total_projects'] == 2
+    assert data['projects_moved'] == 2
+    top = data['projects'][0]
+    assert top['titre'] == 'Urgent'
+    assert (top['rank'], top['simulated_rank'], top['rank_delta']) == (2, 1, 1)
+    assert top['simulated_score'] == pytest.approx(6.35)
+    assert data['priority_changes'] == {'moyenne->faible': 1}
+
+    with app.app_context():
+        assert [e.score_final for e in Evaluation.query.all()] == [0.0, 0.0]
+
+
+def test_index_follows_commits(app):
+    client = app.test_client()
+    client.post('/api/rankings/simulate', json={})
+
+    with app.app_context():
+        add_project('Nouveau', (10, 10, 10, 10, 10, 10))
+        business = Project.query.filter_by(titre='Business').one()
+        business.titre = 'Renommé'
+        db.session.commit()
+
+        incremental = (sorted(portfolio_index.project_ids), sorted(portfolio_index.titles))
+        portfolio_index.invalidate()
+        portfolio_index.ensure_loaded()
+        assert incremental == (sorted(portfolio_index.project_ids), sorted(portfolio_index.titles))
+
+    data = client.post('/api/rankings/simulate', json={'limit': 1}).get_json()
+    assert data['total_projects'] == 3
+    assert [p['titre'] for p in data['projects']] == ['Nouveau']
+
+
+def test_optimal_selection_beats_greedy(app):
+    with app.app_context():
+        add_project('Petit', (6, 5, 5, 5, 2, 5), duree=40)
+    client = app.test_client()
+    data = client.post('/api/portfolio/optimize', json={'capacities': {'Opérations': 100}}).get_json()
+
+    department = data['departments'][0]
+    # Greedy funds the best project alone; the solver fits the two others
+    assert department['greedy']['project_ids'] == [1]
+    assert sorted(department['optimal']['project_ids']) == [2, 3]
+    assert department['optimal']['days'] <= 100
+    assert data['gain'] > 0
+
+
+def test_invalid_simulation_is_rejected(app):
+    client = app.test_client()
+    assert client.post('/api/rankings/simulate', json={'weights': {'inconnu': 1}}).status_code == 400
+    assert client.post('/api/rankings/simulate', json={'weights': {'urgence': 'x'}}).status_code == 400
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
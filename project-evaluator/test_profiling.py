@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-demand request profiler and the /admin/profiling endpoints
+Run with: python -m pytest test_profiling.py
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from services.profiling import request_profiler
+
+ADMIN = {'X-Admin-Token': 'secret'}
+
+
+class ProfilingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    ADMIN_TOKEN = 'secret'
+    EVALUATION_QUEUE_WORKERS = 0
+    PROFILE_INTERVAL = 0.001
+
+
+def _config(tmp_path):
+    return type('Config', (ProfilingConfig,), {
+        'PROFILE_OUTPUT_DIR': str(tmp_path / 'profiles'),
+        'RUNTIME_SETTINGS_FILE': str(tmp_path / 'settings.json')
+    })
+
+
+@pytest.fixture
+def app(tmp_path):
+    return create_app(_config(tmp_path))
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _profiles(app, endpoint):
+    directory = os.path.join(app.config['PROFILE_OUTPUT_DIR'], endpoint)
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_profile_header_requires_the_admin_token(app, client):
+    response = client.get('/api/projects', headers={'X-Profile': '1'})
+    assert 'X-Profile-Endpoint' not in response.headers
+    assert _profiles(app, 'api.get_projects') == []
+
+    response = client.get('/api/projects', headers=dict(ADMIN, **{'X-Profile': '1'}))
+    assert response.headers['X-Profile-Endpoint'] == 'api.get_projects'
+    files = _profiles(app, 'api.get_projects')
+    assert len(files) == 1 and files[0].endswith('.folded')
+
+    # Folded format: semicolon-separated frames, then the sample count
+    with open(os.path.join(app.config['PROFILE_OUTPUT_DIR'], 'api.get_projects', files[0]), encoding='utf-8') as f:
+        for line in f:
+            stack, count = line.rsplit(' ', 1)
+            assert ';' in stack and int(count) > 0
+
+
+def test_sample_rate_is_kept(app, client, tmp_path):
+    assert client.put('/admin/profiling', json={'endpoint': 'api.get_projects', 'rate': 1.0}).status_code == 403
+    response = client.put('/admin/profiling', json={'endpoint': 'api.get_projects', 'rate': 2}, headers=ADMIN)
+    assert response.get_json()['sample_rates'] == {'api.get_projects': 1.0}
+    assert client.put('/admin/profiling', json={'rate': 0.5}, headers=ADMIN).status_code == 400
+
+    # Stored in the runtime settings file shared by the workers
+    create_app(_config(tmp_path))
+    assert request_profiler.get_sample_rates() == {'api.get_projects': 1.0}
+
+    # Sampled requests are profiled without the header
+    client.get('/api/projects')
+    listing = client.get('/admin/profiling', headers=ADMIN).get_json()
+    assert listing['sample_rates'] == {'api.get_projects': 1.0}
+    assert [profile['endpoint'] for profile in listing['profiles']] == ['api.get_projects']
+
+    client.put('/admin/profiling', json={'endpoint': 'api.get_projects', 'rate': 0}, headers=ADMIN)
+    assert client.get('/admin/profiling', headers=ADMIN).get_json()['sample_rates'] == {}
+
+
+def test_profile_download_stays_in_the_output_directory(app, client, tmp_path):
+    client.get('/api/projects', headers=dict(ADMIN, **{'X-Profile': '1'}))
+    filename = _profiles(app, 'api.get_projects')[0]
+    response = client.get(f'/admin/profiling/api.get_projects/{filename}', headers=ADMIN)
+    assert response.status_code == 200
+    assert filename in response.headers['Content-Disposition']
+    assert client.get(f'/admin/profiling/api.get_projects/{filename}').status_code == 403
+
+    secret = tmp_path / 'secret.folded'
+    secret.write_text('main 1\n')
+    assert client.get('/admin/profiling/../secret.folded', headers=ADMIN).status_code == 404
+    assert client.get('/admin/profiling/api.get_projects/..%2F..%2Fsecret.folded', headers=ADMIN).status_code == 404
+    assert request_profiler.profile_path('..', 'secret.folded') is None
+    assert request_profiler.profile_path('api.get_projects', str(secret)) is None
+    assert request_profiler.profile_path(str(tmp_path), 'secret.folded') is None
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
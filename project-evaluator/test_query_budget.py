@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+SQL query budget tests for the listing and detail views
+Run with: python -m pytest test_query_budget.py
+"""
+import os
+import sys
+import re
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db, Project, Evaluation
+from services.query_monitor import QueryBudgetExceeded, statement_shape
+
+DEFERRED_TEXTS = ('contexte', 'objectifs', 'fonctionnalites', 'defis_techniques')
+
+
+class QueryBudgetConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQL_QUERY_BUDGET_STRICT = True
+
+
+def _add_projects(count):
+    """Add evaluated projects so that N+1 patterns become visible"""
+    for i in range(count):
+        project = Project(
+            titre=f'Projet de test {i}',
+            pvp='Opérations',
+            contexte='Contexte ' * 20,
+            objectifs='Objectifs ' * 20,
+            fonctionnalites='Fonctionnalités ' * 20
+        )
+        db.session.add(project)
+        db.session.flush()
+        for score in (4.0, 6.5):
+            evaluation = Evaluation(
+                project_id=project.id,
+                valeur_business=score,
+                faisabilite_technique=score,
+                effort_requis=score,
+                niveau_risque=score,
+                urgence=score,
+                alignement_strategique=score,
+                score_final=score
+            )
+            evaluation.set_suggestions({'valeur_business': 'Suggestion'})
+            db.session.add(evaluation)
+    db.session.commit()
+
+
+@pytest.fixture
+def app():
+    app = create_app(QueryBudgetConfig)
+    with app.app_context():
+        _add_projects(20)
+    return app
+
+
+def _query_count(response):
+    """Extract the query count from the Server-Timing header"""
+    header = response.headers.get('Server-Timing', '')
+    match = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', header)
+    assert match, f"Missing Server-Timing header: {header!r}"
+    return int(match.group(1))
+
+
+def test_index_query_budget(app):
+    response = app.test_client().get('/')
+    assert response.status_code == 200
+    assert _query_count(response) <= app.config['SQL_QUERY_BUDGETS']['main.index']
+
+
+def test_project_detail_query_budget(app):
+    response = app.test_client().get('/projects/4')
+    assert response.status_code == 200
+    assert _query_count(response) <= app.config['SQL_QUERY_BUDGETS']['main.project_detail']
+
+
+def test_get_projects_query_budget(app):
+    response = app.test_client().get('/api/projects')
+    assert response.status_code == 200
+    assert len(response.get_json()['projects']) == 23
+    assert _query_count(response) <= app.config['SQL_QUERY_BUDGETS']['api.get_projects']
+
+
+
+def test_filtered_projects_query_budget(app):
+    response = app.test_client().get('/api/projects?pvp=Opérations&priority=moyenne&sort=titre&limit=5')
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['total'] == 20
+    assert [p['titre'] for p in data['projects']] == sorted(p['titre'] for p in data['projects'])
+    assert len(data['projects']) == 5
+    assert _query_count(response) <= app.config['SQL_QUERY_BUDGETS']['api.get_projects']
+
+
+def test_sparse_fields_and_multi_get(app):
+    response = app.test_client().get('/api/projects?ids=5,4,999&fields=id,titre,score_final,priority&include=evaluation')
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['missing'] == [999]
+    assert [set(p) for p in data['projects']] == [{'id', 'titre', 'score_final', 'priority', 'evaluation'}] * 2
+    assert all(p['evaluation']['score_final'] == p['score_final'] == 6.5 for p in data['projects'])
+    assert _query_count(response) <= app.config['SQL_QUERY_BUDGETS']['api.get_projects']
+
+
+def _text_loads(app, url):
+    """Statements of a request that select the deferred 'texts' columns of projects"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        assert app.test_client().get(url).status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return [s for s in statements if s.lstrip().upper().startswith('SELECT')
+            and any(f'projects.{column}' in s for column in DEFERRED_TEXTS)]
+
+
+@pytest.mark.parametrize('url', ['/', '/api/projects?fields=id,titre,pvp,score_final,priority&include=evaluation',
+                                 '/api/changes?fields=id,titre'])
+def test_listings_do_not_load_deferred_texts(app, url):
+    assert _text_loads(app, url) == []
+
+
+def test_full_listing_loads_texts_in_one_query(app):
+    # to_dict() reads the texts: the full representation undefers them instead of loading them per row
+    assert len(_text_loads(app, '/api/projects')) == 1
+
+
+@pytest.mark.parametrize('url', ['/', '/projects/4', '/api/projects?sort=titre', '/api/projects/4'])
+def test_conditional_requests_cost_one_query(app, url):
+    client = app.test_client()
+    etag = client.get(url).headers['ETag']
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert _query_count(response) == 1
+
+    # Any write to the portfolio changes the listing version; the detail only follows its project
+    with app.app_context():
+        db.session.get(Project, 5).titre = 'Titre modifié'
+        db.session.commit()
+    expected = 200 if url in ('/', '/api/projects?sort=titre') else 304
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == expected
+
+
+def test_response_cache_is_invalidated_by_commits(app):
+    client = app.test_client()
+    url = '/api/projects?sort=titre&fields=id,titre'
+    client.get(url)
+
+    response = client.get(url)
+    assert _query_count(response) == 1
+
+    with app.app_context():
+        db.session.get(Project, 5).titre = 'AAA premier'
+        db.session.commit()
+    response = client.get(url)
+    assert response.get_json()['projects'][0]['titre'] == 'AAA premier'
+    assert _query_count(response) > 1
+
+
+def test_n_plus_one_is_detected(app):
+    @app.route('/n-plus-one')
+    def n_plus_one():
+        projects = Project.query.all()
+        return {'evaluations': sum(len(p.evaluations) for p in projects)}
+
+    with pytest.raises(QueryBudgetExceeded):
+        app.test_client().get('/n-plus-one')
+
+
+def test_statement_shape_ignores_parameters():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == \
+        statement_shape("SELECT * FROM t  WHERE id IN (?, ?)")
+    assert statement_shape("SELECT * FROM t WHERE id = 12") == \
+        statement_shape("SELECT * FROM t WHERE id = 7")
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for reevaluation decisions and partial re-evaluation of edited projects
+Run with: python -m pytest test_reevaluation.py
+"""
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db, Project, Evaluation
+from services.ai_service import AIService
+from services.evaluations import record_evaluation, reevaluate_project, update_project
+from services.leaderboard import check_leaderboard
+from services.providers.openai_provider import OpenAIProvider
+
+MODEL = 'gpt-4.1-2025-04-14'
+SCORES = {'valeur_business': 8.0, 'faisabilite_technique': 6.0, 'effort_requis': 5.0,
+          'niveau_risque': 7.0, 'urgence': 4.0, 'alignement_strategique': 9.0}
+
+
+class ReevaluationConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVALUATION_QUEUE_WORKERS = 0
+    ROUTING_POLICY = 'static'
+    EVALUATION_CASCADE_ENABLED = False
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Models called by the fake OpenAI provider, in order"""
+    calls = []
+
+    def complete(self, model, system_message, user_prompt, parameters):
+        calls.append(model)
+        return json.dumps({'scores': SCORES, 'suggestions': {c: f'Suggestion {c}' for c in SCORES},
+                           'defis_techniques': ['Défi'], 'duree_estimee': 60}), {}
+
+    monkeypatch.setattr(OpenAIProvider, '_complete', complete)
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    monkeypatch.setenv('DEFAULT_AI_PROVIDER', 'openai')
+    monkeypatch.setenv('DEFAULT_AI_MODEL', MODEL)
+    return calls
+
+
+@pytest.fixture
+def app(tmp_path, calls):
+    config = type('Config', (ReevaluationConfig,), {'RUNTIME_SETTINGS_FILE': str(tmp_path / 'settings.json')})
+    app = create_app(config)
+    with app.app_context():
+        project = db.session.get(Project, 1)
+        record_evaluation(project, AIService().evaluate_project(project.evaluable_data))
+        db.session.commit()
+        calls.clear()
+        yield app
+
+
+def _reevaluate(**changes):
+    project = db.session.get(Project, 1)
+    for name, value in changes.items():
+        setattr(project.latest_evaluation if name in ('model', 'prompt_version') else project, name, value)
+    evaluation, status = reevaluate_project(project)
+    db.session.commit()
+    return evaluation, status
+
+
+def test_unchanged_project_skips_the_model(app, calls):
+    latest_id = db.session.get(Project, 1).latest_evaluation.id
+    evaluation, status = _reevaluate()
+    assert (status, evaluation.id, calls) == ('unchanged', latest_id, [])
+
+
+@pytest.mark.parametrize('changes', [
+    {'contexte': 'Contexte entièrement réécrit. ' * 5},
+    {'model': 'gpt-4o'},
+    {'prompt_version': '0.9'},
+], ids=['content_hash', 'model', 'prompt_version'])
+def test_changed_inputs_call_the_model(app, calls, changes):
+    evaluation, status = _reevaluate(**changes)
+    assert status == 'evaluated'
+    assert calls == [MODEL]
+    assert Evaluation.query.filter_by(project_id=1).count() == 2
+
+
+def test_changed_weights_rescore_in_place(app, calls):
+    latest = db.session.get(Project, 1).latest_evaluation
+    latest_id, fingerprint = latest.id, latest.weights_fingerprint
+    weights = dict(app.config['EVALUATION_WEIGHTS'], valeur_business=0.5, alignement_strategique=0.0)
+    app.config['EVALUATION_WEIGHTS'] = weights
+
+    evaluation, status = _reevaluate()
+    assert status == 'rescored'
+    assert calls == []
+    assert evaluation.id == latest_id
+    assert evaluation.weights_fingerprint != fingerprint
+    assert evaluation.score_final == pytest.approx(sum(SCORES[c] * w for c, w in weights.items()), abs=0.01)
+    assert Evaluation.query.filter_by(project_id=1).count() == 1
+    assert check_leaderboard()['consistent']
+
+    # The new weights are now recorded: nothing left to do
+    assert _reevaluate()[1] == 'unchanged'
+
+
+def _project_form(**changes):
+    project = db.session.get(Project, 1)
+    form = {field: getattr(project, field) for field in ('titre', 'pvp', 'contexte', 'objectifs', 'fonctionnalites')}
+    form.update(changes)
+    return form
+
+
+@pytest.mark.parametrize('changes,criteria', [
+    ({'fonctionnalites': 'Nouvelles fonctionnalités détaillées. ' * 4},
+     ['faisabilite_technique', 'effort_requis', 'niveau_risque']),
+    ({'pvp': 'Opérations'}, ['urgence', 'alignement_strategique']),
+    ({'titre': 'Nouveau titre', 'pvp': 'Opérations'}, ['valeur_business', 'urgence', 'alignement_strategique']),
+])
+def test_api_edit_re_evaluates_affected_criteria(app, calls, changes, criteria):
+    previous = db.session.get(Project, 1).latest_evaluation.scores
+    response = app.test_client().put('/api/projects/1', json=changes)
+    data = response.get_json()
+    assert response.status_code == 200
+    assert (data['status'], data['re_evaluated_criteria']) == ('partial', criteria)
+    assert calls == [MODEL]
+
+    evaluation = db.session.get(Project, 1).latest_evaluation
+    assert evaluation.model == MODEL
+    assert evaluation.prompt_version is not None
+    # Criteria outside the mapping are carried forward
+    assert all(evaluation.scores[c] == previous[c] for c in SCORES if c not in criteria)
+
+
+def test_api_edit_without_changes(app, calls):
+    project = db.session.get(Project, 1)
+    response = app.test_client().put('/api/projects/1', json={'titre': project.titre})
+    assert response.get_json()['status'] == 'unchanged'
+    assert calls == []
+    assert Evaluation.query.filter_by(project_id=1).count() == 1
+
+
+def test_edit_form_statuses(app, calls):
+    client = app.test_client()
+    response = client.post('/projects/1/edit', data=_project_form(), follow_redirects=True)
+    assert 'Aucune modification détectée.' in response.get_data(as_text=True)
+    assert calls == []
+
+    response = client.post('/projects/1/edit', data=_project_form(pvp='Finance et Comptabilité'),
+                           follow_redirects=True)
+    assert 'Projet modifié : 2 critère(s) réévalué(s).' in response.get_data(as_text=True)
+    assert calls == [MODEL]
+    assert Evaluation.query.filter_by(project_id=1).count() == 2
+
+
+def test_partial_evaluation_records_the_answering_model(app):
+    class FallbackService:
+        def evaluate_criteria(self, project_data, changed_fields, criteria, previous_scores):
+            return {'scores': {c: 3.0 for c in criteria}, 'suggestions': {},
+                    'metadata': {'provider': 'anthropic', 'model': 'claude-4-sonnet', 'prompt_version': '1.0'}}
+
+    project = db.session.get(Project, 1)
+    evaluation, status, _ = update_project(project, {'pvp': 'Opérations'}, ai_service=FallbackService())
+    db.session.commit()
+    assert status == 'partial'
+    assert (evaluation.model, evaluation.prompt_version) == ('claude-4-sonnet', None)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
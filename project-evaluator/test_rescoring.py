@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for set-based portfolio re-scoring
+Run with: python -m pytest test_rescoring.py
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db, Project, Evaluation, WeightSet
+from services.rescoring import rescore_evaluations
+from services.scoring import compute_score_final, weights_fingerprint
+
+
+class RescoringConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+
+@pytest.fixture
+def app():
+    app = create_app(RescoringConfig)
+    with app.app_context():
+        for i, scores in enumerate([(9, 8, 7, 6, 5, 4), (2, 3, 4, 5, 6, 7)]):
+            project = Project(titre=f'Projet {i}', pvp='Opérations', contexte='c' * 100,
+                              objectifs='o' * 100, fonctionnalites='f' * 100)
+            db.session.add(project)
+            db.session.flush()
+            db.session.add(Evaluation(
+                project_id=project.id,
+                valeur_business=scores[0],
+                faisabilite_technique=scores[1],
+                effort_requis=scores[2],
+                niveau_risque=scores[3],
+                urgence=scores[4],
+                alignement_strategique=scores[5],
+                score_final=0.0
+            ))
+        db.session.commit()
+    return app
+
+
+def test_rescore_matches_python_scoring(app):
+    with app.app_context():
+        weights = app.config['EVALUATION_WEIGHTS']
+        result = rescore_evaluations(weights)
+
+        assert result['updated'] == 2
+        assert result['weight_set']['version'] == 1
+        for evaluation in Evaluation.query.all():
+            assert evaluation.score_final == pytest.approx(compute_score_final(evaluation.scores, weights))
+            assert evaluation.weights_fingerprint == weights_fingerprint(weights)
+
+        # Already scored with these weights
+        assert rescore_evaluations(weights)['updated'] == 0
+
+
+def test_new_weights_create_a_new_version(app):
+    with app.app_context():
+        rescore_evaluations(app.config['EVALUATION_WEIGHTS'])
+        weights = dict(app.config['EVALUATION_WEIGHTS'], valeur_business=0.05, urgence=0.35)
+        result = rescore_evaluations(weights)
+
+        assert result['updated'] == 2
+        assert result['weight_set']['version'] == 2
+        assert WeightSet.query.count() == 2
+
+        app.config['EVALUATION_WEIGHTS'] = weights
+        project = Project.query.filter_by(titre='Projet 0').one()
+        assert project.latest_evaluation.score_final == pytest.approx(6.15)
+        assert project.priority_level == 'moyenne'
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
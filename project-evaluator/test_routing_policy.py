@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for adaptive provider routing
+Run with: python -m pytest test_routing_policy.py
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.routing_policy import AdaptiveRoutingPolicy
+from services.runtime_settings import runtime_settings
+
+
+CANDIDATES = [('openai', 'gpt-4.1'), ('anthropic', 'gpt-4.1'), ('google', 'gpt-4.1')]
+
+
+@pytest.fixture
+def policy(tmp_path):
+    runtime_settings.path = str(tmp_path / 'runtime_settings.json')
+    return AdaptiveRoutingPolicy(alpha=0.5, prior_latency=10.0)
+
+
+def test_unobserved_routes_keep_static_order(policy):
+    assert policy.order(CANDIDATES) == ['openai', 'anthropic', 'google']
+
+
+def test_slow_and_failing_providers_move_back(policy):
+    policy.record('openai', 'gpt-4.1', 15.0, True)
+    policy.record('anthropic', 'gpt-4.1', 2.0, True)
+    policy.record('google', 'gpt-4.1', 1.0, False)
+
+    assert policy.order(CANDIDATES) == ['anthropic', 'openai', 'google']
+    decision = policy.get_decisions(1)[0]
+    assert decision['order'] == ['anthropic', 'openai', 'google']
+    assert {route['provider']: route['status'] for route in decision['routes']}['openai'] == 'ranked'
+
+
+def test_constraints(policy):
+    policy.record('anthropic', 'gpt-4.1', 2.0, True)
+    policy.set_constraints({'pinned_primary': 'google', 'excluded': ['openai'],
+                            'max_cost_per_call': None})
+    assert policy.order(CANDIDATES) == ['google', 'anthropic']
+
+    # An explicitly preferred provider still comes first
+    assert policy.order(CANDIDATES, preferred='openai') == ['openai', 'google', 'anthropic']
+
+
+
+def test_fast_failures_do_not_look_fast(policy):
+    # openai fails instantly (e.g. authentication error), anthropic is slow but healthy
+    for _ in range(5):
+        policy.record('openai', 'gpt-4.1', 0.05, False)
+        policy.record('anthropic', 'gpt-4.1', 10.0, True)
+
+    assert policy.order(CANDIDATES) == ['anthropic', 'google', 'openai']
+    broken = policy.estimate('openai', 'gpt-4.1')
+    assert broken['latency_ewma'] == 10.0  # No success observed: the prior is kept
+    assert broken['expected_time'] > policy.estimate('anthropic', 'gpt-4.1')['expected_time']
+
+
+def test_empty_order_is_logged(policy, caplog):
+    policy.set_constraints({'pinned_primary': None, 'excluded': ['openai', 'anthropic', 'google'],
+                            'max_cost_per_call': None})
+    assert policy.order(CANDIDATES) == []
+    assert 'No provider left for evaluation' in caplog.text
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
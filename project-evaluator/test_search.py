@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for server-side full-text project search
+Run with: python -m pytest test_search.py
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db, Project
+
+
+class SearchConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+
+@pytest.fixture
+def client():
+    app = create_app(SearchConfig)
+    with app.app_context():
+        db.session.add(Project(titre='Entrepôt de données financières', pvp='Finance et Comptabilité',
+                               contexte='c' * 100, objectifs='o' * 100, fonctionnalites='f' * 100))
+        db.session.commit()
+    return app.test_client()
+
+
+def search(client, query):
+    return [result['titre'] for result in client.get(f'/api/projects/search?q={query}').get_json()['results']]
+
+
+def test_search_ignores_accents_and_ranks_titles_first(client):
+    assert search(client, 'entrepot financieres') == ['Entrepôt de données financières']
+    assert search(client, 'gestion ressources')[0] == 'Système de Gestion des Ressources Humaines'
+
+
+def test_index_follows_updates_and_deletes(client):
+    client.put('/api/projects/4', json={'titre': 'Lac de données'})
+    assert search(client, 'entrepot') == []
+    assert search(client, 'lac') == ['Lac de données']
+
+    client.delete('/api/projects/4')
+    assert search(client, 'lac') == []
+
+
+def test_hits_outside_the_loaded_page_can_be_rendered(client):
+    # The dashboard renders the hits from the listing API, not from the rows it already loaded
+    client.application.config['INDEX_PAGE_SIZE'] = 1
+    assert 'Entrepôt de données financières' not in client.get('/').get_data(as_text=True)
+
+    ids = [result['id'] for result in client.get('/api/projects/search?q=entrepot').get_json()['results']]
+    fields = 'id,titre,pvp,score_final,priority,priority_text,action_text,created_at'
+    listing = client.get(f"/api/projects?ids={','.join(map(str, ids))}&fields={fields}").get_json()
+    assert [project['titre'] for project in listing['projects']] == ['Entrepôt de données financières']
+    assert set(listing['projects'][0]) == set(fields.split(','))
+
+
+def test_query_is_required(client):
+    assert client.get('/api/projects/search?q=').status_code == 400
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
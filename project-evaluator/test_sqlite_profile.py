@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+SQLite production profile tests
+Run with: python -m pytest test_sqlite_profile.py
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from models import db
+
+
+def _config(uri, **settings):
+    return type('SQLiteProfileConfig', (Config,), dict(
+        TESTING=True, SQLALCHEMY_DATABASE_URI=uri, EVALUATION_QUEUE_WORKERS=0, **settings
+    ))
+
+
+def _pragma(name):
+    return db.session.execute(db.text(f'PRAGMA {name}')).scalar()
+
+
+def test_file_database_gets_the_profile(tmp_path):
+    app = create_app(_config(f"sqlite:///{tmp_path / 'projects.db'}", SQLITE_CACHE_SIZE_MB=32))
+    with app.app_context():
+        assert _pragma('journal_mode') == 'wal'
+        assert _pragma('synchronous') == 1  # NORMAL
+        assert _pragma('busy_timeout') == 5000
+        assert _pragma('cache_size') == -32 * 1024
+        assert db.engine.pool.size() == app.config['SQLITE_POOL_SIZE']
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.mark.parametrize('uri,enabled', [('sqlite://', True), ('sqlite:///{path}', False)])
+def test_profile_is_skipped(tmp_path, uri, enabled):
+    app = create_app(_config(uri.format(path=tmp_path / 'projects.db'), SQLITE_PROFILE_ENABLED=enabled))
+    with app.app_context():
+        assert _pragma('journal_mode') in ('memory', 'delete')
+        assert 'pool_size' not in app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        db.session.remove()
+        db.engine.dispose()
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for request tracing and the /admin/traces endpoint
+Run with: python -m pytest test_tracing.py
+"""
+import os
+import sys
+import threading
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from services.tracing import Tracer, NOOP_SPAN
+
+
+class TracingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    ADMIN_TOKEN = 'secret'
+    TRACE_SAMPLE_RATE = 0.0
+    EVALUATION_QUEUE_WORKERS = 0
+
+
+def test_spans_nest_under_the_current_span():
+    tracer = Tracer()
+    root = tracer.start_trace('root', force=True)
+    with tracer.span('child') as child:
+        with tracer.span('grandchild') as grandchild:
+            assert tracer.current_span() is grandchild
+        assert tracer.current_span() is child
+    with pytest.raises(RuntimeError):
+        with tracer.span('failing'):
+            raise RuntimeError('boom')
+    tracer.finish_trace(root)
+
+    spans = {span['name']: span for span in tracer.exporter.get_traces()[0]}
+    assert spans['child']['parent_id'] == spans['root']['span_id']
+    assert spans['grandchild']['parent_id'] == spans['child']['span_id']
+    assert spans['failing']['status'] == 'error'
+    assert all(span['duration_ms'] is not None for span in spans.values())
+    assert tracer.current_span() is NOOP_SPAN
+
+
+def test_unsampled_requests_create_no_spans():
+    tracer = Tracer(sample_rate=0.0)
+    assert tracer.start_trace('root') is NOOP_SPAN
+    with tracer.span('child') as span:
+        assert span is NOOP_SPAN
+    assert tracer.exporter.get_traces() == []
+
+
+def test_threads_do_not_share_the_current_span():
+    tracer = Tracer()
+    seen = {}
+    barrier = threading.Barrier(2)
+
+    def work(name):
+        root = tracer.start_trace(name, force=True)
+        barrier.wait()  # Both traces are open at the same time
+        with tracer.span(f'{name}.child') as child:
+            seen[name] = (root.trace.trace_id, child.trace.trace_id, child.parent_id == root.span_id)
+        tracer.finish_trace(root)
+
+    threads = [threading.Thread(target=work, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(root_id == child_id and is_child for root_id, child_id, is_child in seen.values())
+    assert seen['a'][0] != seen['b'][0]
+    assert len(tracer.exporter.get_traces()) == 2
+
+
+def test_admin_traces_requires_the_token():
+    client = create_app(TracingConfig).test_client()
+    assert client.get('/admin/traces').status_code == 403
+    assert client.get('/admin/traces', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+
+    # X-Trace only forces sampling for admins
+    assert 'X-Trace-Id' not in client.get('/api/projects', headers={'X-Trace': '1'}).headers
+    traced = client.get('/api/projects', headers={'X-Trace': '1', 'X-Admin-Token': 'secret'})
+    trace_id = traced.headers['X-Trace-Id']
+
+    response = client.get('/admin/traces', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.get_json()['traces'][0][0]['trace_id'] == trace_id
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))